@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Clause-boundary chunker vs the previous LangChain RecursiveCharacterTextSplitter.
+
+For synthetic contracts of increasing size, measures chunking throughput,
+chunk counts, how many numbered sections end up cut across chunks, and how
+much text gets embedded relative to the document (overlap inflation).
+
+    python benchmarks/bench_chunker.py --sizes 100 1000 10000
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.document_processor import DocumentProcessor
+from benchmarks.fixtures import synthetic_contract
+
+
+def langchain_splitter(processor):
+    """The splitter DocumentProcessor used before, applied to the flattened text as it was"""
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        return None
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50, separators=["\n\n", "\n", ". ", " ", ""])
+    return lambda text: splitter.split_text(processor.clean_text(text))
+
+
+def section_bodies(processor, text):
+    sections = re.split(r"\n(?=\d+\.\s)", text)
+    return [processor.clean_text(section) for section in sections if re.match(r"\d+\.\s", section)]
+
+
+def measure(name, split, processor, text, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = split(text)
+        timings.append(time.perf_counter() - start)
+    seconds = statistics.median(timings)
+
+    sections = section_bodies(processor, text)
+    cut = sum(1 for section in sections if not any(section in chunk for chunk in chunks))
+    return {
+        "chunker": name,
+        "mb_per_sec": round(len(text.encode()) / seconds / 1e6, 2),
+        "ms": round(seconds * 1000, 2),
+        "chunks": len(chunks),
+        "sections_cut": f"{cut}/{len(sections)}",
+        "embedded_chars_ratio": round(sum(len(chunk) for chunk in chunks) / len(processor.clean_text(text)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Contract sizes in clauses")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+    baseline = langchain_splitter(processor)
+    if baseline is None:
+        print("langchain is not installed; reporting the clause chunker only")
+
+    for size in args.sizes:
+        text = synthetic_contract(size)
+        print(f"{size} clauses, {len(text.encode()) / 1e6:.2f} MB")
+        if baseline is not None:
+            print(" ", measure("langchain", baseline, processor, text, args.repeats))
+        print(" ", measure("clause", processor.text_splitter.split, processor, text, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
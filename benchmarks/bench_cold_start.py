@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+First-request latency after startup, with and without the warm-up stage.
+
+Each run seeds a persisted Chroma directory in one process, then starts a
+fresh interpreter that opens it like a restarted server and times the first
+upload, the first /analyze and later analyses of equally sized contracts.
+With ``--warmup N`` that process runs main.warm_up(N) (what the lifespan does
+before /ready reports ready) first, so the first request meets warm caches,
+kernels and indexes.
+
+    python benchmarks/bench_cold_start.py --runs 3 --clauses 50 --warmup 2
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fixtures import ROOT, build_stub_system, make_pdf, summarize, synthetic_contract
+
+
+def seed(chroma_path: str, precedents: int):
+    build_stub_system(precedents=precedents, chroma_path=chroma_path)
+
+
+def measure(chroma_path: str, precedents: int, clauses: int, documents: int, warmup: int, llm_latency_ms: float) -> dict:
+    """Runs in a fresh interpreter: optional warm-up, then uploads and analyses"""
+    os.chdir(ROOT)  # main.py mounts ./static and ./templates
+    from fastapi.testclient import TestClient
+    import main
+
+    system = build_stub_system(precedents=precedents, chroma_path=chroma_path, llm_latency_ms=llm_latency_ms)
+    for name, component in system.items():
+        setattr(main, name, component)
+    client = TestClient(main.app)
+
+    warmup_ms = None
+    if warmup:
+        started = time.perf_counter()
+        main.warm_up(warmup)
+        warmup_ms = (time.perf_counter() - started) * 1000
+
+    # The same contract every time (analyses are never shared between uploads), so only warmth differs
+    pdf = make_pdf(synthetic_contract(clauses))
+    upload_ms, analyze_ms = [], []
+    for i in range(documents):
+        started = time.perf_counter()
+        doc_id = client.post("/upload", files={"file": (f"cold_{i}.pdf", pdf, "application/pdf")}).json()["doc_id"]
+        upload_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        response = client.post(f"/analyze/{doc_id}")
+        analyze_ms.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f"/analyze -> {response.status_code}: {response.text[:200]}")
+    return {"warmup_ms": warmup_ms, "upload_ms": upload_ms, "analyze_ms": analyze_ms}
+
+
+def profile_cold_start(runs: int = 3, precedents: int = 500, clauses: int = 50, documents: int = 4,
+                       warmup: int = 2, llm_latency_ms: float = 0.0) -> list:
+    """Cold (no warm-up), after-warm-up and warm /analyze latency, each first request in its own fresh process"""
+    timings = {"none": [], "warmed": []}
+    for _ in range(runs):
+        chroma_path = tempfile.mkdtemp(prefix="bench_cold_")
+        subprocess.run(
+            [sys.executable, __file__, "--seed", chroma_path, "--precedents", str(precedents)],
+            cwd=ROOT, check=True, capture_output=True
+        )
+        for mode, passes in (("none", 0), ("warmed", warmup)):
+            completed = subprocess.run(
+                [sys.executable, __file__, "--measure", chroma_path, "--precedents", str(precedents),
+                 "--clauses", str(clauses), "--documents", str(documents), "--warmup", str(passes),
+                 "--llm-latency-ms", str(llm_latency_ms)],
+                cwd=ROOT, check=True, capture_output=True, text=True
+            )
+            timings[mode].append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    contract = f"synthetic_{clauses}"
+    cold, warmed = timings["none"], timings["warmed"]
+    results = [
+        {"operation": "first_upload_cold", "contract": contract, **summarize([run["upload_ms"][0] for run in cold])},
+        {"operation": "first_upload_after_warmup", "contract": contract, "warmup_passes": warmup,
+         **summarize([run["upload_ms"][0] for run in warmed])},
+        {"operation": "first_analyze_cold", "contract": contract, **summarize([run["analyze_ms"][0] for run in cold])},
+        {"operation": "first_analyze_after_warmup", "contract": contract, "warmup_passes": warmup,
+         **summarize([run["analyze_ms"][0] for run in warmed])},
+        # Later analyses in the cold processes: the steady state both first analyses are compared with
+        {"operation": "analyze_warm", "contract": contract,
+         **summarize([ms for run in cold for ms in run["analyze_ms"][1:]])},
+    ]
+    if warmup:
+        results.append({"operation": "warmup", "contract": "none", "warmup_passes": warmup,
+                        **summarize([run["warmup_ms"] for run in warmed])})
+    warm_p50 = results[4]["p50_ms"]
+    for result in results[2:4]:
+        result["vs_warm"] = round(result["p50_ms"] / warm_p50, 2) if warm_p50 else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--precedents", type=int, default=500)
+    parser.add_argument("--clauses", type=int, default=50, help="Clauses per contract")
+    parser.add_argument("--documents", type=int, default=4, help="Contracts analyzed per process (the first is cold)")
+    parser.add_argument("--warmup", type=int, default=2, help="Warm-up passes (as WARMUP_ITERATIONS)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", metavar="CHROMA_PATH", help=argparse.SUPPRESS)
+    parser.add_argument("--measure", metavar="CHROMA_PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed, args.precedents)
+        return
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.precedents, args.clauses, args.documents, args.warmup, args.llm_latency_ms)))
+        return
+
+    for result in profile_cold_start(args.runs, args.precedents, args.clauses, args.documents, args.warmup, args.llm_latency_ms):
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
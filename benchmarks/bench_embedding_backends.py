@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the embedding backends (sentences/sec).
+
+    python benchmarks/bench_embedding_backends.py --sentences 2000 --batch-size 32
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.embedding_backends import get_embedding_model, EMBEDDING_BACKENDS
+from benchmarks.fixtures import synthetic_clauses
+
+
+def bench_backend(backend, sentences, batch_size):
+    model = get_embedding_model(backend)
+    model.encode(sentences[:batch_size], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    model.encode(sentences, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    single_start = time.perf_counter()
+    for sentence in sentences[:100]:
+        model.encode([sentence])
+    single_ms = (time.perf_counter() - single_start) / min(100, len(sentences)) * 1000
+
+    return {
+        "backend": backend,
+        "model": type(model).__name__,
+        "sentences_per_sec": round(len(sentences) / elapsed, 1),
+        "single_sentence_ms": round(single_ms, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    args = parser.parse_args()
+
+    sentences = synthetic_clauses(args.sentences)
+    for backend in args.backends:
+        print(bench_backend(backend, sentences, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
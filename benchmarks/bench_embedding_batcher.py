@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the embedding micro-batcher under concurrency and when idle.
+
+Runs N client threads that each encode one short clause at a time, first
+against the bare model and then through EmbeddingBatcher, and reports
+throughput and p50/p95 latency. An idle run (one client) checks that the
+batcher does not add latency when there is nothing to batch with.
+
+    python benchmarks/bench_embedding_batcher.py --clients 16 --requests 50
+    python benchmarks/bench_embedding_batcher.py --simulated  # no model download
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.embedding_batcher import EmbeddingBatcher
+from benchmarks.fixtures import synthetic_clauses, percentile
+
+
+class SimulatedEncoder:
+    """Stand-in with a fixed per-call cost plus a small per-sentence cost, like a CPU transformer"""
+
+    def __init__(self, call_ms=8.0, per_sentence_ms=0.4, dimension=384):
+        self.call_ms = call_ms
+        self.per_sentence_ms = per_sentence_ms
+        self.dimension = dimension
+        self._lock = threading.Lock()  # one forward pass at a time, as on a single CPU model
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        with self._lock:
+            time.sleep((self.call_ms + self.per_sentence_ms * len(sentences)) / 1000)
+        return np.zeros((len(sentences), self.dimension), dtype=np.float32)
+
+
+def run_clients(model, clauses, clients, requests_per_client):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset):
+        local = []
+        for i in range(requests_per_client):
+            text = clauses[(offset * requests_per_client + i) % len(clauses)]
+            start = time.perf_counter()
+            model.encode([text])
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "clients": clients,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client")
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--simulated", action="store_true", help="Use a simulated encoder instead of the real model")
+    args = parser.parse_args()
+
+    if args.simulated:
+        model = SimulatedEncoder()
+    else:
+        from models.embedding_backends import get_embedding_model
+        model = get_embedding_model()
+
+    clauses = synthetic_clauses(1000)
+    batcher = EmbeddingBatcher(model, max_wait_ms=args.wait_ms)
+
+    for label, encoder in (("unbatched", model), ("batched", batcher)):
+        idle = run_clients(encoder, clauses, 1, args.requests)
+        loaded = run_clients(encoder, clauses, args.clients, args.requests)
+        print({"mode": label, "idle": idle, "concurrent": loaded})
+
+    batcher.close()
+
+
+if __name__ == "__main__":
+    main()
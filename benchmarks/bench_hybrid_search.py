@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark hybrid (BM25 + dense) retrieval against dense-only retrieval.
+
+Measures BM25 postings lookup latency on its own, then dense-only vs fused
+search latency over an in-memory Chroma collection of synthetic clauses.
+
+    python benchmarks/bench_hybrid_search.py --clauses 5000 --repeats 25
+    python benchmarks/bench_hybrid_search.py --stub  # offline hashing embeddings
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.hybrid_search import BM25Index, HybridRetriever
+from benchmarks.fixtures import synthetic_clauses, percentile, SEARCH_QUERIES as QUERIES
+
+
+def summarize(name, timings_ms):
+    return {
+        "name": name,
+        "p50_ms": round(statistics.median(timings_ms), 4),
+        "p95_ms": round(percentile(timings_ms, 95), 4),
+        "p99_ms": round(percentile(timings_ms, 99), 4),
+        "mean_ms": round(statistics.fmean(timings_ms), 4),
+    }
+
+
+def time_calls(fn, queries, repeats):
+    timings = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def bench_lexical(clauses, repeats):
+    index = BM25Index()
+    start = time.perf_counter()
+    index.add([f"clause_{i}" for i in range(len(clauses))], clauses, [{"is_clause": True}] * len(clauses))
+    build_ms = (time.perf_counter() - start) * 1000
+
+    timings = time_calls(lambda query: index.search(query, n_results=10), QUERIES, repeats)
+    result = summarize("bm25_only", timings)
+    result["build_ms"] = round(build_ms, 2)
+    return result
+
+
+def bench_dense_vs_hybrid(clauses, repeats, stub=False):
+    import chromadb
+
+    if stub:
+        from benchmarks.fixtures import HashingEmbeddingModel
+        embedding_model = HashingEmbeddingModel()
+    else:
+        from models.embedding_backends import get_embedding_model
+        embedding_model = get_embedding_model()
+    client = chromadb.Client()
+    collection = client.get_or_create_collection(name="bench_clauses", metadata={"hnsw:space": "cosine"})
+
+    ids = [f"clause_{i}" for i in range(len(clauses))]
+    metadatas = [{"is_clause": True} for _ in clauses]
+    embeddings = embedding_model.encode(clauses, batch_size=64).tolist()
+    for offset in range(0, len(ids), 5000):
+        collection.add(
+            ids=ids[offset:offset + 5000],
+            documents=clauses[offset:offset + 5000],
+            embeddings=embeddings[offset:offset + 5000],
+            metadatas=metadatas[offset:offset + 5000]
+        )
+
+    retriever = HybridRetriever(collection, embedding_model)
+    retriever.add(ids, clauses, metadatas)
+
+    where = {"is_clause": True}
+    dense = time_calls(lambda query: retriever.dense_search(query, 10, where=where), QUERIES, repeats)
+    hybrid = time_calls(lambda query: retriever.search(query, 10, where=where), QUERIES, repeats)
+
+    # How often the exact term of art shows up in the top 5
+    def exact_hit_rate(search):
+        hits = 0
+        for query in QUERIES:
+            results = search(query)[:5]
+            hits += sum(1 for result in results if query.lower() in result["text"].lower())
+        return round(hits / (5 * len(QUERIES)), 3)
+
+    dense_result = summarize("dense_only", dense)
+    dense_result["exact_phrase_hit_rate_top5"] = exact_hit_rate(lambda q: retriever.dense_search(q, 10, where=where))
+    hybrid_result = summarize("hybrid_rrf", hybrid)
+    hybrid_result["exact_phrase_hit_rate_top5"] = exact_hit_rate(lambda q: retriever.search(q, 10, where=where))
+    return [dense_result, hybrid_result]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=25)
+    parser.add_argument("--lexical-only", action="store_true", help="Skip the dense benchmark (no model download)")
+    parser.add_argument("--stub", action="store_true", help="Use offline hashing embeddings for the dense side")
+    args = parser.parse_args()
+
+    clauses = synthetic_clauses(args.clauses)
+    results = [bench_lexical(clauses, args.repeats)]
+    if not args.lexical_only:
+        results.extend(bench_dense_vs_hybrid(clauses, args.repeats, stub=args.stub))
+
+    print(f"Corpus: {args.clauses} clauses, {len(QUERIES)} queries x {args.repeats} repeats")
+    for result in results:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
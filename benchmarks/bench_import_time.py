@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the serving entry point.
+
+Runs ``python -X importtime -c "import main"`` in fresh interpreters, reports
+the median total and the slowest modules by cumulative time, and checks that
+the heavy libraries only needed for dataset preparation or model loading
+(datasets, pandas, langchain, torch, transformers) stay out of the import.
+
+    python benchmarks/bench_import_time.py --runs 5 --top 15
+    python benchmarks/bench_import_time.py --budget-ms 1000  # non-zero exit when over budget
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Deferred to first use; none of these may be pulled in by "import main"
+DEFERRED_MODULES = ("datasets", "pandas", "langchain", "torch", "transformers", "sentence_transformers", "chromadb")
+
+
+def parse_importtime(stderr: str):
+    """(cumulative_us, module) for every line of -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.append((int(cumulative), name.rstrip()))
+    return modules
+
+
+def profile_import(module: str = "main", runs: int = 3, top: int = 10):
+    """Median wall-clock import cost of ``module`` plus its slowest dependencies"""
+    check = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    totals, profiles, loaded = [], [], set()
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", check],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        profile = parse_importtime(completed.stderr)
+        totals.append(next(us for us, name in profile if name.strip() == module) / 1000)
+        profiles.append(profile)
+        loaded.update(name for name in completed.stdout.strip().split(",") if name)
+
+    median_run = profiles[totals.index(sorted(totals)[len(totals) // 2])]
+    slowest = sorted(
+        ((us, name) for us, name in median_run if name.strip() != module), reverse=True
+    )[:top]
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "runs_ms": [round(total, 1) for total in totals],
+        "deferred_modules_loaded": sorted(loaded),
+        "slowest": [{"module": name.strip(), "depth": (len(name) - len(name.lstrip()) - 1) // 2, "ms": round(us / 1000, 1)}
+                    for us, name in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, help="Fail when the median import exceeds this")
+    args = parser.parse_args()
+
+    report = profile_import(args.module, args.runs, args.top)
+    print(f"import {report['module']}: median {report['import_ms']} ms, min {report['min_ms']} ms over {args.runs} runs")
+    for row in report["slowest"]:
+        print(f"  {row['ms']:>9.1f} ms  {'  ' * row['depth']}{row['module']}")
+
+    failures = []
+    if report["deferred_modules_loaded"]:
+        failures.append(f"deferred modules imported eagerly: {', '.join(report['deferred_modules_loaded'])}")
+    if args.budget_ms is not None and report["import_ms"] > args.budget_ms:
+        failures.append(f"import time {report['import_ms']} ms exceeds budget {args.budget_ms} ms")
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Request latency with the models in the web process vs. in the inference worker.
+
+Background threads keep the LLM busy with risk analyses, like /analyze requests
+in flight, while the foreground measures what every other request pays:
+precedent lookups (one embedding plus a vector query). The stand-in LLM burns
+CPU in Python for ``--llm-ms`` per call, holding the GIL like a real in-process
+model's tokenization, sampling and pipeline code. Modes:
+
+  in-process  RAGEngine owns the embedding model and the LLM (today's default)
+  worker      both run in an InferenceWorker process; RAGEngine holds proxies
+
+Also reports idle lookup latency (the IPC cost when nothing else runs), how
+concurrent label scoring is merged into batches in the worker, how many
+requests a flood gets refused with INFERENCE_MAX_PENDING, and how long lookups
+fail after the worker is killed.
+
+    python benchmarks/bench_inference_worker.py --llm-ms 200 --analysis-threads 2
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fixtures import HashingEmbeddingModel, percentile, seed_legal_knowledge, synthetic_clauses
+from models.inference_worker import InferenceBusy, InferenceUnavailable, InferenceWorker
+from models.llm_backends import StubLLMBackend
+
+MODES = ("in-process", "worker")
+
+
+class CPUBoundLLMBackend(StubLLMBackend):
+    """Stub answers after spinning the interpreter (not sleeping) for the configured latency"""
+
+    def _sleep(self, latency_ms: float, batch_size: int):
+        deadline = time.perf_counter() + (latency_ms + self.per_prompt_ms * batch_size) / 1000
+        while time.perf_counter() < deadline:
+            sum(range(200))
+
+
+def build_engine(mode: str, precedents: int, llm_ms: float, max_pending: int):
+    import chromadb
+    from models.rag_engine import RAGEngine
+
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="bench_inference_"))
+    legal_collection = client.get_or_create_collection(
+        name="legal_knowledge",
+        metadata={"hnsw:space": "cosine", "description": "Legal precedents and clause analysis"}
+    )
+    seed_legal_knowledge(legal_collection, HashingEmbeddingModel(), precedents)
+
+    if mode == "in-process":
+        return RAGEngine(
+            embedding_model=HashingEmbeddingModel(), chroma_client=client,
+            llm_backend=CPUBoundLLMBackend(latency_ms=llm_ms, score_latency_ms=llm_ms)
+        ), None
+
+    worker = InferenceWorker(
+        load_embedding_model=HashingEmbeddingModel,
+        load_llm_backend=partial(CPUBoundLLMBackend, latency_ms=llm_ms, score_latency_ms=llm_ms),
+        max_pending=max_pending, startup_timeout=120
+    ).start()
+    return RAGEngine(inference_client=worker.client(), chroma_client=client), worker
+
+
+def lookup_latencies(rag_engine, clauses) -> list:
+    latencies = []
+    for clause in clauses:
+        start = time.perf_counter()
+        rag_engine.find_legal_precedents(clause, n_results=3)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(latencies: list) -> dict:
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2)
+    }
+
+
+def run_mode(mode: str, args) -> dict:
+    rag_engine, worker = build_engine(mode, args.precedents, args.llm_ms, args.max_pending)
+    clauses = synthetic_clauses(args.lookups, seed=7)
+    try:
+        lookup_latencies(rag_engine, clauses[:20])  # warm-up
+        result = {"mode": mode, "idle_lookup": summarize(lookup_latencies(rag_engine, clauses))}
+
+        stop = threading.Event()
+        analyses = [0]
+
+        def analyze(offset: int):
+            texts = synthetic_clauses(4, seed=100 + offset)
+            while not stop.is_set():
+                rag_engine.generate_risk_analysis_batch(texts)
+                analyses[0] += len(texts)
+
+        threads = [threading.Thread(target=analyze, args=(i,), daemon=True) for i in range(args.analysis_threads)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.llm_ms / 1000)
+        started = time.perf_counter()
+        result["busy_lookup"] = summarize(lookup_latencies(rag_engine, clauses))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in threads:
+            thread.join()
+        result["analyses_per_sec_during_lookups"] = round(analyses[0] / elapsed, 1)
+
+        if worker is not None:
+            result.update(worker_checks(rag_engine, worker, args))
+        return result
+    finally:
+        if worker is not None:
+            worker.stop()
+
+
+def worker_checks(rag_engine, worker, args) -> dict:
+    llm = rag_engine.llm_backend
+    prompts = synthetic_clauses(args.flood, seed=3)
+
+    # Concurrent single-prompt scoring: merged into few LLM calls by the worker
+    results = []
+    threads = [threading.Thread(target=lambda p=p: results.append(llm.score_labels([p]))) for p in prompts[:8]]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    concurrent_ms = (time.perf_counter() - start) * 1000
+
+    # Backpressure: everything beyond max_pending in flight is refused at once
+    refused, refusal_ms = [0], []
+
+    def score(prompt):
+        start = time.perf_counter()
+        try:
+            llm.score_labels([prompt])
+        except InferenceBusy:
+            refused[0] += 1
+            refusal_ms.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=score, args=(p,)) for p in prompts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Crash recovery: kill the worker, time until a lookup embeds again
+    os.kill(worker.process.pid, signal.SIGKILL)
+    start = time.perf_counter()
+    failed = 0
+    while True:
+        try:
+            rag_engine.embedding_model.encode(["indemnification clause"])
+            break
+        except InferenceUnavailable:
+            failed += 1
+    return {
+        "eight_concurrent_scores_ms": round(concurrent_ms, 1),
+        "flood": {"requests": len(prompts), "max_pending": args.max_pending, "refused": refused[0],
+                  "refusal_p50_ms": round(percentile(refusal_ms, 50), 2) if refusal_ms else None},
+        "recovery": {"seconds": round(time.perf_counter() - start, 2), "failed_calls": failed,
+                     "restarts": worker.restarts}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-ms", type=float, default=200, help="CPU time of one LLM call")
+    parser.add_argument("--analysis-threads", type=int, default=2)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--precedents", type=int, default=2000)
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--flood", type=int, default=64, help="Concurrent requests in the backpressure check")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args)
+        print(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Per-clause LLM latency: free-text generation vs single-pass label scoring.
+
+    python benchmarks/bench_llm_modes.py --model mistralai/Mistral-7B-Instruct-v0.1 --clauses 20
+    python benchmarks/bench_llm_modes.py --stub   # plumbing check only, latencies are simulated
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.llm_backends import RISK_LABELS, StubLLMBackend, TransformersBackend
+from models.rag_engine import RAGEngine
+from benchmarks.fixtures import synthetic_clauses
+
+
+def bench_mode(backend, clauses, classify, batch_size, max_new_tokens):
+    prompts = [RAGEngine._create_legal_risk_prompt(clause, [], {}, classify=classify) for clause in clauses]
+    call = (
+        (lambda batch: backend.score_labels(batch, RISK_LABELS)) if classify
+        else (lambda batch: backend.generate(batch, max_new_tokens=max_new_tokens))
+    )
+    call(prompts[:1])  # warm-up
+
+    start = time.perf_counter()
+    outputs = []
+    for offset in range(0, len(prompts), batch_size):
+        outputs.extend(call(prompts[offset:offset + batch_size]))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": "classify" if classify else "generate",
+        "clauses": len(clauses),
+        "per_clause_ms": round(elapsed / len(clauses) * 1000, 2),
+        "example": outputs[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="microsoft/DialoGPT-medium", help="HF model name or local path")
+    parser.add_argument("--clauses", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=200)
+    parser.add_argument("--stub", action="store_true", help="Use the stub backend (50 ms generate, 5 ms score)")
+    args = parser.parse_args()
+
+    if args.stub:
+        backend = StubLLMBackend(latency_ms=50, score_latency_ms=5)
+    else:
+        backend = TransformersBackend(model_name=args.model, fallback_model=args.model, batch_size=args.batch_size)
+
+    clauses = synthetic_clauses(args.clauses)
+    generate = bench_mode(backend, clauses, False, args.batch_size, args.max_new_tokens)
+    classify = bench_mode(backend, clauses, True, args.batch_size, args.max_new_tokens)
+    print(generate)
+    print(classify)
+    print(f"speedup: {generate['per_clause_ms'] / classify['per_clause_ms']:.1f}x per clause")
+
+
+if __name__ == "__main__":
+    main()
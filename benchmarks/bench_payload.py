@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+/analyze payload size and serialization cost by view.
+
+Classifies synthetic contracts with the stub models, then for the full view,
+the compact and minimal views and a precedents-only field selection reports
+the classification time, the share of it spent rendering explanation,
+reasoning and recommendation prose, the JSON size, its gzip size (as
+GZipMiddleware sends it) and the time to serialize it with the standard json
+module and with orjson.
+
+    python benchmarks/bench_payload.py --sizes 200 1000
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.explanations import RENDERERS
+from models.redlining_classifier import project_classification, resolve_fields, with_facts
+from benchmarks.fixtures import build_stub_system, synthetic_contract
+
+VIEWS = {
+    "full": {"view": "full"}, "compact": {"view": "compact"}, "minimal": {"view": "minimal"},
+    "fields=precedents": {"fields": "precedents"}
+}
+
+
+def timed(call, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000], help="Contract sizes in clauses")
+    parser.add_argument("--precedents", type=int, default=300)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+        print("orjson is not installed; reporting the json module only")
+
+    system = build_stub_system(precedents=args.precedents)
+    processor, classifier = system["document_processor"], system["redlining_classifier"]
+    for size in args.sizes:
+        clauses = [{"text": chunk["text"]} for chunk in processor.chunk_text(synthetic_contract(size)) if chunk["is_clause"]]
+        for name, params in VIEWS.items():
+            fields = resolve_fields(**params)
+            # As POST /analyze?format=json; the redlined HTML formats also compute (and store) facts
+            classify_ms = timed(lambda: classifier.classify_document(clauses, fields=fields), 1)
+            result = classifier.classify_document(clauses, fields=with_facts(fields))
+            classifications = [clause["classification"] for clause in result["classified_clauses"]]
+            prose = [name for name in RENDERERS if name in fields]
+            prose_ms = timed(lambda: [RENDERERS[name](c["risk_level"], c["facts"]) for c in classifications for name in prose], 1)
+            # Facts are stored with the analysis but only sent when requested
+            sent = [{**clause, "classification": project_classification(clause["classification"], fields)}
+                    for clause in result["classified_clauses"]]
+            body = {"success": True, "fields": list(fields), "classified_clauses": sent}
+            encoded = json.dumps(body).encode()
+            row = {
+                "clauses": len(clauses),
+                "view": name,
+                "classify_ms": classify_ms,
+                "prose_ms": prose_ms,
+                "bytes": len(encoded),
+                "gzip_bytes": len(gzip.compress(encoded, compresslevel=9)),
+                "json_dumps_ms": timed(lambda: json.dumps(body, ensure_ascii=False), args.repeats),
+            }
+            if orjson is not None:
+                row["orjson_dumps_ms"] = timed(lambda: orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY), args.repeats)
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Per-clause prefill cost with and without the cached legal-risk prompt prefix.
+
+Runs label scoring (prefill only, no decoding) over the same prompts twice:
+once recomputing the whole prompt and once reusing the prefix KV cache.
+
+    python benchmarks/bench_prefix_cache.py --model mistralai/Mistral-7B-Instruct-v0.1 --clauses 32
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.llm_backends import RISK_LABELS, TransformersBackend
+from models.rag_engine import RAGEngine, LEGAL_RISK_PROMPT_PREFIX
+from benchmarks.fixtures import synthetic_clauses
+
+
+def per_clause_ms(backend, prompts, batch_size, repeats):
+    backend.score_labels(prompts[:batch_size], RISK_LABELS)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for offset in range(0, len(prompts), batch_size):
+            backend.score_labels(prompts[offset:offset + batch_size], RISK_LABELS)
+        timings.append((time.perf_counter() - start) / len(prompts) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="microsoft/DialoGPT-medium", help="HF model name or local path")
+    parser.add_argument("--clauses", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    backend = TransformersBackend(model_name=args.model, fallback_model=args.model, batch_size=args.batch_size)
+    prompts = [
+        RAGEngine._create_legal_risk_prompt(clause, [], {}, classify=True)
+        for clause in synthetic_clauses(args.clauses)
+    ]
+    prefix_tokens = len(backend.tokenizer.encode(LEGAL_RISK_PROMPT_PREFIX, add_special_tokens=False))
+    prompt_tokens = statistics.fmean(len(backend.tokenizer.encode(p, add_special_tokens=False)) for p in prompts)
+
+    backend.set_prompt_prefix(None)
+    full_ms = per_clause_ms(backend, prompts, args.batch_size, args.repeats)
+    backend.set_prompt_prefix(LEGAL_RISK_PROMPT_PREFIX)
+    cached_ms = per_clause_ms(backend, prompts, args.batch_size, args.repeats)
+
+    print({
+        "model": backend.model_name,
+        "prefix_tokens": prefix_tokens,
+        "mean_prompt_tokens": round(prompt_tokens, 1),
+        "full_prefill_ms_per_clause": full_ms,
+        "cached_prefix_ms_per_clause": cached_ms,
+        "saving_pct": round((1 - cached_ms / full_ms) * 100, 1),
+    })
+
+
+if __name__ == "__main__":
+    main()
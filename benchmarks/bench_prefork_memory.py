@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Resident memory per worker: models loaded in every worker vs. once before forking.
+
+Starts prefork.serve with stand-in models that hold model-sized weights
+(``--embedding-mb``, ``--llm-mb``, filled so every page is resident) in two modes:
+
+  per-worker  every worker loads its own models after the fork, and precedents
+              are served by each worker's own Chroma client (what several
+              uvicorn workers do today)
+  prefork     the parent loads the models and the memory-mapped precedent
+              index, freezes the GC and forks
+
+After warm-up requests (so the workers have touched the weights, the index and
+their own Chroma collections), it reads /proc/<pid>/smaps_rollup for the parent
+and every worker. RSS counts shared pages in every process that maps them.
+PSS splits them between those processes, so the PSS total is what the
+deployment really costs, and USS (private pages) is what one more worker adds.
+
+    python benchmarks/bench_prefork_memory.py --workers 4 --embedding-mb 90 --llm-mb 400
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+import numpy as np
+
+from benchmarks.fixtures import HashingEmbeddingModel, synthetic_clauses
+
+MODES = ("per-worker", "prefork")
+
+
+class WeightedEmbeddingModel(HashingEmbeddingModel):
+    """Hashing embeddings plus ``megabytes`` of resident weights that every encode reads"""
+
+    def __init__(self, megabytes: float, dimension: int = 384):
+        super().__init__(dimension)
+        self.weights = _resident_weights(megabytes)
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        float(self.weights[::1024].sum())  # reads one value per 4 KB page
+        return super().encode(sentences, batch_size=batch_size, **kwargs)
+
+
+def _resident_weights(megabytes: float) -> np.ndarray:
+    return np.random.default_rng(0).standard_normal(int(megabytes * 2**20 / 4), dtype=np.float32)
+
+
+def load_components(tmp: str, embedding_mb: float, llm_mb: float, precedent_index: bool):
+    from models.llm_backends import StubLLMBackend
+    from models.precedent_index import PrecedentIndex
+
+    llm_backend = StubLLMBackend(latency_ms=0.0)
+    llm_backend.weights = _resident_weights(llm_mb)
+    components = {"embedding_model": WeightedEmbeddingModel(embedding_mb), "llm_backend": llm_backend}
+    if precedent_index:
+        components["precedent_index"] = PrecedentIndex(os.path.join(tmp, "precedent_index"))
+    return components
+
+
+def seed(tmp: str, precedents: int):
+    """Persist synthetic precedents under tmp/chroma_db and snapshot them (run in its own process)"""
+    import chromadb
+    from benchmarks.fixtures import seed_legal_knowledge
+    from models.precedent_index import PrecedentIndex
+
+    collection = chromadb.PersistentClient(path=os.path.join(tmp, "chroma_db")).get_or_create_collection(
+        name="legal_knowledge", metadata={"hnsw:space": "cosine"}
+    )
+    seed_legal_knowledge(collection, HashingEmbeddingModel(), precedents)
+    PrecedentIndex.build(collection, os.path.join(tmp, "precedent_index"))
+
+
+def run_server(tmp: str, mode: str, port: int, workers: int, embedding_mb: float, llm_mb: float):
+    import main  # imported from the repository root (static files, templates)
+    import prefork
+
+    os.chdir(tmp)  # ./chroma_db, uploads and the document store of the temporary deployment
+    os.environ["DOCUMENT_STORE_PATH"] = os.path.join(tmp, "redlining.db")
+    prefork.serve(
+        workers=workers, host="127.0.0.1", port=port, preload=mode == "prefork", log_level="warning",
+        load_components=lambda: load_components(tmp, embedding_mb, llm_mb, precedent_index=mode == "prefork")
+    )
+
+
+def memory(pid: int) -> dict:
+    """RSS, PSS and USS of a process in MB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(fields["Rss"], 1),
+        "pss_mb": round(fields["Pss"], 1),
+        "uss_mb": round(fields["Private_Clean"] + fields["Private_Dirty"], 1)
+    }
+
+
+def children(pid: int) -> list:
+    found = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    if int(stat.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        found.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return found
+
+
+def request(url: str, body: dict = None, timeout: float = 30.0):
+    data = json.dumps(body).encode() if body is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=timeout) as response:
+        return response.read()
+
+
+def measure(tmp: str, mode: str, port: int, workers: int, embedding_mb: float, llm_mb: float,
+            warmup_requests: int, startup_timeout: float) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", mode, "--tmp", tmp, "--port", str(port), "--workers", str(workers),
+         "--embedding-mb", str(embedding_mb), "--llm-mb", str(llm_mb)],
+        cwd=ROOT
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                request(f"{base}/health", timeout=2.0)
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError(f"{mode} server did not start")
+                time.sleep(0.5)
+
+        # Workers finish loading at different times; wait until their combined RSS stops growing
+        previous = -1.0
+        while time.monotonic() < deadline:
+            pids = children(server.pid)
+            total = sum(memory(pid)["rss_mb"] for pid in pids)
+            if len(pids) == workers and abs(total - previous) < 0.01 * total:
+                break
+            previous = total
+            time.sleep(1.0)
+
+        # Connections land on whichever worker accepts first; enough requests reach all of them
+        started = time.perf_counter()
+        for i, clause in enumerate(synthetic_clauses(warmup_requests, seed=31)):
+            request(f"{base}/legal-precedents", {"clause_text": clause, "limit": 5})
+            if i % 4 == 0:
+                request(f"{base}/search?query={urllib.request.quote(clause[:40])}")
+        warmup_seconds = time.perf_counter() - started
+
+        worker_pids = children(server.pid)
+        parent = memory(server.pid)
+        per_worker = [memory(pid) for pid in worker_pids]
+        return {
+            "mode": mode,
+            "workers": len(per_worker),
+            "parent": parent,
+            "worker_mean": {key: round(sum(m[key] for m in per_worker) / len(per_worker), 1) for key in parent},
+            "total_rss_mb": round(parent["rss_mb"] + sum(m["rss_mb"] for m in per_worker), 1),
+            "total_pss_mb": round(parent["pss_mb"] + sum(m["pss_mb"] for m in per_worker), 1),
+            "warmup_requests_per_sec": round(warmup_requests * 1.25 / warmup_seconds, 1)
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--embedding-mb", type=float, default=90, help="Stand-in embedding model size (all-MiniLM-L6-v2 is ~90 MB)")
+    parser.add_argument("--llm-mb", type=float, default=400, help="Stand-in LLM size")
+    parser.add_argument("--precedents", type=int, default=5000)
+    parser.add_argument("--warmup-requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--serve", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--tmp", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.tmp, args.precedents)
+        return
+    if args.serve:
+        run_server(args.tmp, args.serve, args.port, args.workers, args.embedding_mb, args.llm_mb)
+        return
+
+    results = []
+    for mode in args.modes:
+        # A fresh deployment per mode, seeded in its own process so no Chroma state is inherited
+        tmp = tempfile.mkdtemp(prefix="bench_prefork_")
+        subprocess.run([sys.executable, __file__, "--seed", "--tmp", tmp, "--precedents", str(args.precedents)],
+                       cwd=ROOT, check=True)
+        result = measure(tmp, mode, args.port, args.workers, args.embedding_mb, args.llm_mb,
+                         args.warmup_requests, args.startup_timeout)
+        print(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Scatter-gather search over hash-partitioned Chroma shards.
+
+For each corpus size and shard count, ingests synthetic clause embeddings
+into a throwaway persistent Chroma directory (one collection when --shards
+is 1, a ShardedCollection otherwise) and measures ingest throughput and
+filtered top-k query latency. Embeddings are random unit vectors, so only
+index cost is measured, not retrieval quality.
+
+    python benchmarks/bench_shards.py --corpus 10000 50000 --shards 1 2 4 8
+    python benchmarks/bench_shards.py --mode directories  # one client/directory per shard
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.sharded_collection import ShardedCollection
+from benchmarks.fixtures import summarize
+
+
+def open_collection(path, shards, mode):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=path)
+    metadata = {"hnsw:space": "cosine"}
+    if shards == 1:
+        return client.get_or_create_collection(name="contract_clauses", metadata=metadata)
+    clients = [client]
+    if mode == "directories":
+        clients += [chromadb.PersistentClient(path=str(Path(path) / f"shard_{i}")) for i in range(1, shards)]
+    return ShardedCollection.open(clients, "contract_clauses", shards, metadata)
+
+
+def bench(corpus, shards, mode, dimension, batch_size, queries, n_results, seed=7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(corpus, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vectors = rng.normal(size=(queries, dimension)).astype(np.float32)
+
+    collection = open_collection(tempfile.mkdtemp(prefix="bench_shards_"), shards, mode)
+    start = time.perf_counter()
+    for offset in range(0, corpus, batch_size):
+        end = min(corpus, offset + batch_size)
+        collection.add(
+            ids=[f"doc{i // 50}_chunk_{i % 50}" for i in range(offset, end)],
+            embeddings=vectors[offset:end].tolist(),
+            documents=[f"clause {i}" for i in range(offset, end)],
+            metadatas=[{"document_id": f"doc{i // 50}", "is_clause": bool(i % 4)} for i in range(offset, end)]
+        )
+    ingest_seconds = time.perf_counter() - start
+
+    collection.query(query_embeddings=[query_vectors[0].tolist()], n_results=n_results)  # warm-up
+    timings = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[vector.tolist()], n_results=n_results, where={"is_clause": True})
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if isinstance(collection, ShardedCollection):
+        collection.close()
+    return {
+        "corpus": corpus,
+        "shards": shards,
+        "ingest_items_per_sec": round(corpus / ingest_seconds, 1),
+        **{f"query_{key}": value for key, value in summarize(timings).items() if key.endswith("_ms")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=int, nargs="+", default=[10000, 50000], help="Corpus sizes in clauses")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--mode", choices=["collections", "directories"], default="collections")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--n-results", type=int, default=10)
+    args = parser.parse_args()
+
+    for corpus in args.corpus:
+        for shards in args.shards:
+            print(bench(corpus, shards, args.mode, args.dimension, args.batch_size, args.queries, args.n_results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Text normalization and clause detection on a multi-MB contract corpus.
+
+Compares the previous two-pass ``clean_text`` (collapse whitespace, then strip
+special characters) and per-chunk annotation (lowercase copy, all 22 keyword
+tests, ``split()`` twice) against the versions now in ``DocumentProcessor``
+(one regex pass; one space count and a short-circuiting keyword test per
+chunk), and times ``chunk_text`` end to end. Both clause
+scorers are checked to flag exactly the same chunks.
+
+    python benchmarks/bench_text_processing.py --mb 2 8 32
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.document_processor import LEGAL_KEYWORDS, DocumentProcessor, mentions_legal_keyword
+from benchmarks.fixtures import synthetic_contract
+
+
+def legacy_clean_text(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,;:!?()-]', '', text)
+    return text.strip()
+
+
+def legacy_annotate(chunks):
+    annotated = []
+    for chunk in chunks:
+        text_lower = chunk.lower()
+        keyword_count = sum(1 for keyword in LEGAL_KEYWORDS if keyword in text_lower)
+        annotated.append((keyword_count >= 1 and len(chunk.split()) >= 10, len(chunk.split()), len(chunk)))
+    return annotated
+
+
+def current_annotate(chunks):
+    annotated = []
+    for chunk in chunks:
+        word_count = chunk.count(" ") + 1 if chunk else 0
+        annotated.append((word_count >= 10 and mentions_legal_keyword(chunk), word_count, len(chunk)))
+    return annotated
+
+
+def corpus(megabytes):
+    """Synthetic contracts concatenated to roughly ``megabytes`` MB, with some tabs, CRLFs and symbols"""
+    contract = synthetic_contract(2000).replace("Section", "§ Section", 50).replace("\n", "\r\n", 200)
+    contract = contract.replace(". ", ".\t ", 100) + "\n• Signed — © 2024\n"
+    copies = max(1, round(megabytes * 1e6 / len(contract.encode())))
+    return contract * copies
+
+
+def timed(call, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, nargs="+", default=[2, 8], help="Corpus sizes in MB")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+    for megabytes in args.mb:
+        text = corpus(megabytes)
+        size_mb = len(text.encode()) / 1e6
+        print(f"{size_mb:.1f} MB")
+
+        _, legacy_seconds = timed(lambda: legacy_clean_text(text), args.repeats)
+        _, clean_seconds = timed(lambda: processor.clean_text(text), args.repeats)
+        print(f"  clean_text   legacy {size_mb / legacy_seconds:7.1f} MB/s   single-pass {size_mb / clean_seconds:7.1f} MB/s"
+              f"   ({legacy_seconds / clean_seconds:.2f}x)")
+
+        chunks = processor.text_splitter.split(text)
+        legacy, legacy_seconds = timed(lambda: legacy_annotate(chunks), args.repeats)
+        current, fused_seconds = timed(lambda: current_annotate(chunks), args.repeats)
+        mismatches = sum(1 for old, new in zip(legacy, current) if old != new)
+        print(f"  annotate     legacy {legacy_seconds * 1000:7.1f} ms     current     {fused_seconds * 1000:7.1f} ms"
+              f"   ({legacy_seconds / fused_seconds:.2f}x, {len(chunks)} chunks, {mismatches} mismatches)")
+
+        _, chunk_seconds = timed(lambda: processor.chunk_text(text), args.repeats)
+        print(f"  chunk_text   {size_mb / chunk_seconds:.2f} MB/s end to end")
+
+
+if __name__ == "__main__":
+    main()
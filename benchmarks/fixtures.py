@@ -0,0 +1,269 @@
+"""
+Offline fixtures for benchmarks: deterministic stub models, synthetic
+contracts built from sample_contract.txt, and a minimal PDF writer.
+
+Nothing here downloads a model or touches ./chroma_db.
+"""
+
+import random
+import re
+import statistics
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+SAMPLE_CONTRACT = ROOT / "sample_contract.txt"
+
+CLAUSE_TEMPLATES = [
+    "The {party} shall indemnify and hold harmless the {other} against all claims, damages and expenses arising from {cause}.",
+    "Upon termination for convenience the {party} shall pay liquidated damages equal to {pct}% of the remaining contract value.",
+    "The {party} waives all moral rights in any work product delivered under this Agreement as work for hire.",
+    "This Agreement shall be governed by the laws of {state} and disputes shall be resolved by binding arbitration.",
+    "The {party} agrees not to compete with the {other} for a period of {years} years following termination.",
+    "Either party may terminate this Agreement upon {days} days written notice to the other party.",
+    "All notices under this Agreement shall be given in writing and delivered by certified mail to the {party}.",
+    "Neither party shall be liable for delays caused by force majeure events including acts of God and {cause}.",
+    "The {party} shall maintain all confidential information of the {other} in strictest confidence for {years} years.",
+    "The {party}'s liability under this Agreement is unlimited for any breach of {cause}.",
+]
+
+_FILLERS = {
+    "party": ["Provider", "Client", "Licensee", "Licensor", "Contractor", "Employee"],
+    "other": ["Company", "Customer", "Vendor", "Partner"],
+    "cause": ["negligence", "wilful misconduct", "government action", "data security obligations"],
+    "state": ["Delaware", "California", "New York", "Texas"],
+    "pct": ["25", "50", "75"],
+    "years": ["1", "2", "3", "5"],
+    "days": ["10", "30", "60", "90"],
+}
+
+SEARCH_QUERIES = [
+    "liquidated damages",
+    "moral rights waiver",
+    "termination for convenience",
+    "hold harmless",
+    "binding arbitration Delaware",
+    "force majeure acts of God",
+    "non-compete period",
+    "unlimited liability breach",
+]
+
+
+class HashingEmbeddingModel:
+    """Deterministic bag-of-words embedding stub with the SentenceTransformer encode interface"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.tokenizer = None
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single_input = isinstance(sentences, str)
+        if single_input:
+            sentences = [sentences]
+
+        embeddings = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for token in re.findall(r"[a-z0-9]+", sentence.lower()):
+                bucket = zlib.crc32(token.encode())
+                embeddings[row, bucket % self.dimension] += 1.0 if bucket & 1 else -1.0
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.where(norms == 0, 1.0, norms)
+
+        return embeddings[0] if single_input else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+def synthetic_clauses(count: int, seed: int = 7) -> List[str]:
+    """Short single-sentence clauses drawn from legal templates"""
+    rng = random.Random(seed)
+    clauses = []
+    for _ in range(count):
+        template = rng.choice(CLAUSE_TEMPLATES)
+        clauses.append(template.format(**{key: rng.choice(values) for key, values in _FILLERS.items()}))
+    return clauses
+
+
+def sample_contract_sections() -> List[str]:
+    """Numbered section bodies from the bundled sample contract"""
+    text = SAMPLE_CONTRACT.read_text()
+    sections = re.split(r"\n(?=\d+\.\s)", text)
+    return [
+        " ".join(line.strip() for line in section.splitlines()[1:] if line.strip())
+        for section in sections
+        if re.match(r"\d+\.\s", section)
+    ]
+
+
+def synthetic_contract(num_clauses: int, seed: int = 11) -> str:
+    """A contract with ``num_clauses`` numbered sections mixing sample and templated clauses"""
+    rng = random.Random(seed)
+    bodies = sample_contract_sections()
+    extra = synthetic_clauses(num_clauses, seed)
+
+    lines = ["SYNTHETIC SERVICE AGREEMENT", ""]
+    for number in range(1, num_clauses + 1):
+        body = rng.choice(bodies) if rng.random() < 0.5 else f"{extra[number - 1]} {rng.choice(bodies)}"
+        lines.append(f"{number}. SECTION {number}")
+        lines.append(body)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def revise_contract(text: str, fraction: float = 0.05, seed: int = 13) -> str:
+    """A negotiated revision: edits the body of ``fraction`` of the numbered sections"""
+    rng = random.Random(seed)
+    sections = re.split(r"\n(?=\d+\.\s)", text)
+    numbered = [i for i, section in enumerate(sections) if re.match(r"\d+\.\s", section)]
+    for index in rng.sample(numbered, max(1, round(len(numbered) * fraction))):
+        sections[index] = sections[index].rstrip() + " Notwithstanding the foregoing, liability under this Section is unlimited.\n"
+    return "\n".join(sections)
+
+
+def make_pdf(text: str, lines_per_page: int = 60, max_line_chars: int = 95) -> bytes:
+    """Write a minimal text-only PDF that PyPDF2 can extract"""
+    wrapped = []
+    for line in text.splitlines():
+        while len(line) > max_line_chars:
+            split_at = line.rfind(" ", 0, max_line_chars)
+            split_at = split_at if split_at > 0 else max_line_chars
+            wrapped.append(line[:split_at])
+            line = line[split_at:].lstrip()
+        wrapped.append(line)
+
+    pages = [wrapped[i:i + lines_per_page] for i in range(0, len(wrapped), lines_per_page)] or [[""]]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        content = ["BT /F1 10 Tf 12 TL 50 760 Td"]
+        for line in page_lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            content.append(f"({escaped.encode('latin-1', 'replace').decode('latin-1')}) Tj T*")
+        content.append("ET")
+        stream = "\n".join(content).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+def seed_legal_knowledge(collection, embedding_model, count: int = 500):
+    """Populate a legal_knowledge collection with synthetic precedents (no CUAD download)"""
+    from legal_dataset_loader import LegalDatasetLoader
+
+    loader = LegalDatasetLoader(cache_dir=tempfile.mkdtemp(prefix="legal_cache_"), embedding_model=embedding_model)
+
+    items = loader._load_fallback_dataset()
+    seen = {item["text"] for item in items}
+    for text in synthetic_clauses(count * 2, seed=3):
+        if len(items) >= count:
+            break
+        if text in seen:
+            continue
+        seen.add(text)
+        clause_type = loader._identify_clause_type(text)
+        items.append({
+            "text": text,
+            "contract_title": "Synthetic Agreement",
+            "clause_type": clause_type,
+            "risk_level": loader._classify_risk_level(text, clause_type),
+            "contract_domain": loader._infer_contract_domain("Synthetic Agreement", text),
+            "source": "Synthetic",
+            "precedent_strength": loader._calculate_precedent_strength(text),
+        })
+
+    formatted = loader.format_for_chromadb(items)
+    unique = {}
+    for i, doc_id in enumerate(formatted["ids"]):
+        unique.setdefault(doc_id, i)
+    keep = sorted(unique.values())
+
+    collection.add(
+        ids=[formatted["ids"][i] for i in keep],
+        documents=[formatted["texts"][i] for i in keep],
+        embeddings=[formatted["embeddings"][i] for i in keep],
+        metadatas=[formatted["metadatas"][i] for i in keep],
+    )
+    return len(keep)
+
+
+def build_stub_system(precedents: int = 500, chroma_path: str = None, llm_latency_ms: float = 0.0,
+                      llm_per_clause_ms: float = 0.0, cascade: bool = True) -> Dict:
+    """DocumentProcessor, RAGEngine and RedliningClassifier wired to offline stubs"""
+    import chromadb
+    from models.document_processor import DocumentProcessor
+    from models.document_store import DocumentStore
+    from models.llm_backends import StubLLMBackend
+    from models.rag_engine import RAGEngine
+    from models.redlining_classifier import RedliningClassifier
+
+    embedding_model = HashingEmbeddingModel()
+    chroma_path = chroma_path or tempfile.mkdtemp(prefix="bench_chroma_")
+    client = chromadb.PersistentClient(path=chroma_path)
+
+    legal_collection = client.get_or_create_collection(
+        name="legal_knowledge",
+        metadata={"hnsw:space": "cosine", "description": "Legal precedents and clause analysis"}
+    )
+    if legal_collection.count() == 0:
+        seed_legal_knowledge(legal_collection, embedding_model, precedents)
+
+    rag_engine = RAGEngine(
+        embedding_model=embedding_model,
+        chroma_client=client,
+        llm_backend=StubLLMBackend(latency_ms=llm_latency_ms, per_prompt_ms=llm_per_clause_ms)
+    )
+    return {
+        "document_processor": DocumentProcessor(),
+        "rag_engine": rag_engine,
+        "redlining_classifier": RedliningClassifier(rag_engine, cascade=cascade),
+        # Kept outside the Chroma directory so compaction reports measure the vector index alone
+        "document_store": DocumentStore(str(Path(tempfile.mkdtemp(prefix="bench_store_")) / "redlining.db")),
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(timings_ms: List[float]) -> Dict[str, float]:
+    """Latency percentiles and throughput for a list of per-call timings"""
+    total_seconds = sum(timings_ms) / 1000
+    return {
+        "count": len(timings_ms),
+        "p50_ms": round(statistics.median(timings_ms), 3),
+        "p95_ms": round(percentile(timings_ms, 95), 3),
+        "p99_ms": round(percentile(timings_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(timings_ms), 3),
+        "ops_per_sec": round(len(timings_ms) / total_seconds, 2) if total_seconds else None,
+    }
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite for the redlining API, fully offline.
+
+Drives the FastAPI app in-process (upload, analyze, stored-analysis reads,
+revision re-analysis, document listing, search, legal precedents, analysis
+throughput with and without the LLM gate, search in
+a separate workspace, deletion and compaction), plus the import time of main.py
+and the first /analyze in a fresh process with and without warm-up, against stub models, a throwaway Chroma directory, the bundled
+sample_contract.txt and synthetic contracts of increasing size. Results
+are written as JSON so runs on different commits can be diffed:
+
+    python benchmarks/run_benchmarks.py --sizes 10 100 1000 --output bench_results.json
+    python benchmarks/run_benchmarks.py --baseline old.json --output new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_cold_start import profile_cold_start
+from benchmarks.bench_import_time import profile_import
+from benchmarks.fixtures import (
+    ROOT, SAMPLE_CONTRACT, SEARCH_QUERIES, build_stub_system, make_pdf, revise_contract, summarize, synthetic_contract
+)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _timed(call):
+    start = time.perf_counter()
+    response = call()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:200]}")
+    return response, elapsed_ms
+
+
+def bench_contract(client, name, text, repeats):
+    """Upload and analyze one contract ``repeats`` times, then search and look up precedents"""
+    pdf_bytes = make_pdf(text)
+    results = []
+
+    upload_ms, analyze_ms, doc_ids = [], [], []
+    clauses_analyzed = 0
+    llm_call_rate = None
+    analyze_bytes = 0
+    for _ in range(repeats):
+        response, elapsed = _timed(lambda: client.post(
+            "/upload", files={"file": (f"{name}.pdf", pdf_bytes, "application/pdf")}
+        ))
+        upload_ms.append(elapsed)
+        doc_ids.append(response.json()["doc_id"])
+
+    for doc_id in doc_ids:
+        response, elapsed = _timed(lambda: client.post(f"/analyze/{doc_id}"))
+        analyze_ms.append(elapsed)
+        analyze_bytes = len(response.content)
+        analysis = response.json()["analysis"]
+        clauses_analyzed = analysis["total_clauses"]
+        llm_call_rate = analysis.get("llm_gating", {}).get("llm_call_rate")
+
+    # Stored analysis as JSON with the redlined HTML (the default), JSON only, HTML only and compact JSON
+    stored_variants = {
+        "get_stored_analysis": {"format": "both"},
+        "get_stored_analysis_json": {"format": "json"},
+        "get_stored_analysis_html": {"format": "html"},
+        "get_stored_analysis_compact": {"format": "json", "view": "compact"},
+    }
+    stored_ms = {operation: [] for operation in stored_variants}
+    stored_bytes = {}
+    for doc_id in doc_ids:
+        for _ in range(5):
+            for operation, params in stored_variants.items():
+                response, elapsed = _timed(lambda: client.get(f"/analyze/{doc_id}", params=params))
+                stored_ms[operation].append(elapsed)
+                # The test client asks for gzip, so the wire size is the compressed body
+                stored_bytes[operation] = (len(response.content), response.num_bytes_downloaded)
+
+    results.append({"operation": "upload", "contract": name, **summarize(upload_ms)})
+    results.append({
+        "operation": "analyze",
+        "contract": name,
+        "clauses_analyzed": clauses_analyzed,
+        "clauses_per_sec": round(clauses_analyzed * len(analyze_ms) / (sum(analyze_ms) / 1000), 2),
+        "documents_per_hour": round(len(analyze_ms) / (sum(analyze_ms) / 1000) * 3600, 1),
+        "llm_call_rate": llm_call_rate,
+        "response_bytes": analyze_bytes,
+        **summarize(analyze_ms)
+    })
+    for operation, timings in stored_ms.items():
+        results.append({
+            "operation": operation,
+            "contract": name,
+            "response_bytes": stored_bytes[operation][0],
+            "wire_bytes": stored_bytes[operation][1],
+            **summarize(timings)
+        })
+
+    # Re-analysis of a revision that edits ~5% of the sections, linked to each earlier upload
+    revised_pdf = make_pdf(revise_contract(text))
+    reanalyze_ms = []
+    clauses_reclassified = 0
+    for doc_id in doc_ids:
+        response, _ = _timed(lambda: client.post(
+            "/upload",
+            files={"file": (f"{name}_rev.pdf", revised_pdf, "application/pdf")},
+            data={"previous_doc_id": doc_id}
+        ))
+        revision_id = response.json()["doc_id"]
+        response, elapsed = _timed(lambda: client.post(f"/analyze/{revision_id}"))
+        reanalyze_ms.append(elapsed)
+        clauses_reclassified = response.json()["revision"].get("reclassified")
+    results.append({
+        "operation": "reanalyze_revision",
+        "contract": name,
+        "clauses_reclassified": clauses_reclassified,
+        **summarize(reanalyze_ms)
+    })
+
+    search_ms, precedent_ms, precedent_cached_ms = [], [], []
+    for _ in range(repeats):
+        for query in SEARCH_QUERIES:
+            _, elapsed = _timed(lambda: client.get("/search", params={"query": query, "limit": 10}))
+            search_ms.append(elapsed)
+            response, elapsed = _timed(lambda: client.post("/legal-precedents", json={"clause_text": query, "limit": 5}))
+            (precedent_cached_ms if response.headers.get("x-cache") == "hit" else precedent_ms).append(elapsed)
+
+    _, list_ms = _timed(lambda: client.get("/documents"))
+    results.append({"operation": "list_documents", "contract": name, **summarize([list_ms])})
+    results.append({"operation": "search", "contract": name, **summarize(search_ms)})
+    results.append({"operation": "legal_precedents", "contract": name, **summarize(precedent_ms)})
+    if precedent_cached_ms:
+        results.append({"operation": "legal_precedents_cached", "contract": name, **summarize(precedent_cached_ms)})
+    return results
+
+
+def bench_cascade(app_module, client, name, text, repeats, llm_ms, llm_per_clause_ms):
+    """Documents/hour with the LLM gate against an LLM call for every clause, with a per-clause LLM cost.
+
+    The stub LLM sleeps ``llm_ms`` per batch plus ``llm_per_clause_ms`` per prompt (the zero-latency default
+    of the other benchmarks would hide what the gate saves); risk_agreement is the share of clauses whose
+    final risk level matches the always-LLM analysis.
+    """
+    llm_backend = app_module.rag_engine.llm_backend
+    classifier = app_module.redlining_classifier
+    saved = (llm_backend.latency_ms, llm_backend.score_latency_ms, llm_backend.per_prompt_ms, classifier.cascade)
+    llm_backend.latency_ms = llm_backend.score_latency_ms = llm_ms
+    llm_backend.per_prompt_ms = llm_per_clause_ms
+    pdf_bytes = make_pdf(text)
+    timings, risks, llm_call_rate = {}, {}, None
+    try:
+        for cascade in (False, True):
+            classifier.cascade = cascade
+            timings[cascade] = []
+            for _ in range(repeats):
+                response, _ = _timed(lambda: client.post(
+                    "/upload", files={"file": (f"{name}_cascade.pdf", pdf_bytes, "application/pdf")}
+                ))
+                doc_id = response.json()["doc_id"]
+                response, elapsed = _timed(lambda: client.post(f"/analyze/{doc_id}", params={"format": "json"}))
+                timings[cascade].append(elapsed)
+                analysis = response.json()["analysis"]
+                risks[cascade] = [clause["classification"]["risk_level"] for clause in response.json()["classified_clauses"]]
+                if cascade:
+                    llm_call_rate = analysis["llm_gating"]["llm_call_rate"]
+    finally:
+        llm_backend.latency_ms, llm_backend.score_latency_ms, llm_backend.per_prompt_ms, classifier.cascade = saved
+
+    per_hour = {cascade: round(len(ms) / (sum(ms) / 1000) * 3600, 1) for cascade, ms in timings.items()}
+    agreement = sum(1 for gated, always in zip(risks[True], risks[False]) if gated == always)
+    return [{
+        "operation": "analyze_cascade",
+        "contract": name,
+        "llm_ms": llm_ms,
+        "llm_per_clause_ms": llm_per_clause_ms,
+        "llm_call_rate": llm_call_rate,
+        "documents_per_hour": per_hour[True],
+        "documents_per_hour_without_cascade": per_hour[False],
+        "throughput_gain": round(per_hour[True] / per_hour[False], 2),
+        "risk_agreement": round(agreement / len(risks[True]), 3) if risks[True] else None,
+        **summarize(timings[True])
+    }]
+
+
+def bench_long_precedents(client, repeats, words=2000):
+    """POST /legal-precedents with contract-length clause texts, first lookup vs memoized repeats"""
+    clauses = [f"Variant {i}: " + " ".join(synthetic_contract(60).split()[:words]) for i in range(repeats)]
+    miss_ms, hit_ms = [], []
+    for clause in clauses:
+        for _ in range(3):
+            response, elapsed = _timed(lambda: client.post("/legal-precedents", json={"clause_text": clause, "limit": 5}))
+            (hit_ms if response.headers.get("x-cache") == "hit" else miss_ms).append(elapsed)
+    results = [{"operation": "legal_precedents_long", "contract": f"{words}_words", **summarize(miss_ms)}]
+    if hit_ms:
+        results.append({"operation": "legal_precedents_long_cached", "contract": f"{words}_words", **summarize(hit_ms)})
+    return results
+
+
+def bench_workspace(client, repeats):
+    """Search a workspace holding only the sample contract, next to the shared default workspace"""
+    headers = {"X-Workspace": "bench-small"}
+    _timed(lambda: client.post(
+        "/upload", files={"file": ("sample_contract.pdf", make_pdf(SAMPLE_CONTRACT.read_text()), "application/pdf")},
+        headers=headers
+    ))
+    search_ms = []
+    for _ in range(repeats):
+        for query in SEARCH_QUERIES:
+            _, elapsed = _timed(lambda: client.get("/search", params={"query": query, "limit": 10}, headers=headers))
+            search_ms.append(elapsed)
+    return [{"operation": "search_workspace", "contract": "sample_contract", **summarize(search_ms)}]
+
+
+def bench_maintenance(client):
+    """Delete every other uploaded document, then rebuild contract_clauses and report before/after"""
+    documents = client.get("/documents", params={"limit": 100000}).json()["documents"]
+    delete_ms = []
+    for document in documents[::2]:
+        _, elapsed = _timed(lambda: client.delete(f"/documents/{document['doc_id']}"))
+        delete_ms.append(elapsed)
+
+    # The rebuild runs as a background task, which the test client waits for
+    _, compact_ms = _timed(lambda: client.post("/admin/compact"))
+    job = client.get("/admin/compact").json()
+    if job["status"] != "completed":
+        raise RuntimeError(f"Compaction {job['status']}: {job.get('error')}")
+    report = job["report"]
+    return [
+        {"operation": "delete_document", "contract": "all", "documents_deleted": len(delete_ms), **summarize(delete_ms)},
+        {
+            "operation": "compact",
+            "contract": "all",
+            "chunks": report["after"]["chunks"],
+            "disk_bytes_before": report["before"]["disk_bytes"],
+            "disk_bytes_after": report["after"]["disk_bytes"],
+            "query_p50_ms_before": report["before"]["query_p50_ms"],
+            "query_p50_ms_after": report["after"]["query_p50_ms"],
+            **summarize([compact_ms])
+        },
+    ]
+
+
+def compare(baseline_path, current):
+    """Print p50/p95 ratios against a previous results file"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {(r["operation"], r["contract"]): r for r in baseline["results"]}
+
+    print(f"\nComparison against {baseline_path} ({baseline['meta'].get('commit')})")
+    for result in current["results"]:
+        old = previous.get((result["operation"], result["contract"]))
+        if not old:
+            continue
+        ratios = []
+        for key in ("p50_ms", "p95_ms"):
+            if old.get(key):
+                ratios.append(f"{key} {result[key] / old[key]:.2f}x")
+        print(f"  {result['operation']:<18} {result['contract']:<14} {'  '.join(ratios)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Synthetic contract sizes in clauses")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--precedents", type=int, default=500, help="Synthetic legal precedents to seed")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0,
+                        help="Simulated latency of each (batched) stub LLM call")
+    parser.add_argument("--llm-per-clause-ms", type=float, default=0.0,
+                        help="Additional simulated stub LLM latency per clause in a batch")
+    parser.add_argument("--no-cascade", action="store_true", help="Call the LLM for every clause (no gating)")
+    parser.add_argument("--cascade-llm-ms", type=float, default=100.0,
+                        help="Stub LLM latency per batch in the cascade throughput comparison")
+    parser.add_argument("--cascade-llm-per-clause-ms", type=float, default=25.0,
+                        help="Stub LLM latency per clause in the cascade throughput comparison")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    output_path = Path(args.output).resolve()
+    baseline_path = Path(args.baseline).resolve() if args.baseline else None
+
+    # Measured in fresh interpreters, before this process imports anything heavy
+    startup = profile_import("main", runs=args.repeats)
+    print(f"import main: {startup['import_ms']} ms")
+    cold_start = profile_cold_start(runs=args.repeats, precedents=args.precedents, llm_latency_ms=args.llm_latency_ms)
+    first = {result["operation"]: result["p50_ms"] for result in cold_start}
+    print(f"first /analyze: {first['first_analyze_cold']} ms cold, {first['first_analyze_after_warmup']} ms after warm-up, "
+          f"{first['analyze_warm']} ms warm")
+
+    # main.py mounts ./static and ./templates relative to the working directory
+    os.chdir(ROOT)
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    # Populate the app's globals directly; the lifespan (which loads real models) is never entered
+    system = build_stub_system(
+        precedents=args.precedents, llm_latency_ms=args.llm_latency_ms,
+        llm_per_clause_ms=args.llm_per_clause_ms, cascade=not args.no_cascade
+    )
+    app_module.document_processor = system["document_processor"]
+    app_module.rag_engine = system["rag_engine"]
+    app_module.redlining_classifier = system["redlining_classifier"]
+    app_module.document_store = system["document_store"]
+    client = TestClient(app_module.app)
+
+    contracts = [("sample_contract", SAMPLE_CONTRACT.read_text())]
+    contracts += [(f"synthetic_{size}", synthetic_contract(size)) for size in args.sizes]
+
+    results = [{
+        "operation": "import_main",
+        "contract": "none",
+        "deferred_modules_loaded": startup["deferred_modules_loaded"],
+        **summarize(startup["runs_ms"])
+    }]
+    results.extend(cold_start)
+    for name, text in contracts:
+        started = time.perf_counter()
+        # Every contract starts with cold precedent lookups
+        app_module.precedent_cache.clear()
+        results.extend(bench_contract(client, name, text, args.repeats))
+        print(f"{name}: done in {time.perf_counter() - started:.1f}s")
+    name, text = contracts[-1]
+    results.extend(bench_cascade(
+        app_module, client, name, text, args.repeats, args.cascade_llm_ms, args.cascade_llm_per_clause_ms
+    ))
+    cascade = results[-1]
+    print(f"cascade: {cascade['documents_per_hour']} documents/hour vs {cascade['documents_per_hour_without_cascade']} "
+          f"calling the LLM for every clause ({cascade['throughput_gain']}x, LLM call rate {cascade['llm_call_rate']}, "
+          f"risk agreement {cascade['risk_agreement']})")
+    results.extend(bench_long_precedents(client, args.repeats))
+    results.extend(bench_workspace(client, args.repeats))
+    results.extend(bench_maintenance(client))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+        },
+        "results": results,
+    }
+
+    output_path.write_text(json.dumps(report, indent=2))
+    for result in results:
+        print(result)
+    print(f"\nResults written to {output_path}")
+
+    if baseline_path:
+        compare(baseline_path, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,22 @@
-import requests
 import json
-import pandas as pd
 from typing import List, Dict, Any, Optional
 import logging
 from pathlib import Path
 import hashlib
-from datasets import load_dataset
-from sentence_transformers import SentenceTransformer
 import re
 import os
 
+from models.embedding_backends import get_embedding_model
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class LegalDatasetLoader:
-    def __init__(self, cache_dir: str = "./legal_data_cache"):
+    def __init__(self, cache_dir: str = "./legal_data_cache", embedding_model=None):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Reuse the caller's encoder when given so only one copy is loaded
+        self.embedding_model = embedding_model if embedding_model is not None else get_embedding_model()
         
         # Legal risk classification mappings
         self.risk_mapping = self._initialize_risk_mapping()
@@ -83,6 +82,9 @@ class LegalDatasetLoader:
             
             logger.info("Downloading CUAD dataset from HuggingFace...")
             
+            # Imported here: datasets (and pandas/pyarrow behind it) is only needed to build the cache
+            from datasets import load_dataset
+            
             # Load CUAD dataset
             dataset = load_dataset("cuad", split="train[:1000]")  # Limit for demo
             
@@ -351,9 +353,9 @@ class LegalDatasetLoader:
             return None
 
 # Utility function for easy integration
-def get_legal_dataset_loader() -> LegalDatasetLoader:
+def get_legal_dataset_loader(embedding_model=None) -> LegalDatasetLoader:
     """Factory function to create a legal dataset loader"""
-    return LegalDatasetLoader()
+    return LegalDatasetLoader(embedding_model=embedding_model)
 
 if __name__ == "__main__":
     # Test the loader
@@ -1,19 +1,39 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, BackgroundTasks, Depends, File, Form, Header, Query, UploadFile, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi import Request
-import uvicorn
+from fastapi.concurrency import run_in_threadpool
+import json
 import os
 import uuid
 import asyncio
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
 
 from models.document_processor import DocumentProcessor
+from models.document_store import DocumentStore
+from models.inference_worker import InferenceUnavailable, InferenceWorker, RemoteEmbeddingModel
 from models.rag_engine import RAGEngine
-from models.redlining_classifier import RedliningClassifier
+from models.redlining_classifier import (
+    CLASSIFICATION_FIELDS, PROSE_FIELDS, RedliningClassifier, project_classification, resolve_fields, with_facts
+)
+from models.explanations import render_field
+from models.metrics import REGISTRY, COLLECTION_SIZE, QUEUE_DEPTH, track_stage
+from models.tracing import span, start_trace
+from models.response_cache import TTLCache
+from models.workspaces import validate_workspace
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+    json_loads = orjson.loads
+except ImportError:
+    FastJSONResponse = JSONResponse
+    json_loads = json.loads
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,25 +43,83 @@ logger = logging.getLogger(__name__)
 document_processor = None
 rag_engine = None
 redlining_classifier = None
+document_store = None
+
+# Read-only components (embedding model, LLM backend, precedent index) that prefork.py loads
+# once in the parent process before forking workers; passed to each worker's RAGEngine
+preloaded_components: Dict[str, Any] = {}
+
+# Run the embedding model and LLM in a separate inference worker process started by the app
+INFERENCE_WORKER = os.getenv("INFERENCE_WORKER", "false").lower() in ("1", "true", "yes")
+inference_worker: Optional[InferenceWorker] = None
+
+def inference_unavailable(e: InferenceUnavailable) -> HTTPException:
+    """503 for a busy or restarting inference worker; nothing produced under it is stored or cached"""
+    return HTTPException(status_code=503, detail=f"Inference worker unavailable: {str(e)}", headers={"Retry-After": "5"})
+
+# Retention policy; 0 disables a limit
+RETENTION_MAX_AGE_DAYS = float(os.getenv("RETENTION_MAX_AGE_DAYS", "0"))
+RETENTION_MAX_DOCUMENTS = int(os.getenv("RETENTION_MAX_DOCUMENTS", "0"))
+
+# Rendered /legal-precedents responses; the precedent collection only changes at startup
+precedent_cache = TTLCache(
+    "legal_precedents",
+    max_entries=int(os.getenv("PRECEDENT_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("PRECEDENT_CACHE_TTL_SECONDS", "300"))
+)
+
+# State of the background contract_clauses rebuild (one at a time)
+compaction_job: Dict[str, Any] = {"status": "idle"}
+
+# Passes of representative encode, query, generate and render calls run after startup, before /ready
+# reports ready (0 disables warm-up)
+WARMUP_ITERATIONS = int(os.getenv("WARMUP_ITERATIONS", "2"))
+WARMUP_CLAUSES = (
+    "1. The Supplier shall indemnify and hold harmless the Customer against all claims, losses and damages "
+    "arising from any breach of this Agreement, and its liability under this clause shall be unlimited.",
+    "2. Either party may terminate this Agreement for convenience upon thirty (30) days written notice to the "
+    "other party, subject to payment of all fees accrued up to the termination date.",
+    "3. All confidential information disclosed under this Agreement shall be kept strictly confidential for a "
+    "period of five (5) years and used solely for the purposes of this Agreement.",
+    "4. This Agreement shall be governed by the laws of the State of New York, and any dispute shall be "
+    "resolved by binding arbitration."
+)
+# pending until the lifespan finishes, then running, done, failed or disabled; /ready flips after running
+warmup_state: Dict[str, Any] = {"status": "pending"}
+warmup_task: Optional[asyncio.Task] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize models on startup"""
-    global document_processor, rag_engine, redlining_classifier
+    global document_processor, rag_engine, redlining_classifier, document_store, inference_worker, warmup_task
     
     logger.info("Initializing Contract Redlining RAG System...")
     
     try:
         # Initialize components
-        document_processor = DocumentProcessor()
-        logger.info("✅ Document processor initialized")
+        components = dict(preloaded_components)
+        if INFERENCE_WORKER and "inference_client" not in components and "embedding_model" not in components:
+            inference_worker = InferenceWorker().start()
+            components["inference_client"] = inference_worker.client()
+            logger.info("✅ Inference worker started")
         
-        rag_engine = RAGEngine()
+        rag_engine = RAGEngine(**components)
         logger.info("✅ RAG engine initialized")
         
+        # Chunk with the embedding model's tokenizer so every chunk fits its sequence length
+        max_seq_length = getattr(rag_engine.embedding_model, "max_seq_length", None)
+        document_processor = DocumentProcessor(
+            tokenizer=getattr(rag_engine.embedding_model, "tokenizer", None),
+            max_tokens=max_seq_length - 2 if max_seq_length else None  # room for [CLS]/[SEP]
+        )
+        logger.info("✅ Document processor initialized")
+        
         redlining_classifier = RedliningClassifier(rag_engine)
         logger.info("✅ Redlining classifier initialized")
         
+        document_store = DocumentStore(os.getenv("DOCUMENT_STORE_PATH", "./redlining.db"))
+        logger.info("✅ Document store initialized")
+        
         # Create uploads directory if it doesn't exist
         os.makedirs("uploads", exist_ok=True)
         
@@ -51,10 +129,21 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Error during startup: {str(e)}")
         raise
     
+    # Warm up in the background so /health answers meanwhile; /ready reports when it is done
+    if WARMUP_ITERATIONS > 0:
+        warmup_state["status"] = "running"
+        warmup_task = asyncio.create_task(run_in_threadpool(warm_up, WARMUP_ITERATIONS))
+    else:
+        warmup_state["status"] = "disabled"
+    
     yield
     
     # Cleanup (if needed)
     logger.info("Shutting down...")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if inference_worker is not None:
+        inference_worker.stop()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -64,23 +153,67 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Large analyses compress ~10-20x; small responses are not worth the CPU. Level 5 is ~2.5x faster than
+# Starlette's default 9 for a few percent more bytes
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MIN_BYTES", "1024")),
+    compresslevel=int(os.getenv("GZIP_LEVEL", "5"))
+)
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+# Compiled once; autoescaped like every other template
+REDLINED_CLAUSES = templates.get_template("partials/redlined_clauses.html")
+RISK_EMOJI = {"RED": "🔴", "AMBER": "🟡", "GREEN": "🟢"}
+ANALYSIS_FORMATS = ("json", "html", "both")
+
+def resolve_analysis_format(response_format: str = Query("both", alias="format")) -> str:
+    """?format=json (no redlined HTML), html (streamed HTML only) or both (JSON with redlined_html)"""
+    if response_format not in ANALYSIS_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(ANALYSIS_FORMATS)}")
+    return response_format
+
+def resolve_analysis_fields(view: Optional[str] = None, fields: Optional[str] = None) -> tuple:
+    """Per-clause classification fields: ?view=minimal|compact|full (default full) or ?fields=a,b (core fields always included)"""
+    try:
+        return resolve_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def resolve_workspace(x_workspace: Optional[str] = Header(None), workspace: Optional[str] = None) -> str:
+    """Workspace from the X-Workspace header or ?workspace= (header wins); unset means the default workspace"""
+    try:
+        return validate_workspace(x_workspace or workspace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _workspace_document(doc_id: str, workspace: str) -> Optional[Dict[str, Any]]:
+    """Stored document metadata, hidden from other workspaces"""
+    document = document_store.get_document(doc_id)
+    if document is None or document["workspace"] != workspace:
+        return None
+    return document
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Serve the main application page"""
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process a contract document"""
+async def upload_document(background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                          previous_doc_id: Optional[str] = Form(None), workspace: str = Depends(resolve_workspace)):
+    """Upload and process a contract document, optionally as a revision of ``previous_doc_id``"""
     try:
         # Validate file type
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
         
+        if previous_doc_id and _workspace_document(previous_doc_id, workspace) is None:
+            raise HTTPException(status_code=404, detail=f"Previous document {previous_doc_id} not found")
+        
         # Generate unique document ID
         doc_id = str(uuid.uuid4())
         
@@ -92,7 +225,7 @@ async def upload_document(file: UploadFile = File(...)):
         processed_doc = document_processor.process_document(file_content, file.filename)
         
         # Add to vector database
-        rag_engine.add_document_to_vectordb(processed_doc["chunks"], doc_id)
+        rag_engine.add_document_to_vectordb(processed_doc["chunks"], doc_id, workspace=workspace)
         
         # Store document metadata
         doc_metadata = {
@@ -100,11 +233,17 @@ async def upload_document(file: UploadFile = File(...)):
             "filename": file.filename,
             "total_chunks": processed_doc["total_chunks"],
             "total_clauses": processed_doc["total_clauses"],
-            "word_count": processed_doc["word_count"]
+            "word_count": processed_doc["word_count"],
+            "previous_doc_id": previous_doc_id,
+            "workspace": workspace
         }
+        document_store.add_document(doc_metadata, processed_doc["chunks"])
         
         logger.info(f"Document processed successfully: {doc_metadata}")
         
+        if RETENTION_MAX_AGE_DAYS > 0 or RETENTION_MAX_DOCUMENTS > 0:
+            background_tasks.add_task(_apply_retention, RETENTION_MAX_AGE_DAYS, RETENTION_MAX_DOCUMENTS)
+        
         return JSONResponse({
             "success": True,
             "message": "Document uploaded and processed successfully",
@@ -112,176 +251,454 @@ async def upload_document(file: UploadFile = File(...)):
             "metadata": doc_metadata
         })
         
+    except HTTPException:
+        raise
+    except InferenceUnavailable as e:
+        logger.error(f"Error uploading document: {str(e)}")
+        raise inference_unavailable(e)
     except Exception as e:
         logger.error(f"Error uploading document: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
 @app.post("/analyze/{doc_id}")
-async def analyze_document(doc_id: str):
-    """Analyze document and generate redlined output"""
+async def analyze_document(doc_id: str, trace: bool = False, workspace: str = Depends(resolve_workspace),
+                           response_format: str = Depends(resolve_analysis_format),
+                           fields: tuple = Depends(resolve_analysis_fields)):
+    """Analyze document and generate redlined output; ?trace=1 attaches a timing breakdown.
+    
+    Revisions uploaded with ``previous_doc_id`` only reclassify new or edited clauses.
+    ``?format=json`` skips the redlined HTML, ``?format=html`` streams only the HTML.
+    ``?view=compact`` or ``?fields=`` limits what is computed and returned per clause.
+    """
     try:
-        # Get document chunks from vector database
-        search_results = rag_engine.semantic_search("contract clause", n_results=100)
-        
-        if not search_results:
-            raise HTTPException(status_code=404, detail="Document not found or no clauses detected")
-        
-        # Filter clauses for this document
-        doc_clauses = [
-            result for result in search_results 
-            if result["metadata"]["document_id"] == doc_id and result["metadata"]["is_clause"]
-        ]
-        
-        if not doc_clauses:
-            raise HTTPException(status_code=404, detail="No clauses found in document")
-        
-        logger.info(f"Analyzing {len(doc_clauses)} clauses for document {doc_id}")
-        
-        # Classify all clauses
-        clauses_for_classification = [{"text": clause["text"]} for clause in doc_clauses]
-        analysis_result = redlining_classifier.classify_document(clauses_for_classification)
-        
-        # Create redlined HTML
-        redlined_html = generate_redlined_html(analysis_result["classified_clauses"])
+        with start_trace("analyze") if trace else nullcontext() as document_trace:
+            # Get this document's clause chunks from the store (vector database for older uploads)
+            with span("fetch_clauses"):
+                document = document_store.get_document(doc_id)
+                if document is None:
+                    doc_clauses = rag_engine.get_document_chunks(doc_id, workspace=workspace)
+                elif document["workspace"] == workspace:
+                    doc_clauses = document_store.get_chunks(doc_id)
+                else:
+                    doc_clauses = []
+            
+            if not doc_clauses:
+                raise HTTPException(status_code=404, detail="Document not found or no clauses detected")
+            
+            logger.info(f"Analyzing {len(doc_clauses)} clauses for document {doc_id}")
+            
+            clauses_for_classification = [{"text": clause["text"]} for clause in doc_clauses]
+            # The redlined HTML shows each clause's explanation, so it needs facts (stored too, so later reads
+            # can render prose); format=json computes only the requested fields
+            stored_fields = with_facts(fields) if response_format != "json" else fields
+            config_version = redlining_classifier.config_version()
+            previous_doc_id = (document or {}).get("previous_doc_id")
+            previous_result = _load_previous_result(previous_doc_id, config_version, stored_fields) if previous_doc_id else None
+            
+            # Off the event loop: retrieval and the LLM block (on IPC round-trips with the inference worker)
+            with span("classify"):
+                if previous_result:
+                    # Diff against the previous version and reuse its unchanged classifications
+                    analysis_result = await run_in_threadpool(
+                        redlining_classifier.classify_revision,
+                        clauses_for_classification, previous_result, trace=trace, fields=stored_fields
+                    )
+                else:
+                    # Classify all clauses
+                    analysis_result = await run_in_threadpool(
+                        redlining_classifier.classify_document, clauses_for_classification, trace=trace, fields=stored_fields
+                    )
+            
+            # Create redlined HTML (streamed below for format=html)
+            redlined_html = None
+            if response_format == "both":
+                with span("html_rendering"), track_stage("html_rendering"):
+                    redlined_html = generate_redlined_html(analysis_result["classified_clauses"])
         
         # Prepare response
         response = {
             "success": True,
             "doc_id": doc_id,
+            "config_version": config_version,
+            "fields": list(stored_fields),
             "analysis": {
                 "risk_summary": analysis_result["risk_summary"],
                 "risk_percentage": analysis_result["risk_percentage"],
                 "overall_risk": analysis_result["overall_risk"],
                 "total_clauses": analysis_result["total_clauses"],
-                "recommendations": analysis_result["recommendations"]
+                "recommendations": analysis_result["recommendations"],
+                "llm_gating": analysis_result["llm_gating"]
             },
-            "classified_clauses": analysis_result["classified_clauses"],
-            "redlined_html": redlined_html
+            "classified_clauses": analysis_result["classified_clauses"]
         }
         
+        if previous_doc_id:
+            response["revision"] = {
+                "previous_doc_id": previous_doc_id,
+                "incremental": previous_result is not None,
+                **analysis_result.get("revision", {"reason": "previous version has not been analyzed"})
+            }
+        
+        # The redlined HTML is stored next to the JSON rather than inside it, so format=json reads stay small
+        with track_stage("store_analysis"):
+            document_store.save_analysis(
+                doc_id, config_version, response, redlined_html=redlined_html,
+                fields=None if stored_fields == CLASSIFICATION_FIELDS else list(stored_fields)
+            )
+        
         logger.info(f"Analysis completed for document {doc_id}")
-        return JSONResponse(response)
+        if response_format == "html":
+            return StreamingResponse(
+                iter_redlined_html(analysis_result["classified_clauses"], standalone=True), media_type="text/html"
+            )
+        if stored_fields != fields:
+            response = _project_analysis(response, fields)
+        if redlined_html is not None:
+            response["redlined_html"] = redlined_html
+        
+        if trace:
+            response["trace"] = {
+                **document_trace.to_dict(depth=1),
+                "clause_stage_totals_ms": analysis_result["stage_totals_ms"]
+            }
+        
+        return FastJSONResponse(response)
         
     except HTTPException:
         raise
+    except InferenceUnavailable as e:
+        # Never stored: a backpressure-degraded analysis would be served later as a full one
+        logger.error(f"Error analyzing document {doc_id}: {str(e)}")
+        raise inference_unavailable(e)
     except Exception as e:
         logger.error(f"Error analyzing document {doc_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing document: {str(e)}")
 
+@app.get("/analyze/{doc_id}")
+async def get_stored_analysis(doc_id: str, workspace: str = Depends(resolve_workspace),
+                              response_format: str = Depends(resolve_analysis_format),
+                              fields: tuple = Depends(resolve_analysis_fields)):
+    """Stored analysis for the current model/config version, served without reclassification (same ?format=/?view= as POST)"""
+    if _workspace_document(doc_id, workspace) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    config_version = redlining_classifier.config_version()
+    record = document_store.get_analysis_record(doc_id, config_version)
+    if record is None:
+        raise HTTPException(status_code=404, detail="No stored analysis for this document and configuration; POST /analyze first")
+    stored_fields = record["fields"] or CLASSIFICATION_FIELDS
+    if not set(fields) <= _available_fields(stored_fields):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Stored analysis only has {', '.join(sorted(_available_fields(stored_fields)))}; POST /analyze with the fields you need"
+        )
+    
+    payload, redlined_html, stored = record["result"], record["redlined_html"], None
+    if redlined_html is None and response_format != "json":
+        if "explanation" not in _available_fields(stored_fields):
+            raise HTTPException(
+                status_code=404,
+                detail="Stored analysis has no explanations for the redlined HTML; POST /analyze with format=both or html"
+            )
+        stored = json_loads(payload)
+        if "redlined_html" in stored:  # stored before the HTML got its own column
+            redlined_html = stored.pop("redlined_html")
+        else:  # analyzed with format=json or html
+            redlined_html = generate_redlined_html(stored["classified_clauses"])
+            document_store.save_redlined_html(doc_id, config_version, redlined_html)
+    
+    if response_format == "html":
+        return HTMLResponse('<link rel="stylesheet" href="/static/redlined.css">\n' + redlined_html)
+    
+    if set(fields) != set(stored_fields) or stored is not None:
+        content = stored if stored is not None else json_loads(payload)
+        content.pop("redlined_html", None)
+        if set(fields) != set(stored_fields):
+            content = _project_analysis(content, fields)
+        if response_format == "both":
+            content["redlined_html"] = redlined_html
+        return FastJSONResponse(content)
+    
+    if response_format == "json":
+        return Response(content=payload, media_type="application/json")
+    # Splice the stored HTML into the stored JSON object instead of re-serializing the whole analysis
+    return Response(content=f'{payload[:-1]}, "redlined_html": {json.dumps(redlined_html, ensure_ascii=False)}}}', media_type="application/json")
+
+def _project_analysis(analysis: Dict[str, Any], fields: tuple) -> Dict[str, Any]:
+    """Analysis with each clause's classification reduced to ``fields``"""
+    return {
+        **analysis,
+        "fields": list(fields),
+        "classified_clauses": [
+            {**clause, "classification": project_classification(clause["classification"], fields)}
+            for clause in analysis["classified_clauses"]
+        ]
+    }
+
+def _available_fields(stored_fields) -> set:
+    """Fields a stored analysis can serve: what was stored plus the prose its facts can render"""
+    available = set(stored_fields)
+    if "facts" in available:
+        available.update(PROSE_FIELDS)
+    return available
+
+def _load_previous_result(previous_doc_id: str, config_version: str, fields: tuple = CLASSIFICATION_FIELDS) -> Optional[Dict[str, Any]]:
+    """Stored analysis of an earlier version in the shape ``classify_revision`` expects, if it holds ``fields``"""
+    record = document_store.get_analysis_record(previous_doc_id, config_version)
+    if record is None or not set(fields) <= _available_fields(record["fields"] or CLASSIFICATION_FIELDS):
+        return None
+    stored = json_loads(record["result"])
+    return {
+        "classified_clauses": stored["classified_clauses"],
+        "risk_summary": stored["analysis"]["risk_summary"],
+        "overall_risk": stored["analysis"]["overall_risk"]
+    }
+
+@app.get("/documents")
+async def list_documents(limit: int = 50, offset: int = 0, workspace: str = Depends(resolve_workspace)):
+    """A workspace's uploaded documents, newest first (served from the document store, not the vector database)"""
+    return FastJSONResponse({
+        "success": True,
+        "workspace": workspace,
+        "total": document_store.count_documents(workspace),
+        "documents": document_store.list_documents(limit=limit, offset=offset, workspace=workspace)
+    })
+
+@app.delete("/documents/{doc_id}")
+async def delete_document(doc_id: str, workspace: str = Depends(resolve_workspace)):
+    """Delete a document's chunks, lexical index entries, stored chunks and analyses"""
+    document = document_store.get_document(doc_id)
+    if document is not None and document["workspace"] != workspace:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if document is None and not rag_engine.get_document_chunks(doc_id, clauses_only=False, workspace=workspace):
+        raise HTTPException(status_code=404, detail="Document not found")
+    try:
+        deleted_chunks = await run_in_threadpool(_delete_document, doc_id, workspace)
+        return JSONResponse({"success": True, "doc_id": doc_id, "deleted_chunks": deleted_chunks})
+    except Exception as e:
+        logger.error(f"Error deleting document {doc_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+
+def _delete_document(doc_id: str, workspace: Optional[str] = None) -> int:
+    if workspace is None:
+        workspace = (document_store.get_document(doc_id) or {}).get("workspace")
+    deleted_chunks = rag_engine.delete_document(doc_id, workspace=workspace)
+    document_store.delete_document(doc_id)
+    return deleted_chunks
+
+def _apply_retention(max_age_days: float, max_documents: int) -> List[str]:
+    """Delete every document outside the retention policy"""
+    expired = document_store.expired_documents(max_age_seconds=max_age_days * 86400, max_documents=max_documents)
+    for doc_id in expired:
+        try:
+            _delete_document(doc_id)
+        except Exception as e:
+            logger.error(f"Error applying retention to document {doc_id}: {str(e)}")
+    if expired:
+        logger.info(f"🧹 Retention removed {len(expired)} documents")
+    return expired
+
+@app.post("/admin/retention")
+async def apply_retention(max_age_days: Optional[float] = None, max_documents: Optional[int] = None):
+    """Apply the retention policy now (defaults to RETENTION_MAX_AGE_DAYS / RETENTION_MAX_DOCUMENTS)"""
+    max_age_days = RETENTION_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_documents = RETENTION_MAX_DOCUMENTS if max_documents is None else max_documents
+    deleted = await run_in_threadpool(_apply_retention, max_age_days, max_documents)
+    return JSONResponse({
+        "success": True,
+        "policy": {"max_age_days": max_age_days, "max_documents": max_documents},
+        "deleted_documents": deleted
+    })
+
+@app.post("/admin/compact")
+async def start_compaction(background_tasks: BackgroundTasks, workspace: str = Depends(resolve_workspace)):
+    """Rebuild a workspace's clause collection in the background to reclaim space from deleted documents"""
+    if compaction_job["status"] == "running":
+        raise HTTPException(status_code=409, detail="Compaction already running")
+    compaction_job.clear()
+    compaction_job.update({"status": "running", "workspace": workspace, "started_at": time.time()})
+    background_tasks.add_task(_run_compaction, workspace)
+    return JSONResponse(dict(compaction_job), status_code=202)
+
+@app.get("/admin/compact")
+async def compaction_status():
+    """Status of the last compaction, with its before/after size and latency report"""
+    return JSONResponse(compaction_job)
+
+def _run_compaction(workspace: str):
+    try:
+        compaction_job["report"] = rag_engine.compact_collection(workspace)
+        compaction_job["status"] = "completed"
+        logger.info("🧹 Compaction completed")
+    except Exception as e:
+        logger.error(f"Error compacting collection: {str(e)}")
+        compaction_job.update({"status": "failed", "error": str(e)})
+    compaction_job["finished_at"] = time.time()
+
 @app.get("/search")
-async def search_clauses(query: str, limit: int = 10):
-    """Search for similar clauses using semantic search"""
+async def search_clauses(query: str, limit: int = 10, hybrid: bool = True, workspace: str = Depends(resolve_workspace)):
+    """Search a workspace's clauses using hybrid (BM25 + semantic) or dense-only search"""
     try:
         if not query.strip():
             raise HTTPException(status_code=400, detail="Search query cannot be empty")
         
-        results = rag_engine.semantic_search(query, n_results=limit)
+        # Run off the event loop so concurrent requests can share embedding batches
+        results = await run_in_threadpool(
+            rag_engine.semantic_search, query, n_results=limit, hybrid=hybrid, workspace=workspace
+        )
         
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
             "query": query,
+            "workspace": workspace,
             "results": results
         })
         
+    except HTTPException:
+        raise
+    except InferenceUnavailable as e:
+        logger.error(f"Error in search: {str(e)}")
+        raise inference_unavailable(e)
     except Exception as e:
         logger.error(f"Error in search: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
+@app.post("/legal-precedents")
+async def find_legal_precedents(request: Dict[str, Any]):
+    """Find similar legal precedents for ``clause_text`` in the JSON body (optional ``limit``, ``hybrid``)"""
+    clause_text = str(request.get("clause_text") or "")
+    try:
+        limit = int(request.get("limit", 5))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="limit must be an integer")
+    return await _legal_precedents_response(clause_text, limit, _parse_flag(request.get("hybrid", True), "hybrid"))
+
+def _parse_flag(value: Any, name: str) -> bool:
+    """JSON booleans plus the strings query parameters accept ("false", "0", "no", ...); bool("false") is True"""
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in ("1", "true", "yes", "on"):
+        return True
+    if normalized in ("0", "false", "no", "off"):
+        return False
+    raise HTTPException(status_code=400, detail=f"{name} must be a boolean")
+
 @app.get("/legal-precedents/{clause_text}")
-async def get_legal_precedents(clause_text: str, limit: int = 5):
-    """Find similar legal precedents for a given clause text"""
+async def get_legal_precedents(clause_text: str, limit: int = 5, hybrid: bool = True):
+    """Find similar legal precedents for a given clause text (short clauses; use POST for long ones)"""
+    return await _legal_precedents_response(clause_text, limit, hybrid)
+
+async def _legal_precedents_response(clause_text: str, limit: int, hybrid: bool) -> Response:
+    """Enriched precedents with summary analysis, memoized per (clause, limit, hybrid) for PRECEDENT_CACHE_TTL_SECONDS"""
     try:
         if not clause_text.strip():
             raise HTTPException(status_code=400, detail="Clause text cannot be empty")
         
+        cache_key = precedent_cache.key(clause_text, limit, hybrid)
+        body = precedent_cache.get(cache_key)
+        if body is not None:
+            return Response(content=body, media_type="application/json", headers={"X-Cache": "hit"})
+        
         # Find legal precedents
-        precedents = rag_engine.find_legal_precedents(clause_text, n_results=limit)
+        precedents = await run_in_threadpool(rag_engine.find_legal_precedents, clause_text, n_results=limit, hybrid=hybrid)
         
         if not precedents:
-            return JSONResponse({
+            response = FastJSONResponse({
                 "success": True,
                 "clause_text": clause_text,
                 "message": "No similar legal precedents found",
                 "precedents": []
             })
+        else:
+            enriched_precedents, summary = _summarize_precedents(precedents)
+            response = FastJSONResponse({
+                "success": True,
+                "clause_text": clause_text,
+                "total_precedents": len(enriched_precedents),
+                "precedents": enriched_precedents,
+                "analysis": {
+                    "average_similarity": round(summary["average_similarity"], 3),
+                    "average_precedent_strength": round(summary["average_precedent_strength"], 3),
+                    "risk_distribution": summary["risk_distribution"],
+                    "domain_distribution": summary["domain_distribution"],
+                    "dominant_risk": summary["dominant_risk"],
+                    "dominant_domain": summary["dominant_domain"]
+                },
+                "recommendations": _generate_precedent_recommendations(summary)
+            })
         
-        # Enrich precedents with risk analysis
-        enriched_precedents = []
-        for precedent in precedents:
-            enriched_precedent = {
-                "text": precedent["text"],
-                "similarity": precedent["similarity"],
-                "risk_level": precedent["metadata"]["risk_level"],
-                "clause_type": precedent["metadata"]["clause_type"],
-                "contract_domain": precedent["metadata"]["contract_domain"],
-                "precedent_strength": precedent["metadata"]["legal_precedent"],
-                "source": precedent["metadata"]["source"],
-                "contract_title": precedent["metadata"].get("contract_title", "Unknown"),
-                "risk_explanation": _get_risk_explanation(precedent["metadata"]["risk_level"])
-            }
-            enriched_precedents.append(enriched_precedent)
-        
-        # Generate summary statistics
-        risk_distribution = {}
-        domain_distribution = {}
-        
-        for precedent in enriched_precedents:
-            # Risk distribution
-            risk = precedent["risk_level"]
-            risk_distribution[risk] = risk_distribution.get(risk, 0) + 1
-            
-            # Domain distribution  
-            domain = precedent["contract_domain"]
-            domain_distribution[domain] = domain_distribution.get(domain, 0) + 1
-        
-        # Calculate average similarity and precedent strength
-        avg_similarity = sum(p["similarity"] for p in enriched_precedents) / len(enriched_precedents)
-        avg_precedent_strength = sum(p["precedent_strength"] for p in enriched_precedents) / len(enriched_precedents)
-        
-        return JSONResponse({
-            "success": True,
-            "clause_text": clause_text,
-            "total_precedents": len(enriched_precedents),
-            "precedents": enriched_precedents,
-            "analysis": {
-                "average_similarity": round(avg_similarity, 3),
-                "average_precedent_strength": round(avg_precedent_strength, 3),
-                "risk_distribution": risk_distribution,
-                "domain_distribution": domain_distribution,
-                "dominant_risk": max(risk_distribution, key=risk_distribution.get),
-                "dominant_domain": max(domain_distribution, key=domain_distribution.get)
-            },
-            "recommendations": _generate_precedent_recommendations(enriched_precedents, clause_text)
-        })
+        # The rendered body is cached, so hits skip retrieval and serialization alike. Empty results are
+        # not: find_legal_precedents also returns [] when retrieval fails, which must not stick for the TTL
+        if precedents:
+            precedent_cache.put(cache_key, response.body)
+        response.headers["X-Cache"] = "miss"
+        return response
         
+    except HTTPException:
+        raise
+    except InferenceUnavailable as e:
+        logger.error(f"Error finding legal precedents: {str(e)}")
+        raise inference_unavailable(e)
     except Exception as e:
         logger.error(f"Error finding legal precedents: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error finding precedents: {str(e)}")
 
-def _get_risk_explanation(risk_level: str) -> str:
-    """Get explanation for risk level"""
-    explanations = {
-        "RED": "High risk - requires immediate legal attention and careful negotiation",
-        "AMBER": "Medium risk - should be reviewed carefully and may need modification", 
-        "GREEN": "Low risk - generally acceptable with standard terms"
+RISK_EXPLANATIONS = {
+    "RED": "High risk - requires immediate legal attention and careful negotiation",
+    "AMBER": "Medium risk - should be reviewed carefully and may need modification", 
+    "GREEN": "Low risk - generally acceptable with standard terms"
+}
+
+def _summarize_precedents(precedents: List[Dict]) -> tuple:
+    """Enriched precedents plus risk/domain distributions and averages, built in one pass over the results"""
+    enriched_precedents = []
+    risk_distribution, domain_distribution = {}, {}
+    similarity_total = strength_total = 0.0
+    
+    for precedent in precedents:
+        metadata = precedent["metadata"]
+        risk = metadata["risk_level"]
+        domain = metadata["contract_domain"]
+        enriched_precedents.append({
+            "text": precedent["text"],
+            "similarity": precedent["similarity"],
+            "risk_level": risk,
+            "clause_type": metadata["clause_type"],
+            "contract_domain": domain,
+            "precedent_strength": metadata["legal_precedent"],
+            "source": metadata["source"],
+            "contract_title": metadata.get("contract_title", "Unknown"),
+            "risk_explanation": RISK_EXPLANATIONS.get(risk, "Risk level unclear")
+        })
+        risk_distribution[risk] = risk_distribution.get(risk, 0) + 1
+        domain_distribution[domain] = domain_distribution.get(domain, 0) + 1
+        similarity_total += precedent["similarity"]
+        strength_total += metadata["legal_precedent"]
+    
+    count = len(enriched_precedents)
+    dominant_risk = max(risk_distribution, key=risk_distribution.get)
+    dominant_domain = max(domain_distribution, key=domain_distribution.get)
+    return enriched_precedents, {
+        "count": count,
+        "average_similarity": similarity_total / count,
+        "average_precedent_strength": strength_total / count,
+        "risk_distribution": risk_distribution,
+        "domain_distribution": domain_distribution,
+        "dominant_risk": dominant_risk,
+        "dominant_domain": dominant_domain
     }
-    return explanations.get(risk_level, "Risk level unclear")
 
-def _generate_precedent_recommendations(precedents: List[Dict], clause_text: str) -> List[str]:
-    """Generate recommendations based on precedent analysis"""
+def _generate_precedent_recommendations(summary: Dict[str, Any]) -> List[str]:
+    """Generate recommendations from the precedent summary built by _summarize_precedents"""
     recommendations = []
     
-    if not precedents:
+    count = summary["count"]
+    if not count:
         return ["No precedents available for analysis"]
     
     # Risk-based recommendations
-    risk_counts = {}
-    for precedent in precedents:
-        risk = precedent["risk_level"]
-        risk_counts[risk] = risk_counts.get(risk, 0) + 1
-    
-    dominant_risk = max(risk_counts, key=risk_counts.get)
-    risk_percentage = (risk_counts[dominant_risk] / len(precedents)) * 100
+    dominant_risk = summary["dominant_risk"]
+    risk_percentage = (summary["risk_distribution"][dominant_risk] / count) * 100
     
     if dominant_risk == "RED" and risk_percentage >= 60:
         recommendations.append(f"⚠️ **High Risk Alert**: {risk_percentage:.0f}% of similar clauses are high-risk")
@@ -295,16 +712,14 @@ def _generate_precedent_recommendations(precedents: List[Dict], clause_text: str
         recommendations.append("👀 **Standard review process sufficient**")
     
     # Domain-specific recommendations
-    domains = [p["contract_domain"] for p in precedents]
-    dominant_domain = max(set(domains), key=domains.count) if domains else None
-    
+    dominant_domain = summary["dominant_domain"]
     if dominant_domain and dominant_domain != 'general':
-        domain_percentage = (domains.count(dominant_domain) / len(domains)) * 100
+        domain_percentage = (summary["domain_distribution"][dominant_domain] / count) * 100
         recommendations.append(f"📊 **Industry Context**: {domain_percentage:.0f}% from {dominant_domain} contracts")
         recommendations.append(f"🎯 **Consider {dominant_domain} industry standards and practices**")
     
     # Similarity-based recommendations
-    avg_similarity = sum(p["similarity"] for p in precedents) / len(precedents)
+    avg_similarity = summary["average_similarity"]
     if avg_similarity > 0.8:
         recommendations.append(f"🎯 **Strong Matches Found**: Average similarity {avg_similarity:.1%}")
         recommendations.append("📚 **High confidence in precedent-based analysis**")
@@ -313,7 +728,7 @@ def _generate_precedent_recommendations(precedents: List[Dict], clause_text: str
         recommendations.append("🔍 **Consider broader legal research**")
     
     # Precedent strength recommendations
-    avg_strength = sum(p["precedent_strength"] for p in precedents) / len(precedents)
+    avg_strength = summary["average_precedent_strength"]
     if avg_strength > 0.8:
         recommendations.append("💪 **Strong Legal Precedents**: High-quality reference clauses found")
     elif avg_strength < 0.5:
@@ -321,79 +736,160 @@ def _generate_precedent_recommendations(precedents: List[Dict], clause_text: str
     
     return recommendations[:8]  # Limit to 8 recommendations
 
+def _classify_with_trace(text: str) -> Dict[str, Any]:
+    """Classify a clause inside a trace so the timing tree can be returned with it"""
+    with start_trace("classify_text") as clause_trace:
+        classification = redlining_classifier.classify_clause(text)
+    return {"classification": classification, "trace": clause_trace.to_dict()}
+
 @app.post("/classify-text")
-async def classify_text(request: Dict[str, Any]):
-    """Classify a single text clause"""
+async def classify_text(request: Dict[str, Any], trace: bool = False):
+    """Classify a single text clause; ?trace=1 attaches a timing breakdown"""
     try:
         text = request.get("text", "").strip()
         if not text:
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        classification = redlining_classifier.classify_clause(text)
+        if trace:
+            traced = await run_in_threadpool(_classify_with_trace, text)
+            return JSONResponse({"success": True, **traced})
+        
+        classification = await run_in_threadpool(redlining_classifier.classify_clause, text)
         
         return JSONResponse({
             "success": True,
             "classification": classification
         })
         
+    except HTTPException:
+        raise
+    except InferenceUnavailable as e:
+        logger.error(f"Error classifying text: {str(e)}")
+        raise inference_unavailable(e)
     except Exception as e:
         logger.error(f"Error classifying text: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Classification error: {str(e)}")
 
+def warm_up(iterations: int = WARMUP_ITERATIONS) -> Dict[str, Any]:
+    """Run the first chunking, encode, precedent and clause queries, LLM call, classification and rendering.
+    
+    The first call of each pays for lazy kernel selection, tokenizer caches, loading HNSW indexes
+    from disk and building BM25 indexes; later passes show the warm latency. Updates ``warmup_state``.
+    """
+    started = time.perf_counter()
+    passes_ms = []
+    try:
+        clauses = list(WARMUP_CLAUSES)
+        for _ in range(iterations):
+            pass_started = time.perf_counter()
+            document_processor.chunk_text("\n\n".join(clauses))
+            rag_engine.embedding_model.encode(clauses)
+            rag_engine.embedding_model.encode(clauses[:1])
+            rag_engine.semantic_search(clauses[0], n_results=3)
+            precedents = [rag_engine.find_legal_precedents(clause, n_results=3) for clause in clauses]
+            # Forces the LLM call the cascade would usually skip for such clear-cut clauses
+            rag_engine.generate_risk_analysis_batch(clauses, precedents=precedents)
+            result = redlining_classifier.classify_document([{"text": clause} for clause in clauses])
+            generate_redlined_html(result["classified_clauses"])
+            passes_ms.append(round((time.perf_counter() - pass_started) * 1000, 1))
+        
+        warmup_state.update(status="done", seconds=round(time.perf_counter() - started, 2), passes_ms=passes_ms)
+        logger.info(f"🔥 Warm-up done in {warmup_state['seconds']}s (passes: {', '.join(f'{ms:.0f} ms' for ms in passes_ms)})")
+    except Exception as e:
+        # A failed warm-up only means the first requests are slow; the app still becomes ready
+        logger.error(f"Error during warm-up: {str(e)}")
+        warmup_state.update(status="failed", error=str(e), passes_ms=passes_ms)
+    return warmup_state
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the models are loaded, warm-up has finished and the inference worker (if any) answers"""
+    ready = (
+        None not in (document_processor, rag_engine, redlining_classifier, document_store)
+        and warmup_state["status"] in ("done", "failed", "disabled")
+    )
+    # Probed through the connection: under prefork.py the worker process belongs to the parent
+    client = getattr(rag_engine, "inference_client", None)
+    if ready and client is not None:
+        ready = await run_in_threadpool(client.ping)
+    return JSONResponse({"ready": ready, "warmup": warmup_state}, status_code=200 if ready else 503)
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check: answers as soon as the process serves requests (see /ready for readiness)"""
     return JSONResponse({
         "status": "healthy",
         "models_loaded": {
             "document_processor": document_processor is not None,
             "rag_engine": rag_engine is not None,
-            "redlining_classifier": redlining_classifier is not None
+            "redlining_classifier": redlining_classifier is not None,
+            "document_store": document_store is not None
+        },
+        # None when the models run in this process
+        "inference_worker": None if inference_worker is None else {
+            "alive": inference_worker.is_alive(),
+            "restarts": inference_worker.restarts
         }
     })
 
-def generate_redlined_html(classified_clauses):
-    """Generate HTML with color-coded clauses"""
-    html_parts = []
-    
-    html_parts.append("""
-    <div class="redlined-document">
-        <style>
-            .risk-red { background-color: #ffebee; border-left: 4px solid #f44336; padding: 8px; margin: 4px 0; }
-            .risk-amber { background-color: #fff8e1; border-left: 4px solid #ff9800; padding: 8px; margin: 4px 0; }
-            .risk-green { background-color: #e8f5e8; border-left: 4px solid #4caf50; padding: 8px; margin: 4px 0; }
-            .clause-text { font-family: 'Times New Roman', serif; line-height: 1.6; }
-            .risk-indicator { font-weight: bold; font-size: 0.9em; margin-bottom: 4px; }
-            .confidence-score { font-size: 0.8em; color: #666; }
-        </style>
-    """)
-    
-    for clause in classified_clauses:
-        risk_level = clause["classification"]["risk_level"]
-        confidence = clause["classification"]["confidence"]
-        explanation = clause["classification"]["explanation"]
-        
-        css_class = f"risk-{risk_level.lower()}"
-        risk_emoji = {"RED": "🔴", "AMBER": "🟡", "GREEN": "🟢"}[risk_level]
-        
-        html_parts.append(f"""
-        <div class="{css_class}">
-            <div class="risk-indicator">
-                {risk_emoji} {risk_level} RISK 
-                <span class="confidence-score">(Confidence: {confidence})</span>
-            </div>
-            <div class="clause-text">{clause['text']}</div>
-            <div style="font-size: 0.85em; color: #555; margin-top: 4px; font-style: italic;">
-                {explanation}
-            </div>
-        </div>
-        """)
-    
-    html_parts.append("</div>")
-    
-    return "\n".join(html_parts)
+def _collection_sizes() -> Dict[tuple, float]:
+    """Vector collection and lexical index sizes, sampled at scrape time"""
+    if rag_engine is None:
+        return {}
+    sizes = {
+        ("legal_knowledge",): rag_engine.legal_collection.count(),
+        ("legal_knowledge_bm25",): len(rag_engine.legal_retriever.lexical_index)
+    }
+    # Open workspaces only; idle ones are not reopened just to be measured
+    for workspace in rag_engine.workspaces.open_workspaces():
+        sizes[(workspace.collection.name,)] = workspace.collection.count()
+        sizes[(f"{workspace.collection.name}_bm25",)] = len(workspace.retriever.lexical_index)
+    return sizes
+
+def _queue_depths() -> Dict[tuple, float]:
+    """Depth of internal work queues, sampled at scrape time"""
+    depths = {}
+    if rag_engine is not None and isinstance(rag_engine.embedding_model, RemoteEmbeddingModel):
+        # Requests this process is waiting on; batching happens in the worker
+        depths[("inference_client",)] = rag_engine.embedding_model.queue_depth
+    elif rag_engine is not None and hasattr(rag_engine.embedding_model, "queue_depth"):
+        depths[("embedding_batcher",)] = rag_engine.embedding_model.queue_depth
+    return depths
+
+COLLECTION_SIZE.set_function(_collection_sizes)
+QUEUE_DEPTH.set_function(_queue_depths)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, LLM throughput, queues, caches and collection sizes"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def iter_redlined_html(classified_clauses: List[Dict], standalone: bool = False, chunk_chars: int = 65536):
+    """Redlined document HTML in pieces of about ``chunk_chars``, rendered clause by clause from the partial template"""
+    buffer = ['<link rel="stylesheet" href="/static/redlined.css">\n'] if standalone else []
+    buffer.append('<div class="redlined-document">')
+    buffered = 0
+    for piece in REDLINED_CLAUSES.generate(
+        clauses=classified_clauses, risk_emoji=RISK_EMOJI, explain=_clause_explanation
+    ):
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_chars:
+            yield "".join(buffer)
+            buffer, buffered = [], 0
+    buffer.append("\n</div>\n")
+    yield "".join(buffer)
+
+def _clause_explanation(classification: Dict[str, Any]) -> str:
+    """Stored explanation, or one rendered from the classification's facts"""
+    return render_field("explanation", classification) or ""
+
+def generate_redlined_html(classified_clauses: List[Dict]) -> str:
+    """Generate HTML with color-coded clauses (styles are in static/redlined.css)"""
+    return "".join(iter_redlined_html(classified_clauses))
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
@@ -0,0 +1,115 @@
+from typing import Callable, List, Optional
+import re
+
+# Clause starts, matched on the raw text while line breaks still exist. Numbered
+# sections and lettered/roman subsections only count at the start of a line (or,
+# for subsections, after a ':' or ';' lead-in) so "1.5%" or "see (a)" never split.
+_LINE_CLAUSE_START = re.compile(
+    r"""
+    ^[ \t]*
+    (?= (?:Section|SECTION|Article|ARTICLE)\s+\d
+      | \d+(?:\.\d+)*\.\s+\S
+      | \d+(?:\.\d+)+\s+\S
+      | \((?:[a-z]{1,2}|[ivx]{1,5})\)\s
+      | WHEREAS\b
+      | NOW,?\s+THEREFORE\b
+      | The\ parties\ agree\ that\b )
+    """,
+    re.VERBOSE | re.MULTILINE,
+)
+_INLINE_SUBSECTION = re.compile(r"[:;][ \t]+(?=\((?:[a-z]{1,2}|[ivx]{1,5})\)\s)")
+_SENTENCE_END = re.compile(r"(?<=[.;:!?])\s+")
+_PUNCTUATION = ".,;:()"
+
+
+def approximate_token_count(text: str) -> int:
+    """Words plus common punctuation marks; a lower bound on WordPiece/BPE token counts"""
+    return len(text.split()) + sum(map(text.count, _PUNCTUATION))
+
+
+class ClauseChunker:
+    """Split contract text at clause boundaries into chunks of at most ``max_tokens``.
+
+    Each numbered section, lettered subsection or recital becomes its own chunk,
+    with no overlap. Segments shorter than ``min_tokens`` (headings, lead-ins)
+    are merged into the following one, and segments over the cap are split at
+    sentence ends, then between words. Every step is a single pass over the
+    text, so the cost is linear in the document size.
+    """
+
+    def __init__(self, max_tokens: int = 256, min_tokens: int = 12, tokenizer=None,
+                 clean: Optional[Callable[[str], str]] = None):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        # Hugging Face tokenizer of the embedding model; counts are approximated without one
+        self.tokenizer = tokenizer
+        self.clean = clean or (lambda text: " ".join(text.split()))
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        if self.tokenizer is not None:
+            return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+        return [approximate_token_count(text) for text in texts]
+
+    def segments(self, text: str) -> List[str]:
+        """Cleaned clause-level segments in reading order"""
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        starts = {match.start() for match in _LINE_CLAUSE_START.finditer(text)}
+        starts.update(match.start() + 1 for match in _INLINE_SUBSECTION.finditer(text))
+        bounds = [0] + sorted(start for start in starts if start > 0) + [len(text)]
+        segments = (self.clean(text[begin:end]) for begin, end in zip(bounds, bounds[1:]))
+        return [segment for segment in segments if segment]
+
+    def split(self, text: str) -> List[str]:
+        segments = self.segments(text)
+        pieces, counts = self._cap(segments, self.count_tokens(segments))
+
+        chunks = []
+        buffer, buffer_tokens = [], 0
+        for piece, tokens in zip(pieces, counts):
+            if buffer and (buffer_tokens >= self.min_tokens or buffer_tokens + tokens > self.max_tokens):
+                chunks.append((" ".join(buffer), buffer_tokens))
+                buffer, buffer_tokens = [], 0
+            buffer.append(piece)
+            buffer_tokens += tokens
+        if buffer:
+            # A short trailing segment (signature line, closing recital) joins the last chunk when it fits
+            if chunks and buffer_tokens < self.min_tokens and chunks[-1][1] + buffer_tokens <= self.max_tokens:
+                chunks[-1] = (f"{chunks[-1][0]} {' '.join(buffer)}", chunks[-1][1] + buffer_tokens)
+            else:
+                chunks.append((" ".join(buffer), buffer_tokens))
+
+        return [chunk for chunk, _ in chunks]
+
+    def _cap(self, segments: List[str], counts: List[int]):
+        """Split segments over ``max_tokens`` at sentence ends, then between words"""
+        pieces, piece_counts = [], []
+        for segment, tokens in zip(segments, counts):
+            if tokens <= self.max_tokens:
+                pieces.append(segment)
+                piece_counts.append(tokens)
+                continue
+            sentences = _SENTENCE_END.split(segment)
+            for unit, unit_tokens in self._pack(sentences, self.count_tokens(sentences)):
+                if unit_tokens <= self.max_tokens:
+                    pieces.append(unit)
+                    piece_counts.append(unit_tokens)
+                else:
+                    words = unit.split()
+                    for window, window_tokens in self._pack(words, self.count_tokens(words)):
+                        pieces.append(window)
+                        piece_counts.append(window_tokens)
+        return pieces, piece_counts
+
+    def _pack(self, units: List[str], counts: List[int]):
+        """Greedily join consecutive units while they fit; oversized units are yielded alone"""
+        buffer, buffer_tokens = [], 0
+        for unit, tokens in zip(units, counts):
+            if buffer and buffer_tokens + tokens > self.max_tokens:
+                yield " ".join(buffer), buffer_tokens
+                buffer, buffer_tokens = [], 0
+            buffer.append(unit)
+            buffer_tokens += tokens
+        if buffer:
+            yield " ".join(buffer), buffer_tokens
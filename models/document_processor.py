@@ -1,74 +1,75 @@
 import PyPDF2
 import io
+import os
 from typing import List, Dict
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 import re
 
+from .clause_chunker import ClauseChunker
+from .metrics import track_stage
+
+# Everything except word characters, whitespace and basic punctuation is dropped by clean_text
+_DISALLOWED_CHARS = re.compile(r"[^\w\s.,;:!?()-]+")
+
+LEGAL_KEYWORDS = (
+    "shall", "agree", "covenant", "warrant", "represent", "obligation",
+    "liability", "indemnify", "terminate", "breach", "default", "penalty",
+    "damages", "force majeure", "confidential", "proprietary", "intellectual property",
+    "governing law", "jurisdiction", "arbitration", "dispute", "remedy"
+)
+_MIN_CLAUSE_WORDS = 10
+
+
+def mentions_legal_keyword(text: str) -> bool:
+    """Substring test against LEGAL_KEYWORDS, stopping at the first hit"""
+    # Plain `in` scans on one lowercased copy beat a compiled alternation, which re tries branch by branch at every position
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in LEGAL_KEYWORDS)
+
 class DocumentProcessor:
-    def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
+    def __init__(self, tokenizer=None, max_tokens: int = None):
+        # Chunks are capped at the embedding model's sequence length (in its own tokens when a tokenizer is given)
+        max_tokens = int(os.getenv("CHUNK_MAX_TOKENS", max_tokens or 256))
+        self.text_splitter = ClauseChunker(max_tokens=max_tokens, tokenizer=tokenizer, clean=self.clean_text)
     
     def extract_text_from_pdf(self, pdf_content: bytes) -> str:
         """Extract text from PDF bytes"""
         try:
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            with track_stage("pdf_extraction"):
+                pdf_file = io.BytesIO(pdf_content)
+                pdf_reader = PyPDF2.PdfReader(pdf_file)
+                
+                text = ""
+                for page in pdf_reader.pages:
+                    text += page.extract_text() + "\n"
             
             return text.strip()
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
     def clean_text(self, text: str) -> str:
-        """Clean and normalize text"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,;:!?()-]', '', text)
-        return text.strip()
+        """Clean and normalize text: drop special characters, collapse and trim whitespace"""
+        return " ".join(_DISALLOWED_CHARS.sub("", text).split())
     
     def chunk_text(self, text: str) -> List[Dict]:
-        """Split text into semantic chunks with metadata"""
-        cleaned_text = self.clean_text(text)
-        chunks = self.text_splitter.split_text(cleaned_text)
-        
-        chunk_data = []
-        for i, chunk in enumerate(chunks):
-            # Identify potential clauses (sentences with legal keywords)
-            is_clause = self._is_potential_clause(chunk)
+        """Split text into clause-level chunks with metadata (boundaries are found before cleaning)"""
+        with track_stage("chunking"):
+            chunks = self.text_splitter.split(text)
             
-            chunk_data.append({
-                "chunk_id": i,
-                "text": chunk,
-                "is_clause": is_clause,
-                "word_count": len(chunk.split()),
-                "char_count": len(chunk)
-            })
+            chunk_data = []
+            for i, chunk in enumerate(chunks):
+                # Chunks come out of clean_text, so words are separated by exactly one space
+                word_count = chunk.count(" ") + 1 if chunk else 0
+                
+                chunk_data.append({
+                    "chunk_id": i,
+                    "text": chunk,
+                    "is_clause": word_count >= _MIN_CLAUSE_WORDS and mentions_legal_keyword(chunk),
+                    "word_count": word_count,
+                    "char_count": len(chunk)
+                })
         
         return chunk_data
     
-    def _is_potential_clause(self, text: str) -> bool:
-        """Identify if text chunk is likely a contract clause"""
-        legal_keywords = [
-            "shall", "agree", "covenant", "warrant", "represent", "obligation",
-            "liability", "indemnify", "terminate", "breach", "default", "penalty",
-            "damages", "force majeure", "confidential", "proprietary", "intellectual property",
-            "governing law", "jurisdiction", "arbitration", "dispute", "remedy"
-        ]
-        
-        text_lower = text.lower()
-        keyword_count = sum(1 for keyword in legal_keywords if keyword in text_lower)
-        
-        # Consider it a clause if it has legal keywords and reasonable length
-        return keyword_count >= 1 and len(text.split()) >= 10
-    
     def process_document(self, pdf_content: bytes, filename: str) -> Dict:
         """Main processing pipeline"""
         try:
@@ -0,0 +1,216 @@
+from typing import Dict, List, Any, Optional
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # optional; the standard json module is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    total_chunks INTEGER,
+    total_clauses INTEGER,
+    word_count INTEGER,
+    previous_doc_id TEXT,
+    created_at REAL NOT NULL,
+    workspace TEXT NOT NULL DEFAULT 'default'
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    doc_id TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    is_clause INTEGER NOT NULL,
+    word_count INTEGER,
+    PRIMARY KEY (doc_id, chunk_id)
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    doc_id TEXT NOT NULL,
+    config_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    result TEXT NOT NULL,
+    redlined_html TEXT,
+    fields TEXT,
+    PRIMARY KEY (doc_id, config_version)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_created ON documents (created_at);
+"""
+
+# Applied after _SCHEMA so stores created before workspaces existed are upgraded in place
+_WORKSPACE_INDEX = "CREATE INDEX IF NOT EXISTS idx_documents_workspace ON documents (workspace, created_at)"
+
+
+class DocumentStore:
+    """SQLite registry of uploaded documents, their chunks and analysis results"""
+
+    def __init__(self, path: str = "./redlining.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+            columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(documents)")}
+            if "workspace" not in columns:
+                self._connection.execute("ALTER TABLE documents ADD COLUMN workspace TEXT NOT NULL DEFAULT 'default'")
+            self._connection.execute(_WORKSPACE_INDEX)
+            columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(analyses)")}
+            for column in ("redlined_html", "fields"):
+                if column not in columns:
+                    self._connection.execute(f"ALTER TABLE analyses ADD COLUMN {column} TEXT")
+        logger.info(f"Document store ready at {path}")
+
+    def add_document(self, metadata: Dict[str, Any], chunks: List[Dict]):
+        """Register an uploaded document and its chunks"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO documents
+                    (doc_id, filename, total_chunks, total_clauses, word_count, previous_doc_id, created_at, workspace)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    metadata["doc_id"], metadata["filename"], metadata.get("total_chunks"),
+                    metadata.get("total_clauses"), metadata.get("word_count"),
+                    metadata.get("previous_doc_id"), time.time(), metadata.get("workspace", "default")
+                )
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)",
+                [
+                    (metadata["doc_id"], chunk["chunk_id"], chunk["text"], int(chunk["is_clause"]), chunk.get("word_count"))
+                    for chunk in chunks
+                ]
+            )
+
+    def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_documents(self, limit: int = 50, offset: int = 0, workspace: str = "default") -> List[Dict[str, Any]]:
+        """A workspace's documents, newest first, with the config versions they have been analyzed under"""
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT d.*, GROUP_CONCAT(a.config_version) AS analyzed_versions
+                FROM documents d LEFT JOIN analyses a ON a.doc_id = d.doc_id
+                WHERE d.workspace = ?
+                GROUP BY d.doc_id
+                ORDER BY d.created_at DESC
+                LIMIT ? OFFSET ?
+                """,
+                (workspace, limit, offset)
+            ).fetchall()
+        documents = []
+        for row in rows:
+            document = dict(row)
+            versions = document.pop("analyzed_versions")
+            document["analyzed_versions"] = versions.split(",") if versions else []
+            documents.append(document)
+        return documents
+
+    def count_documents(self, workspace: str = "default") -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM documents WHERE workspace = ?", (workspace,)).fetchone()[0]
+
+    def get_chunks(self, doc_id: str, clauses_only: bool = True) -> List[Dict[str, Any]]:
+        """A document's chunks in reading order"""
+        query = "SELECT chunk_id, text, is_clause, word_count FROM chunks WHERE doc_id = ?"
+        if clauses_only:
+            query += " AND is_clause = 1"
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY chunk_id", (doc_id,)).fetchall()
+        return [{**dict(row), "is_clause": bool(row["is_clause"])} for row in rows]
+
+    def save_analysis(self, doc_id: str, config_version: str, result: Dict[str, Any],
+                      redlined_html: Optional[str] = None, fields: Optional[List[str]] = None) -> str:
+        """Store an analysis result and, separately, its redlined HTML; returns the serialized JSON so callers can reuse it.
+        
+        ``fields`` lists the classification fields the result holds (None means all of them).
+        """
+        payload = _dumps(result)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO analyses (doc_id, config_version, created_at, result, redlined_html, fields)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (doc_id, config_version, time.time(), payload, redlined_html, ",".join(fields) if fields else None)
+            )
+        return payload
+
+    def save_redlined_html(self, doc_id: str, config_version: str, redlined_html: str):
+        """Attach HTML rendered later to a stored analysis"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE analyses SET redlined_html = ? WHERE doc_id = ? AND config_version = ?",
+                (redlined_html, doc_id, config_version)
+            )
+
+    def get_analysis_record(self, doc_id: str, config_version: str) -> Optional[Dict[str, Any]]:
+        """Stored analysis JSON text with its redlined HTML and classification fields (None when all)"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT result, redlined_html, fields FROM analyses WHERE doc_id = ? AND config_version = ?",
+                (doc_id, config_version)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "result": row["result"],
+            "redlined_html": row["redlined_html"],
+            "fields": row["fields"].split(",") if row["fields"] else None
+        }
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Remove a document with its chunks and analyses; False if it was unknown"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM analyses WHERE doc_id = ?", (doc_id,))
+            self._connection.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+            deleted = self._connection.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,)).rowcount
+        return deleted > 0
+
+    def expired_documents(self, max_age_seconds: float = 0, max_documents: int = 0) -> List[str]:
+        """Documents outside the retention policy: older than max_age_seconds or beyond the newest
+        max_documents of their workspace"""
+        expired = set()
+        with self._lock:
+            if max_age_seconds > 0:
+                rows = self._connection.execute(
+                    "SELECT doc_id FROM documents WHERE created_at < ?",
+                    (time.time() - max_age_seconds,)
+                ).fetchall()
+                expired.update(row["doc_id"] for row in rows)
+            if max_documents > 0:
+                rows = self._connection.execute(
+                    """
+                    SELECT doc_id FROM (
+                        SELECT doc_id, ROW_NUMBER() OVER (PARTITION BY workspace ORDER BY created_at DESC) AS rank
+                        FROM documents
+                    ) WHERE rank > ?
+                    """,
+                    (max_documents,)
+                ).fetchall()
+                expired.update(row["doc_id"] for row in rows)
+        return sorted(expired)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _dumps(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(value)
+
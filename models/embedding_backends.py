@@ -0,0 +1,167 @@
+from pathlib import Path
+from typing import List, Union
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class OnnxEmbeddingModel:
+    """all-MiniLM-L6-v2 exported to ONNX and served by ONNX Runtime on CPU.
+
+    Mirrors the SentenceTransformer pipeline (transformer, mean pooling,
+    L2 normalisation) and its ``encode`` signature so it can be swapped in
+    wherever the torch model is used.
+    """
+
+    def __init__(self, model_name: str = f"sentence-transformers/{EMBEDDING_MODEL_NAME}",
+                 cache_dir: str = "./onnx_models", quantize: bool = False,
+                 max_seq_length: int = 256, num_threads: int = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.cache_dir = Path(cache_dir)
+        self.quantize = quantize
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        model_path = self._ensure_exported()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        logger.info(f"ONNX embedding model ready: {model_path.name}")
+
+    def _ensure_exported(self) -> Path:
+        """Export (and optionally quantize) the transformer once, reusing cached graphs afterwards"""
+        model_dir = self.cache_dir / self.model_name.replace("/", "__")
+        model_dir.mkdir(parents=True, exist_ok=True)
+        fp32_path = model_dir / "model.onnx"
+        int8_path = model_dir / "model.int8.onnx"
+
+        if not fp32_path.exists():
+            import torch
+            from transformers import AutoModel
+
+            logger.info(f"Exporting {self.model_name} to ONNX...")
+            model = AutoModel.from_pretrained(self.model_name)
+            model.eval()
+
+            dummy = self.tokenizer(["export sample"], return_tensors="pt")
+            input_names = ["input_ids", "attention_mask", "token_type_ids"]
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+                    str(fp32_path),
+                    input_names=input_names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=17
+                )
+
+        if not self.quantize:
+            return fp32_path
+
+        if not int8_path.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info("Applying dynamic int8 quantization to ONNX graph...")
+            quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+        return int8_path
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        """Encode sentences, batching by token length so each batch pads to a similar size"""
+        single_input = isinstance(sentences, str)
+        if single_input:
+            sentences = [sentences]
+
+        if not sentences:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        encoded = self.tokenizer(
+            list(sentences),
+            truncation=True,
+            max_length=self.max_seq_length,
+            padding=False
+        )
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        order = np.argsort(lengths, kind="stable")
+
+        embeddings = [None] * len(sentences)
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            width = max(lengths[i] for i in bucket)
+
+            input_ids = np.zeros((len(bucket), width), dtype=np.int64)
+            attention_mask = np.zeros((len(bucket), width), dtype=np.int64)
+            for row, index in enumerate(bucket):
+                ids = encoded["input_ids"][index]
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+            # Mean pooling over real tokens, as in the SentenceTransformer Pooling module
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            for row, index in enumerate(bucket):
+                embeddings[index] = pooled[row]
+
+        result = np.stack(embeddings).astype(np.float32)
+        return result[0] if single_input else result
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+
+def get_embedding_model(backend: str = None):
+    """Create the sentence embedding model for the configured backend.
+
+    ``backend`` (or the ``EMBEDDING_BACKEND`` environment variable) selects
+    ``torch`` (SentenceTransformer, default), ``onnx`` or ``onnx-int8``.
+    ONNX backends fall back to torch if they cannot be initialised; the
+    returned model's ``embedding_backend`` names the backend actually loaded.
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+
+    if backend not in EMBEDDING_BACKENDS:
+        logger.warning(f"Unknown embedding backend '{backend}', using torch")
+        backend = "torch"
+
+    if backend.startswith("onnx"):
+        try:
+            model = OnnxEmbeddingModel(quantize=backend == "onnx-int8")
+            model.embedding_backend = backend
+            return model
+        except Exception as e:
+            logger.warning(f"Could not initialize ONNX embedding backend: {str(e)}")
+            logger.info("Falling back to SentenceTransformer embeddings...")
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    model.embedding_backend = "torch"
+    return model
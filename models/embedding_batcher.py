@@ -0,0 +1,142 @@
+from concurrent.futures import Future
+from functools import partial
+from typing import List, Union
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Micro-batching front end for an embedding model.
+
+    Concurrent ``encode`` calls are queued, merged into one batch sorted by
+    token length, encoded together and fanned back out through futures.
+    The collection window only opens when requests are already arriving
+    concurrently, so a lone request on an idle server is encoded at once.
+    """
+
+    def __init__(self, model, max_wait_ms: float = 5.0, max_batch_size: int = 64):
+        self.model = model
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._last_batch_requests = 0
+        self._closed = False
+        self._start()
+        # Threads do not survive fork(); a batcher inherited by a pre-forked worker starts its own
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=partial(_restart_in_child, weakref.ref(self)))
+    
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        # Delegate everything else (tokenizer, dimension helpers, ...) to the wrapped model
+        return getattr(self.model, name)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Encode sentences, sharing a batch with any concurrent callers"""
+        single_input = isinstance(sentences, str)
+        texts = [sentences] if single_input else list(sentences)
+
+        # Bulk ingest is already well batched; only small interactive requests are merged
+        if self._closed or not texts or len(texts) >= self.max_batch_size or kwargs:
+            return self.model.encode(sentences, batch_size=batch_size, **kwargs)
+
+        future = Future()
+        self._queue.put((texts, future))
+        embeddings = future.result()
+        return embeddings[0] if single_input else embeddings
+
+    def close(self):
+        """Stop the batching thread; later calls go straight to the model"""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            size = len(first[0])
+
+            if self._queue.qsize() > 0 or self._last_batch_requests > 1:
+                # Under concurrency: hold the batch open for the configured window
+                deadline = time.monotonic() + self.max_wait
+                while size < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self._queue.put(None)
+                        break
+                    batch.append(item)
+                    size += len(item[0])
+            else:
+                # Idle: take only what is already waiting, never sleep
+                while size < self.max_batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self._queue.put(None)
+                        break
+                    batch.append(item)
+                    size += len(item[0])
+
+            self._last_batch_requests = len(batch)
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch):
+        texts = [text for texts, _ in batch for text in texts]
+
+        try:
+            # Group by token length so padding within the batch stays minimal
+            tokenizer = getattr(self.model, "tokenizer", None)
+            if tokenizer is not None:
+                lengths = [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+            else:
+                lengths = [len(text) for text in texts]
+            order = np.argsort(lengths, kind="stable")
+
+            sorted_embeddings = self.model.encode([texts[i] for i in order], batch_size=self.max_batch_size)
+            embeddings = np.empty_like(sorted_embeddings)
+            embeddings[order] = sorted_embeddings
+        except Exception as e:
+            logger.error(f"Error encoding embedding batch: {str(e)}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for texts, future in batch:
+            future.set_result(embeddings[offset:offset + len(texts)])
+            offset += len(texts)
+
+
+def _restart_in_child(batcher_ref):
+    batcher = batcher_ref()
+    if batcher is not None and not batcher._closed:
+        batcher._queue = queue.Queue()
+        batcher._last_batch_requests = 0
+        batcher._start()
@@ -0,0 +1,171 @@
+from typing import Any, Dict, List, Optional
+
+# Prose rendered from a classification's "facts" (see explanation_facts) only when a
+# caller asks for it, so bulk consumers of risk_level/confidence never pay for strings.
+
+RISK_HEADLINES = {
+    "RED": "⚠️ HIGH RISK: This clause poses significant legal or financial risks.",
+    "AMBER": "⚡ MEDIUM RISK: This clause requires careful consideration and review.",
+    "GREEN": "✅ LOW RISK: This clause appears to be standard and acceptable."
+}
+
+RULE_EXPLANATIONS = {
+    "RED": "High-risk terms detected: {keywords}. Requires immediate legal review and negotiation.",
+    "AMBER": "Medium-risk terms identified: {keywords}. Careful review and potential modification recommended.",
+    "GREEN": "Standard terms found: {keywords}. Generally acceptable with minimal risk."
+}
+
+REASONING_HEADLINES = {
+    "RED": "⚠️ **HIGH RISK**: This clause creates significant legal or financial exposure",
+    "AMBER": "⚡ **MEDIUM RISK**: This clause requires careful legal consideration",
+    "GREEN": "✅ **LOW RISK**: This clause appears to follow standard practices"
+}
+
+BASE_RECOMMENDATIONS = {
+    "RED": (
+        "🔍 **Immediate legal review required**",
+        "💼 Consider negotiating alternative terms",
+        "⚖️ Assess potential financial exposure",
+        "📋 Document all risk factors"
+    ),
+    "AMBER": (
+        "📖 **Careful review recommended**",
+        "🔄 Consider clarifying ambiguous language",
+        "💭 Understand full implications",
+        "⏰ Set appropriate timelines"
+    ),
+    "GREEN": (
+        "✓ **Standard clause - generally acceptable**",
+        "👀 Quick consistency check recommended",
+        "📝 Ensure alignment with business terms"
+    )
+}
+
+# (concern, terms that raise it) and (topic, recommendation) checked against the clause text
+LEGAL_CONCERNS = (
+    ("Unlimited liability exposure", ("unlimited", "personal guarantee", "joint and several")),
+    ("Indemnification obligations", ("indemnify", "hold harmless")),
+    ("Business operation restrictions", ("non-compete", "restraint", "exclusivity")),
+    ("Unbalanced termination rights", ("termination for convenience", "unilateral"))
+)
+TOPIC_RECOMMENDATIONS = (
+    ("liability", "💰 **Liability Focus**: Consider liability caps and insurance requirements"),
+    ("termination", "📅 **Termination Review**: Ensure balanced notice periods and conditions"),
+    ("confidential", "🔒 **Confidentiality**: Verify scope and duration are reasonable")
+)
+MAX_RECOMMENDATIONS = 6
+
+
+def _most_common(counts: Dict[str, int]) -> str:
+    """Key with the highest count; ties go to the first seen so rendering is deterministic"""
+    return max(counts, key=counts.get)
+
+
+def precedent_facts(precedents: List[Dict]) -> Optional[Dict[str, Any]]:
+    """Count, similarity and risk/domain consensus of retrieved precedents in one pass (None without precedents)"""
+    if not precedents:
+        return None
+    risks, domains = {}, {}
+    total_similarity, best_similarity = 0.0, 0.0
+    for precedent in precedents:
+        metadata = precedent["metadata"]
+        risk = metadata.get("risk_level", "GREEN")
+        domain = metadata.get("contract_domain", "general")
+        risks[risk] = risks.get(risk, 0) + 1
+        domains[domain] = domains.get(domain, 0) + 1
+        similarity = precedent.get("similarity", 0)
+        total_similarity += similarity
+        best_similarity = max(best_similarity, similarity)
+    consensus_risk = _most_common(risks)
+    return {
+        "count": len(precedents),
+        "average_similarity": total_similarity / len(precedents),
+        "best_similarity": best_similarity,
+        "risk_counts": risks,
+        "consensus_risk": consensus_risk,
+        "consensus_pct": risks[consensus_risk] / len(precedents) * 100,
+        "dominant_domain": _most_common(domains)
+    }
+
+
+def explanation_facts(clause_text: str, rule_based: Dict, rag_based: Dict, precedents: List[Dict]) -> Dict[str, Any]:
+    """Structured inputs of a clause's explanation, reasoning and recommendations"""
+    clause_lower = clause_text.lower()
+    model_note = rag_based.get("explanation", "")
+    return {
+        "matched_keywords": (rule_based.get("matched_keywords") or [])[:3],
+        "precedents": precedent_facts(precedents),
+        "concerns": [concern for concern, terms in LEGAL_CONCERNS if any(term in clause_lower for term in terms)],
+        "topics": [topic for topic, _ in TOPIC_RECOMMENDATIONS if topic in clause_lower],
+        "model_note": model_note[:100] if model_note and len(model_note) > 20 else None
+    }
+
+
+def render_explanation(risk_level: str, facts: Dict[str, Any]) -> str:
+    """One-paragraph summary: risk headline, detected keywords, precedent support and the model's note"""
+    explanation = RISK_HEADLINES[risk_level]
+    if facts["matched_keywords"]:
+        explanation += f" Keywords detected: {', '.join(facts['matched_keywords'])}."
+    precedents = facts["precedents"]
+    if precedents:
+        explanation += f" Based on {precedents['count']} legal precedents (avg. similarity: {precedents['average_similarity']:.1%})."
+    if facts["model_note"]:
+        explanation += f" AI analysis: {facts['model_note']}..."
+    return explanation
+
+
+def render_rule_explanation(rule_based: Dict[str, Any]) -> str:
+    """Explanation of a rule-based result, from its risk level and matched keywords"""
+    matched_keywords = rule_based.get("matched_keywords")
+    if not matched_keywords:
+        return "No specific risk indicators found in standard keyword analysis."
+    template = RULE_EXPLANATIONS.get(rule_based["risk_level"])
+    if template is None:
+        return "Standard contractual language."
+    return template.format(keywords=", ".join(matched_keywords[:3]))  # Show top 3 keywords
+
+
+def render_legal_reasoning(risk_level: str, facts: Dict[str, Any]) -> str:
+    """Detailed legal reasoning based on precedent consensus and the concerns found in the clause"""
+    reasoning_parts = [REASONING_HEADLINES[risk_level]]
+    precedents = facts["precedents"]
+    if precedents:
+        reasoning_parts.append(f"**Legal Precedent Analysis**: {precedents['count']} similar clauses analyzed")
+        reasoning_parts.append(f"• {precedents['consensus_pct']:.0f}% of similar clauses are classified as {precedents['consensus_risk']} risk")
+        reasoning_parts.append(f"• Most common context: {precedents['dominant_domain']} contracts")
+        if precedents["best_similarity"] > 0.8:
+            reasoning_parts.append(f"• **Strong precedent match** (similarity: {precedents['best_similarity']:.1%})")
+    if facts["concerns"]:
+        reasoning_parts.append(f"**Key Legal Concerns**: {', '.join(facts['concerns'])}")
+    return " • ".join(reasoning_parts)
+
+
+def render_recommendations(risk_level: str, facts: Dict[str, Any]) -> List[str]:
+    """Risk-level recommendations plus precedent and topic specific ones (at most MAX_RECOMMENDATIONS)"""
+    recommendations = list(BASE_RECOMMENDATIONS.get(risk_level, ()))
+    precedents = facts["precedents"]
+    if precedents:
+        if precedents["dominant_domain"] != "general":
+            recommendations.append(f"📊 **Industry insight**: Consider {precedents['dominant_domain']} industry standards")
+        if precedents["risk_counts"].get("RED") and risk_level != "RED":
+            recommendations.append("⚠️ **Warning**: Similar clauses have been flagged as high-risk elsewhere")
+    topics = set(facts["topics"])
+    recommendations.extend(text for topic, text in TOPIC_RECOMMENDATIONS if topic in topics)
+    return recommendations[:MAX_RECOMMENDATIONS]
+
+
+RENDERERS = {
+    "explanation": render_explanation,
+    "legal_reasoning": render_legal_reasoning,
+    "recommendations": render_recommendations
+}
+
+
+def render_field(name: str, classification: Dict[str, Any]) -> Any:
+    """Prose field ``name`` of a classification, stored or rendered from its facts (None when neither exists)"""
+    if name in classification:
+        return classification[name]
+    facts = classification.get("facts")
+    if facts is None:
+        return None
+    return RENDERERS[name](classification["risk_level"], facts)
@@ -0,0 +1,311 @@
+import math
+import re
+import threading
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .metrics import track_stage
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Very common function words carry no ranking signal but dominate postings size
+_STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "of", "on", "or", "such", "that", "the", "this", "to", "with"
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into index terms"""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists into one ranking using reciprocal-rank fusion"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Incremental in-memory BM25 inverted index with compact array-backed postings"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, compact_ratio: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        # Removed documents are tombstoned and reclaimed once they exceed this share of positions
+        self.compact_ratio = compact_ratio
+        # term -> (document positions, term frequencies); positions are appended in
+        # increasing order so each postings list stays sorted without re-sorting
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._doc_lengths = array("I")
+        self._alive = array("B")
+        self._positions: Dict[str, int] = {}
+        self._total_length = 0
+        self._tombstones = 0
+        # add/remove/compact mutate several structures that must agree; search snapshots them under it
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def tombstones(self) -> int:
+        """Removed documents still occupying postings until the next compaction"""
+        return self._tombstones
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+        """Add documents to the index, skipping ids that are already indexed"""
+        metadatas = metadatas or [{} for _ in ids]
+
+        with self._lock:
+            self._add(ids, texts, metadatas)
+
+    def _add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            if doc_id in self._positions:
+                continue
+
+            position = len(self._doc_ids)
+            terms = tokenize(text)
+
+            term_counts: Dict[str, int] = {}
+            for term in terms:
+                term_counts[term] = term_counts.get(term, 0) + 1
+
+            for term, count in term_counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = (array("I"), array("H"))
+                    self._postings[term] = postings
+                postings[0].append(position)
+                postings[1].append(min(count, 65535))
+
+            self._positions[doc_id] = position
+            self._doc_ids.append(doc_id)
+            self._metadatas.append(dict(metadata or {}))
+            self._doc_lengths.append(len(terms))
+            self._alive.append(1)
+            self._total_length += len(terms)
+
+    def remove(self, ids: List[str]) -> int:
+        """Tombstone documents by id; compacts automatically past ``compact_ratio``"""
+        removed = 0
+        with self._lock:
+            for doc_id in ids:
+                position = self._positions.pop(doc_id, None)
+                if position is None:
+                    continue
+                self._alive[position] = 0
+                self._total_length -= self._doc_lengths[position]
+                removed += 1
+
+            self._tombstones += removed
+            if self._doc_ids and self._tombstones > self.compact_ratio * len(self._doc_ids):
+                self.compact()
+        return removed
+
+    def ids_with_prefix(self, prefix: str) -> List[str]:
+        with self._lock:
+            return [doc_id for doc_id in self._positions if doc_id.startswith(prefix)]
+
+    def compact(self):
+        """Drop tombstoned documents from postings and renumber positions"""
+        with self._lock:
+            if self._tombstones:
+                self._compact()
+
+    def _compact(self):
+
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool) if len(self._alive) else np.zeros(0, bool)
+        new_positions = np.cumsum(alive, dtype=np.int64) - 1
+
+        postings = {}
+        for term, (positions, frequencies) in self._postings.items():
+            positions = np.array(positions, dtype=np.int64)
+            keep = alive[positions]
+            if not keep.any():
+                continue
+            postings[term] = (
+                array("I", new_positions[positions[keep]].astype(np.uint32).tobytes()),
+                array("H", np.array(frequencies, dtype=np.uint16)[keep].tobytes())
+            )
+
+        kept = np.flatnonzero(alive)
+        doc_ids = [self._doc_ids[i] for i in kept]
+        self._metadatas = [self._metadatas[i] for i in kept]
+        self._doc_lengths = array("I", np.array(self._doc_lengths, dtype=np.uint32)[kept].tobytes())
+        self._alive = array("B", bytes([1]) * len(kept))
+        self._positions = {doc_id: position for position, doc_id in enumerate(doc_ids)}
+        self._doc_ids = doc_ids
+        self._postings = postings
+        self._tombstones = 0
+
+    def search(self, query: str, n_results: int = 10, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """Return the top (id, score) pairs for a query, optionally filtered by metadata equality"""
+        if n_results <= 0:
+            return []
+
+        # A consistent snapshot, copied under the lock (memcpys of the touched arrays); scoring runs
+        # outside it. compact() swaps in new lists rather than mutating these, so the references stay valid
+        terms = set(tokenize(query))
+        with self._lock:
+            total_docs = len(self._positions)
+            if total_docs == 0:
+                return []
+            total_positions = len(self._doc_ids)
+            doc_ids = self._doc_ids
+            metadatas = self._metadatas
+            total_length = self._total_length
+            doc_lengths = np.array(self._doc_lengths, dtype=np.float32)
+            alive = np.array(self._alive, dtype=np.uint8) if self._tombstones else None
+            postings = [
+                (np.array(entry[0], dtype=np.int64), np.array(entry[1], dtype=np.float32))
+                for entry in (self._postings.get(term) for term in terms)
+                if entry is not None
+            ]
+
+        avg_length = total_length / total_docs
+        k1 = self.k1
+        if avg_length:
+            length_norm = k1 * (1 - self.b) + (k1 * self.b / avg_length) * doc_lengths
+        else:
+            length_norm = np.full(total_positions, k1, dtype=np.float32)
+
+        scores = np.zeros(total_positions, dtype=np.float32)
+        for positions, frequencies in postings:
+            # Tombstoned documents still count toward document frequency until compaction
+            doc_freq = len(positions)
+            idf = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+            # Positions are unique within a postings list, so fancy-index accumulation is exact
+            scores[positions] += idf * frequencies * (k1 + 1) / (frequencies + length_norm[positions])
+
+        if alive is not None:
+            scores *= alive
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) == 0:
+            return []
+
+        if not where and len(candidates) > n_results:
+            candidates = candidates[np.argpartition(-scores[candidates], n_results - 1)[:n_results]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        results = []
+        for position in candidates:
+            if where and not all(metadatas[position].get(key) == value for key, value in where.items()):
+                continue
+            results.append((doc_ids[position], float(scores[position])))
+            if len(results) >= n_results:
+                break
+
+        return results
+
+
+class HybridRetriever:
+    """Dense Chroma retrieval fused with BM25 lexical retrieval over the same collection"""
+
+    def __init__(self, collection, embedding_model, lexical_index: Optional[BM25Index] = None,
+                 rrf_k: int = 60, candidate_factor: int = 4):
+        self.collection = collection
+        self.embedding_model = embedding_model
+        self.lexical_index = lexical_index if lexical_index is not None else BM25Index()
+        self.rrf_k = rrf_k
+        self.candidate_factor = candidate_factor
+
+    def index_existing_documents(self, batch_size: int = 5000):
+        """Backfill the lexical index from documents already persisted in the collection"""
+        total = self.collection.count()
+        for offset in range(0, total, batch_size):
+            existing = self.collection.get(
+                include=["documents", "metadatas"],
+                limit=batch_size,
+                offset=offset
+            )
+            self.lexical_index.add(existing["ids"], existing["documents"], existing["metadatas"])
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+        """Index newly added collection documents lexically"""
+        self.lexical_index.add(ids, texts, metadatas)
+
+    def remove(self, ids: List[str]) -> int:
+        """Drop deleted collection documents from the lexical index"""
+        return self.lexical_index.remove(ids)
+
+    def dense_search(self, query: str, n_results: int, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Dense-only nearest neighbour search"""
+        with track_stage("embedding"):
+            query_embedding = self.embedding_model.encode([query]).tolist()
+        results = self._query(query_embedding, n_results, where)
+
+        return [
+            {
+                "text": results["documents"][0][i],
+                "metadata": results["metadatas"][0][i],
+                "distance": results["distances"][0][i],
+                "id": results["ids"][0][i]
+            }
+            for i in range(len(results["ids"][0]))
+        ]
+
+    def search(self, query: str, n_results: int, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Hybrid search: dense and BM25 candidates fused with reciprocal-rank fusion"""
+        candidates = max(n_results, n_results * self.candidate_factor)
+
+        with track_stage("embedding"):
+            query_embedding = self.embedding_model.encode([query]).tolist()
+        dense = self._query(query_embedding, candidates, where)
+        with track_stage("lexical_query"):
+            lexical = self.lexical_index.search(query, n_results=candidates, where=where)
+
+        fused = reciprocal_rank_fusion(
+            [dense["ids"][0], [doc_id for doc_id, _ in lexical]],
+            k=self.rrf_k
+        )[:n_results]
+
+        rows = {
+            doc_id: (dense["documents"][0][i], dense["metadatas"][0][i], dense["distances"][0][i])
+            for i, doc_id in enumerate(dense["ids"][0])
+        }
+
+        # Lexical-only hits have no dense distance yet; score them against the query embedding
+        missing = [doc_id for doc_id, _ in fused if doc_id not in rows]
+        if missing:
+            with track_stage("chroma_get"):
+                fetched = self.collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+            query_vector = np.asarray(query_embedding[0], dtype=np.float32)
+            query_norm = np.linalg.norm(query_vector) or 1.0
+            for i, doc_id in enumerate(fetched["ids"]):
+                vector = np.asarray(fetched["embeddings"][i], dtype=np.float32)
+                cosine = float(np.dot(query_vector, vector) / (query_norm * (np.linalg.norm(vector) or 1.0)))
+                rows[doc_id] = (fetched["documents"][i], fetched["metadatas"][i], 1 - cosine)
+
+        return [
+            {
+                "text": rows[doc_id][0],
+                "metadata": rows[doc_id][1],
+                "distance": rows[doc_id][2],
+                "id": doc_id,
+                "rrf_score": round(score, 6)
+            }
+            for doc_id, score in fused
+            if doc_id in rows
+        ]
+
+    def _query(self, query_embeddings: List[List[float]], n_results: int, where: Optional[Dict[str, Any]]):
+        kwargs = {"query_embeddings": query_embeddings, "n_results": n_results}
+        if where:
+            kwargs["where"] = where
+        with track_stage("chroma_query"):
+            return self.collection.query(**kwargs)
@@ -0,0 +1,500 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import tempfile
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from .embedding_backends import get_embedding_model
+from .embedding_batcher import EmbeddingBatcher
+from .llm_backends import LLMBackend, RISK_LABELS, create_llm_backend
+
+logger = logging.getLogger(__name__)
+
+# Out-of-process inference: the embedding model and the LLM run in one worker process
+# started by the app. Web processes talk to it over a Unix socket through the Remote*
+# proxies below, so a long generation holds the worker's GIL instead of the web server's.
+
+
+class InferenceUnavailable(RuntimeError):
+    """The inference worker is not running (starting, crashed or restarting)"""
+
+
+class InferenceBusy(InferenceUnavailable):
+    """The inference worker already has its maximum number of requests in flight"""
+
+
+class CallBatcher:
+    """Merges concurrent calls of a list-in, list-out function into one call.
+
+    Only calls with equal keyword arguments share a batch. Like EmbeddingBatcher,
+    the collection window only opens when calls are already arriving concurrently.
+    """
+
+    def __init__(self, function: Callable[..., List], max_wait_ms: float = 5.0, max_batch_size: int = 32,
+                 name: str = "call-batcher"):
+        self.function = function
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._held = []  # calls whose keyword arguments did not match the batch being collected
+        self._last_batch_requests = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __call__(self, items: List, **kwargs) -> List:
+        future = Future()
+        self._queue.put((list(items), kwargs, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            first = self._held.pop(0) if self._held else self._queue.get()
+            batch, size = [first], len(first[0])
+            waiting = self._held + [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+            self._held = []
+
+            for call in waiting:
+                if call[1] == first[1] and size + len(call[0]) <= self.max_batch_size:
+                    batch.append(call)
+                    size += len(call[0])
+                else:
+                    self._held.append(call)
+
+            if len(batch) > 1 or self._last_batch_requests > 1:
+                # Under concurrency: hold the batch open for the configured window
+                deadline = time.monotonic() + self.max_wait
+                while size < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        call = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if call[1] == first[1] and size + len(call[0]) <= self.max_batch_size:
+                        batch.append(call)
+                        size += len(call[0])
+                    else:
+                        self._held.append(call)
+
+            self._last_batch_requests = len(batch)
+            self._execute(batch)
+
+    def _execute(self, batch):
+        items = [item for call in batch for item in call[0]]
+        try:
+            results = self.function(items, **batch[0][1])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for call_items, _, future in batch:
+            future.set_result(results[offset:offset + len(call_items)])
+            offset += len(call_items)
+
+
+class _InferenceServer:
+    """Request handling inside the worker process"""
+
+    def __init__(self, embedding_model, llm_backend: Optional[LLMBackend], max_pending: int,
+                 batch_wait_ms: float, max_batch_size: int):
+        self.embedding_model = EmbeddingBatcher(embedding_model, max_wait_ms=batch_wait_ms)
+        self.llm_backend = llm_backend
+        if llm_backend is not None:
+            self._generate = CallBatcher(llm_backend.generate, batch_wait_ms, max_batch_size, name="generate-batcher")
+            self._score_labels = CallBatcher(
+                lambda prompts, labels, temperature: llm_backend.score_labels(prompts, labels, temperature),
+                batch_wait_ms, max_batch_size, name="score-batcher"
+            )
+        # Backpressure: at most max_pending requests are accepted at once, the rest are refused as busy
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix="inference")
+        self._prefix_lock = threading.Lock()
+
+    def info(self) -> Dict[str, Any]:
+        model = self.embedding_model.model
+        dimension = getattr(model, "get_sentence_embedding_dimension", None)
+        return {
+            "embedding": {
+                "dimension": dimension() if dimension else None,
+                "max_seq_length": getattr(model, "max_seq_length", None),
+                "tokenizer": getattr(model, "tokenizer", None) is not None,
+                "backend": getattr(model, "embedding_backend", None)
+            },
+            "llm": None if self.llm_backend is None else {
+                "name": self.llm_backend.name,
+                "model_name": getattr(self.llm_backend, "model_name", None)
+            }
+        }
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        return self.embedding_model.encode(sentences, batch_size=batch_size, **kwargs)
+
+    def tokenize(self, texts: Union[str, List[str]], add_special_tokens: bool = True) -> List:
+        return self.embedding_model.model.tokenizer(texts, add_special_tokens=add_special_tokens)["input_ids"]
+
+    def generate(self, prompts: List[str], max_new_tokens: int = 200, **kwargs) -> List[str]:
+        return self._generate(prompts, max_new_tokens=max_new_tokens, **kwargs)
+
+    def score_labels(self, prompts: List[str], labels: Sequence[str], temperature: float) -> List[Dict[str, float]]:
+        return self._score_labels(prompts, labels=tuple(labels), temperature=temperature)
+
+    def count_tokens(self, text: str) -> int:
+        return self.llm_backend.count_tokens(text)
+
+    def set_prompt_prefix(self, prefix: str):
+        # Every web process declares the same prefix; only a new one is prefilled again
+        with self._prefix_lock:
+            if self.llm_backend.prompt_prefix != prefix:
+                self.llm_backend.set_prompt_prefix(prefix)
+
+    OPERATIONS = ("info", "encode", "tokenize", "generate", "score_labels", "count_tokens", "set_prompt_prefix")
+
+    def handle(self, connection):
+        """Serve one client connection; requests run concurrently and are answered by id"""
+        send_lock = threading.Lock()
+
+        def reply(request_id, status, value):
+            try:
+                with send_lock:
+                    connection.send((request_id, status, value))
+            except (OSError, ValueError):
+                pass  # the client went away; its reader fails the pending calls
+
+        def run(request_id, operation, args, kwargs):
+            try:
+                reply(request_id, "ok", getattr(self, operation)(*args, **kwargs))
+            except Exception as e:
+                logger.error(f"Error in inference request {operation}: {str(e)}")
+                reply(request_id, "error", f"{type(e).__name__}: {str(e)}")
+            finally:
+                self._slots.release()
+
+        while True:
+            try:
+                request_id, operation, args, kwargs = connection.recv()
+            except (EOFError, OSError):
+                connection.close()
+                return
+            if operation == "ping":
+                # Answered by the connection thread, so a saturated worker still reports it is alive
+                reply(request_id, "ok", True)
+            elif operation not in self.OPERATIONS:
+                reply(request_id, "error", f"Unknown operation {operation}")
+            elif not self._slots.acquire(blocking=False):
+                reply(request_id, "busy", "Inference worker is at capacity")
+            else:
+                self._executor.submit(run, request_id, operation, args, kwargs)
+
+
+def _serve(address: str, authkey: bytes, load_embedding_model: Callable, load_llm_backend: Callable,
+           max_pending: int, batch_wait_ms: float, max_batch_size: int, ready):
+    """Entry point of the worker process: load the models, then accept connections until killed"""
+    logging.basicConfig(level=logging.INFO)
+    # Ctrl+C reaches the whole process group; the app stops this process itself on shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server = _InferenceServer(load_embedding_model(), load_llm_backend(), max_pending, batch_wait_ms, max_batch_size)
+    if server.llm_backend is not None:
+        logger.info(f"Inference worker LLM backend: {server.llm_backend.name}")
+
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    ready.set()
+    while True:
+        try:
+            connection = listener.accept()
+        except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+            logger.warning(f"⚠️ Rejected inference connection: {str(e)}")
+            continue
+        threading.Thread(target=server.handle, args=(connection,), name="inference-connection", daemon=True).start()
+
+
+class InferenceWorker:
+    """Starts the inference worker process, waits until its models are loaded and restarts it when it dies.
+
+    ``load_embedding_model`` and ``load_llm_backend`` run in the new process and
+    must be picklable (module-level functions or ``functools.partial``).
+    """
+
+    def __init__(self, address: str = None, load_embedding_model: Callable = get_embedding_model,
+                 load_llm_backend: Callable = create_llm_backend, max_pending: int = None,
+                 batch_wait_ms: float = None, max_batch_size: int = None, startup_timeout: float = None):
+        self.address = address or os.getenv("INFERENCE_SOCKET") or os.path.join(
+            tempfile.gettempdir(), f"redlining-inference-{os.getpid()}.sock"
+        )
+        self.authkey = os.urandom(16)
+        self.load_embedding_model = load_embedding_model
+        self.load_llm_backend = load_llm_backend
+        if max_pending is None:
+            max_pending = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+        self.max_pending = max_pending
+        if batch_wait_ms is None:
+            batch_wait_ms = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "5"))
+        self.batch_wait_ms = batch_wait_ms
+        if max_batch_size is None:
+            max_batch_size = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+        self.max_batch_size = max_batch_size
+        if startup_timeout is None:
+            startup_timeout = float(os.getenv("INFERENCE_STARTUP_TIMEOUT", "600"))
+        self.startup_timeout = startup_timeout
+        # spawn: the worker must not inherit the web process's threads, sockets or Chroma state
+        self._context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.restarts = 0
+        self._stopping = False
+        self._monitor = None
+
+    def start(self) -> "InferenceWorker":
+        """Start the worker and block until it accepts requests"""
+        self._launch()
+        self._monitor = threading.Thread(target=self._watch, name="inference-monitor", daemon=True)
+        self._monitor.start()
+        return self
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def _launch(self):
+        started = time.perf_counter()
+        ready = self._context.Event()
+        self.process = self._context.Process(
+            target=_serve, name="inference-worker", daemon=True,
+            args=(self.address, self.authkey, self.load_embedding_model, self.load_llm_backend,
+                  self.max_pending, self.batch_wait_ms, self.max_batch_size, ready)
+        )
+        self.process.start()
+
+        deadline = time.monotonic() + self.startup_timeout
+        while not ready.wait(0.1):
+            if not self.process.is_alive():
+                raise RuntimeError(f"Inference worker exited during startup (exit code {self.process.exitcode})")
+            if time.monotonic() > deadline:
+                self.process.kill()
+                raise RuntimeError(f"Inference worker did not start within {self.startup_timeout:.0f}s")
+        logger.info(f"✅ Inference worker {self.process.pid} ready in {time.perf_counter() - started:.1f}s")
+
+    def _watch(self):
+        while not self._stopping:
+            process = self.process
+            process.join()
+            if self._stopping:
+                return
+            logger.warning(f"⚠️ Inference worker {process.pid} exited with code {process.exitcode}; restarting")
+            self.restarts += 1
+            try:
+                self._launch()
+            except Exception as e:
+                logger.error(f"Error restarting inference worker: {str(e)}")
+                time.sleep(1.0)  # a worker that cannot start must not turn into a spawn loop
+
+    def stop(self):
+        self._stopping = True
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5.0)
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def client(self) -> "InferenceClient":
+        return InferenceClient(self.address, self.authkey)
+
+
+class InferenceClient:
+    """Connection to the inference worker shared by all threads of a process.
+
+    Requests carry ids and are multiplexed over one socket; a reader thread
+    resolves them. The connection is opened on first use, so pre-forked web
+    workers each open their own, and reopened after the worker restarts
+    (calls wait up to ``reconnect_timeout`` for it to come back).
+    """
+
+    def __init__(self, address: str, authkey: bytes, reconnect_timeout: float = None, request_timeout: float = None):
+        self.address = address
+        self.authkey = authkey
+        if reconnect_timeout is None:
+            reconnect_timeout = float(os.getenv("INFERENCE_RECONNECT_TIMEOUT", "30"))
+        self.reconnect_timeout = reconnect_timeout
+        self.request_timeout = request_timeout
+        self._ids = itertools.count()
+        self._reset()
+        # Sockets and reader threads do not survive fork(); a client inherited by a pre-forked worker reconnects
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=partial(_reset_in_child, weakref.ref(self)))
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pending = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def call(self, operation: str, *args, **kwargs) -> Any:
+        status, value = self._submit(operation, args, kwargs).result(timeout=self.request_timeout)
+        if status == "ok":
+            return value
+        if status == "busy":
+            raise InferenceBusy(value)
+        if status == "unavailable":
+            raise InferenceUnavailable(value)
+        raise RuntimeError(value)
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """Whether the worker answers within ``timeout`` (busy counts as alive); never waits for a restart"""
+        if not self._lock.acquire(timeout=timeout):
+            return False  # another caller is waiting for the worker to come back
+        try:
+            future = self._submit("ping", (), {}, reconnect_timeout=0.0, locked=True)
+        except InferenceUnavailable:
+            return False
+        finally:
+            self._lock.release()
+        try:
+            return future.result(timeout=timeout)[0] == "ok"
+        except TimeoutError:
+            return False
+
+    def _submit(self, operation: str, args: tuple, kwargs: Dict, reconnect_timeout: float = None,
+                locked: bool = False) -> Future:
+        future = Future()
+        if not locked:
+            self._lock.acquire()
+        try:
+            connection, pending = self._connect(self.reconnect_timeout if reconnect_timeout is None else reconnect_timeout)
+            request_id = next(self._ids)
+            pending[request_id] = future
+            try:
+                connection.send((request_id, operation, args, kwargs))
+            except (OSError, ValueError) as e:
+                pending.pop(request_id, None)
+                self._disconnect(connection, pending, e)
+                raise InferenceUnavailable(f"Inference worker connection lost: {str(e)}")
+        finally:
+            if not locked:
+                self._lock.release()
+        return future
+
+    def _connect(self, reconnect_timeout: float) -> Tuple[Any, Dict]:
+        if self._connection is not None:
+            return self._connection, self._pending
+
+        deadline = time.monotonic() + reconnect_timeout
+        while True:
+            try:
+                connection = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+                break
+            except (OSError, EOFError) as e:
+                if time.monotonic() > deadline:
+                    raise InferenceUnavailable(f"Inference worker unavailable at {self.address}: {str(e)}")
+                time.sleep(0.1)
+
+        self._connection, self._pending = connection, {}
+        threading.Thread(
+            target=self._read, args=(connection, self._pending), name="inference-client", daemon=True
+        ).start()
+        return self._connection, self._pending
+
+    def _read(self, connection, pending: Dict[int, Future]):
+        while True:
+            try:
+                request_id, status, value = connection.recv()
+            except (EOFError, OSError) as e:
+                self._disconnect(connection, pending, e)
+                return
+            future = pending.pop(request_id, None)
+            if future is not None:
+                future.set_result((status, value))
+
+    def _disconnect(self, connection, pending: Dict[int, Future], error: Exception):
+        if self._connection is connection:
+            self._connection = None
+        for request_id in list(pending):
+            future = pending.pop(request_id, None)
+            if future is not None:
+                future.set_result(("unavailable", f"Inference worker connection lost: {str(error) or 'closed'}"))
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+
+def _reset_in_child(client_ref):
+    client = client_ref()
+    if client is not None:
+        client._reset()
+
+
+class RemoteTokenizer:
+    """The worker's embedding tokenizer (batch calls returning input_ids only)"""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def __call__(self, texts: Union[str, List[str]], add_special_tokens: bool = True, **kwargs) -> Dict[str, List]:
+        return {"input_ids": self.client.call("tokenize", texts, add_special_tokens=add_special_tokens)}
+
+
+class RemoteEmbeddingModel:
+    """Embedding model proxy; encodes in the worker, batched there with every other caller"""
+
+    def __init__(self, client: InferenceClient, info: Dict[str, Any]):
+        self.client = client
+        self.max_seq_length = info["max_seq_length"]
+        self.tokenizer = RemoteTokenizer(client) if info["tokenizer"] else None
+        self._dimension = info["dimension"]
+        self.embedding_backend = info.get("backend")
+
+    @property
+    def queue_depth(self) -> int:
+        return self.client.in_flight
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        return self.client.call("encode", sentences, batch_size=batch_size, **kwargs)
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        return self._dimension
+
+
+class RemoteLLMBackend(LLMBackend):
+    """LLM backend proxy; reports the worker backend's name and model so analysis caches stay valid"""
+
+    def __init__(self, client: InferenceClient, info: Dict[str, Any]):
+        self.client = client
+        self.name = info["name"]
+        self.model_name = info["model_name"]
+
+    def set_prompt_prefix(self, prefix: str):
+        super().set_prompt_prefix(prefix)
+        self.client.call("set_prompt_prefix", prefix)
+
+    def generate(self, prompts: List[str], max_new_tokens: int = 200, **kwargs) -> List[str]:
+        return self.client.call("generate", list(prompts), max_new_tokens=max_new_tokens, **kwargs)
+
+    def score_labels(self, prompts: List[str], labels: Sequence[str] = RISK_LABELS,
+                     temperature: float = 1.0) -> List[Dict[str, float]]:
+        return self.client.call("score_labels", list(prompts), tuple(labels), temperature)
+
+    def count_tokens(self, text: str) -> int:
+        return self.client.call("count_tokens", text)
+
+
+def remote_models(client: InferenceClient) -> Tuple[RemoteEmbeddingModel, Optional[RemoteLLMBackend]]:
+    """Embedding model and LLM backend proxies for the models loaded in the worker"""
+    info = client.call("info")
+    llm_backend = RemoteLLMBackend(client, info["llm"]) if info["llm"] else None
+    return RemoteEmbeddingModel(client, info["embedding"]), llm_backend
@@ -0,0 +1,430 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Union
+import copy
+import logging
+import math
+import os
+import re
+import time
+from .metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+MISTRAL_MODEL = "mistralai/Mistral-7B-Instruct-v0.1"
+FALLBACK_MODEL = "microsoft/DialoGPT-medium"
+LLM_BACKENDS = ("transformers", "llamacpp", "stub", "none")
+RISK_LABELS = ("RED", "AMBER", "GREEN")
+
+
+def label_distribution(labels: Sequence[str], logprobs: Sequence[float], temperature: float = 1.0) -> Dict[str, float]:
+    """Temperature-scaled softmax over per-label log-probabilities"""
+    scaled = [logprob / temperature for logprob in logprobs]
+    peak = max(scaled)
+    weights = [math.exp(value - peak) for value in scaled]
+    total = sum(weights)
+    return {label: round(weight / total, 4) for label, weight in zip(labels, weights)}
+
+
+def fit_label_temperature(distributions: List[Dict[str, float]], true_labels: List[str]) -> float:
+    """Calibration temperature minimizing negative log-likelihood of held-out labels.
+
+    ``distributions`` are untempered (temperature 1.0) ``score_labels`` outputs;
+    use the result as ``LLM_LABEL_TEMPERATURE``.
+    """
+    best_temperature, best_nll = 1.0, float("inf")
+    for step in range(1, 101):
+        temperature = step / 20  # 0.05 .. 5.0
+        nll = 0.0
+        for distribution, true_label in zip(distributions, true_labels):
+            labels = list(distribution)
+            logprobs = [math.log(max(distribution[label], 1e-9)) for label in labels]
+            nll -= math.log(max(label_distribution(labels, logprobs, temperature)[true_label], 1e-9))
+        if nll < best_nll:
+            best_temperature, best_nll = temperature, nll
+    return best_temperature
+
+
+class LLMBackend:
+    """Text generation backend: a batch of prompts in, one completion per prompt out"""
+    name = "base"
+    prompt_prefix = None
+
+    def set_prompt_prefix(self, prefix: str):
+        """Declare a prefix shared by every prompt so its prefill can be reused"""
+        self.prompt_prefix = prefix
+
+    def generate(self, prompts: List[str], max_new_tokens: int = 200, **kwargs) -> List[str]:
+        raise NotImplementedError
+
+    def score_labels(self, prompts: List[str], labels: Sequence[str] = RISK_LABELS,
+                     temperature: float = 1.0) -> List[Dict[str, float]]:
+        """Probability of each label continuing each prompt.
+
+        Generic fallback: constrained decoding with a tiny token budget, so the
+        first label found in the completion gets all the mass (uniform if none).
+        """
+        distributions = []
+        for completion in self.generate(prompts, max_new_tokens=4):
+            found = [label for label in labels if label.lower() in completion.lower()]
+            if found:
+                distributions.append({label: 1.0 if label == found[0] else 0.0 for label in labels})
+            else:
+                distributions.append({label: round(1 / len(labels), 4) for label in labels})
+        return distributions
+    
+    def count_tokens(self, text: str) -> int:
+        """Approximate token count of generated text (for throughput metrics)"""
+        return len(text.split())
+
+
+class TransformersBackend(LLMBackend):
+    """Hugging Face transformers pipeline: Mistral-7B, falling back to DialoGPT-medium"""
+    name = "transformers"
+
+    def __init__(self, model_name: str = MISTRAL_MODEL, fallback_model: str = FALLBACK_MODEL,
+                 batch_size: int = 4):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+
+        self.batch_size = batch_size
+        logger.info("Initializing MISTRAL-7B model...")
+
+        try:
+            # Try to load Mistral model
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model = AutoModelForCausalLM.from_pretrained(
+                model_name,
+                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+                device_map="auto" if torch.cuda.is_available() else None,
+                trust_remote_code=True
+            )
+
+            self.pipeline = pipeline(
+                "text-generation",
+                model=self.model,
+                tokenizer=self.tokenizer,
+                device=0 if torch.cuda.is_available() else -1,
+                max_new_tokens=256,
+                do_sample=True,
+                temperature=0.7,
+                top_p=0.95
+            )
+            self.model_name = model_name
+            logger.info("✅ Mistral-7B model loaded successfully!")
+
+        except Exception as e:
+            logger.warning(f"Could not load Mistral-7B: {str(e)}")
+            logger.info("Falling back to DialoGPT-medium...")
+            self.pipeline = pipeline(
+                "text-generation",
+                model=fallback_model,
+                tokenizer=fallback_model,
+                device=0 if torch.cuda.is_available() else -1,
+                max_length=512,
+                do_sample=True,
+                temperature=0.7
+            )
+            self.tokenizer = self.pipeline.tokenizer
+            self.model = self.pipeline.model
+            self.model_name = fallback_model
+
+        # Decoder-only batching needs a pad token and left padding
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.tokenizer.padding_side = "left"
+        self._label_token_cache = {}
+        self._prefix_ids = None
+        self._prefix_cache = None
+
+    def set_prompt_prefix(self, prefix: str):
+        """Run the shared prefix through the model once and keep its KV cache"""
+        import torch
+        from transformers import DynamicCache
+
+        super().set_prompt_prefix(prefix)
+        self._prefix_ids = None
+        self._prefix_cache = None
+        if not prefix:
+            return
+
+        try:
+            prefix_ids = self.tokenizer.encode(prefix, add_special_tokens=False)
+            with torch.inference_mode():
+                output = self.model(torch.tensor([prefix_ids], device=self.model.device), use_cache=True)
+            cache = output.past_key_values
+            if not hasattr(cache, "batch_repeat_interleave"):
+                cache = DynamicCache.from_legacy_cache(cache)
+            self._prefix_ids = prefix_ids
+            self._prefix_cache = cache
+            logger.info(f"✅ Cached KV for {len(prefix_ids)}-token prompt prefix")
+        except Exception as e:
+            logger.error(f"Error caching prompt prefix: {str(e)}")
+
+    def _encode_batch(self, prompts: List[str]) -> tuple:
+        """Left-padded model inputs, reusing the prefix KV cache when every prompt starts with its tokens.
+
+        Returns (inputs, cached_length): ``inputs["input_ids"]`` holds only the
+        uncached tokens, while ``attention_mask`` covers prefix and suffix.
+        """
+        import torch
+
+        encodings = [self.tokenizer.encode(prompt, add_special_tokens=False) for prompt in prompts]
+        prefix_ids = self._prefix_ids
+        # Tokenization can merge across the prefix boundary; only reuse the cache on an exact token match
+        use_prefix = prefix_ids is not None and all(
+            len(ids) > len(prefix_ids) and ids[:len(prefix_ids)] == prefix_ids for ids in encodings
+        )
+        for _ in prompts:
+            record_cache_lookup("llm_prompt_prefix", use_prefix)
+
+        cached_length = len(prefix_ids) if use_prefix else 0
+        suffixes = [ids[cached_length:] for ids in encodings]
+        width = max(len(suffix) for suffix in suffixes)
+        pad_id = self.tokenizer.pad_token_id
+        device = self.model.device
+
+        input_ids = torch.tensor([[pad_id] * (width - len(suffix)) + suffix for suffix in suffixes], device=device)
+        attention_mask = torch.tensor(
+            [[1] * cached_length + [0] * (width - len(suffix)) + [1] * len(suffix) for suffix in suffixes],
+            device=device
+        )
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if use_prefix:
+            # Forward passes extend the cache in place, so every batch gets its own copy
+            cache = copy.deepcopy(self._prefix_cache)
+            cache.batch_repeat_interleave(len(prompts))
+            inputs["past_key_values"] = cache
+        return inputs, cached_length
+
+    def generate(self, prompts: List[str], max_new_tokens: int = 200, **kwargs) -> List[str]:
+        if self._prefix_cache is not None:
+            return self._generate_with_prefix(prompts, max_new_tokens, **kwargs)
+
+        outputs = self.pipeline(
+            prompts,
+            max_new_tokens=max_new_tokens,
+            num_return_sequences=1,
+            return_full_text=False,
+            batch_size=self.batch_size,
+            pad_token_id=self.tokenizer.eos_token_id,
+            **kwargs
+        )
+        return [output[0]["generated_text"] for output in outputs]
+
+    def _generate_with_prefix(self, prompts: List[str], max_new_tokens: int, **kwargs) -> List[str]:
+        import torch
+
+        completions = []
+        for start in range(0, len(prompts), self.batch_size):
+            inputs, cached_length = self._encode_batch(prompts[start:start + self.batch_size])
+            if cached_length:
+                # generate() takes the full sequence and skips the tokens already in the cache
+                prefix = torch.tensor([self._prefix_ids], device=self.model.device)
+                inputs["input_ids"] = torch.cat(
+                    [prefix.expand(inputs["input_ids"].shape[0], -1), inputs["input_ids"]], dim=1
+                )
+            options = {"do_sample": True, "temperature": 0.7, "top_p": 0.95, **kwargs}
+            with torch.inference_mode():
+                sequences = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                    **options
+                )
+            new_tokens = sequences[:, inputs["input_ids"].shape[1]:]
+            completions.extend(self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True))
+        return completions
+
+    def score_labels(self, prompts: List[str], labels: Sequence[str] = RISK_LABELS,
+                     temperature: float = 1.0) -> List[Dict[str, float]]:
+        """Next-token label log-probabilities from a single forward pass per batch (no decoding)"""
+        import torch
+
+        label_ids = self._label_token_ids(tuple(labels))
+        if label_ids is None:
+            return super().score_labels(prompts, labels, temperature)
+
+        distributions = []
+        for start in range(0, len(prompts), self.batch_size):
+            inputs, cached_length = self._encode_batch(prompts[start:start + self.batch_size])
+            # Left padding: derive positions from the mask so every row ends at its real last token
+            position_ids = (inputs["attention_mask"].cumsum(-1) - 1).clamp(min=0)[:, cached_length:]
+            with torch.inference_mode():
+                logits = self.model(**inputs, position_ids=position_ids).logits[:, -1, :]
+            label_logprobs = torch.log_softmax(logits.float(), dim=-1)[:, label_ids]
+            distributions.extend(
+                label_distribution(labels, row, temperature) for row in label_logprobs.tolist()
+            )
+        return distributions
+
+    def _label_token_ids(self, labels: tuple) -> Union[List[int], None]:
+        """First token of each label as it follows "Risk Level:"; None if they are not distinct"""
+        if labels not in self._label_token_cache:
+            prefix_ids = self.tokenizer.encode("Risk Level:", add_special_tokens=False)
+            first_ids = []
+            for label in labels:
+                ids = self.tokenizer.encode(f"Risk Level: {label}", add_special_tokens=False)
+                first_ids.append(ids[len(prefix_ids)] if ids[:len(prefix_ids)] == prefix_ids else None)
+            if None in first_ids or len(set(first_ids)) != len(first_ids):
+                logger.warning("Label tokens are not distinct; scoring labels by short generation instead")
+                first_ids = None
+            self._label_token_cache[labels] = first_ids
+        return self._label_token_cache[labels]
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+
+class LlamaCppServerBackend(LLMBackend):
+    """Local llama.cpp-style HTTP server (POST /completion), or any compatible stand-in"""
+    name = "llamacpp"
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8080", timeout: float = 120.0,
+                 max_parallel: int = 4, temperature: float = 0.7):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.temperature = temperature
+        self.session = requests.Session()
+        self.executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="llamacpp")
+
+    def set_prompt_prefix(self, prefix: str):
+        """Prefill the prefix once; ``cache_prompt`` lets the server reuse it for later prompts"""
+        super().set_prompt_prefix(prefix)
+        if not prefix:
+            return
+        try:
+            self._complete(prefix, 0)
+        except Exception as e:
+            logger.warning(f"Could not prefill prompt prefix on {self.base_url}: {str(e)}")
+
+    def _complete(self, prompt: str, max_new_tokens: int, **kwargs) -> str:
+        payload = {
+            "prompt": prompt,
+            "n_predict": max_new_tokens,
+            "temperature": kwargs.get("temperature", self.temperature),
+            "cache_prompt": True
+        }
+        response = self.session.post(f"{self.base_url}/completion", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("content", "")
+
+    def generate(self, prompts: List[str], max_new_tokens: int = 200, **kwargs) -> List[str]:
+        # The server schedules concurrent slots itself; fan the batch out as parallel requests
+        return list(self.executor.map(lambda prompt: self._complete(prompt, max_new_tokens, **kwargs), prompts))
+
+    def score_labels(self, prompts: List[str], labels: Sequence[str] = RISK_LABELS,
+                     temperature: float = 1.0) -> List[Dict[str, float]]:
+        """One-token completion with top-token probabilities (``n_probs``), mapped onto the labels"""
+        return list(self.executor.map(lambda prompt: self._score(prompt, labels, temperature), prompts))
+
+    def _score(self, prompt: str, labels: Sequence[str], temperature: float) -> Dict[str, float]:
+        payload = {"prompt": prompt, "n_predict": 1, "n_probs": 20, "temperature": 0, "cache_prompt": True}
+        response = self.session.post(f"{self.base_url}/completion", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        probabilities = response.json().get("completion_probabilities") or [{}]
+
+        # Older servers return probs/tok_str/prob, newer ones top_logprobs/token/logprob
+        label_mass = {label: 0.0 for label in labels}
+        for candidate in probabilities[0].get("probs") or probabilities[0].get("top_logprobs") or []:
+            token = (candidate.get("tok_str") or candidate.get("token") or "").strip().upper()
+            if "prob" in candidate:
+                probability = candidate["prob"]
+            else:
+                probability = math.exp(candidate.get("logprob", float("-inf")))
+            matches = [label for label in labels if token and label.startswith(token)]
+            if len(matches) == 1:
+                label_mass[matches[0]] += probability
+
+        if not any(label_mass.values()):
+            return LLMBackend.score_labels(self, [prompt], labels, temperature)[0]
+        return label_distribution(labels, [math.log(max(mass, 1e-9)) for mass in label_mass.values()], temperature)
+
+
+class StubLLMBackend(LLMBackend):
+    """Deterministic stand-in with configurable latency, for load and perf testing.
+
+    Each call sleeps ``latency_ms`` plus ``per_prompt_ms`` for every prompt in
+    the batch, then answers from keywords in the clause section of the prompt,
+    so identical prompts always produce identical completions. Label scoring
+    sleeps ``score_latency_ms`` instead (a single forward pass, no decoding).
+    """
+    name = "stub"
+
+    _HIGH_RISK = re.compile(r"unlimited|indemnif|hold harmless|liquidated damages|non-compete|not to compete|penalty|work for hire")
+    _MEDIUM_RISK = re.compile(r"terminat|breach|arbitration|governing law|confidential|force majeure|intellectual property")
+
+    def __init__(self, latency_ms: float = 50.0, per_prompt_ms: float = 0.0, score_latency_ms: float = None):
+        self.latency_ms = latency_ms
+        self.per_prompt_ms = per_prompt_ms
+        self.score_latency_ms = latency_ms if score_latency_ms is None else score_latency_ms
+
+    def generate(self, prompts: List[str], max_new_tokens: int = 200, **kwargs) -> List[str]:
+        self._sleep(self.latency_ms, len(prompts))
+        return [self._answer(prompt) for prompt in prompts]
+
+    def score_labels(self, prompts: List[str], labels: Sequence[str] = RISK_LABELS,
+                     temperature: float = 1.0) -> List[Dict[str, float]]:
+        self._sleep(self.score_latency_ms, len(prompts))
+        distributions = []
+        for prompt in prompts:
+            risk_level = self._classify(prompt)[0]
+            logprobs = [0.0 if label == risk_level else -2.0 for label in labels]
+            distributions.append(label_distribution(labels, logprobs, temperature))
+        return distributions
+
+    def _sleep(self, latency_ms: float, batch_size: int):
+        delay_ms = latency_ms + self.per_prompt_ms * batch_size
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def _answer(self, prompt: str) -> str:
+        risk_level, reason = self._classify(prompt)
+        return f"1. Risk Level: {risk_level}\n2. Explanation: {reason}\n3. Confidence: Medium"
+
+    def _classify(self, prompt: str) -> tuple:
+        clause = self._clause_section(prompt).lower()
+        if self._HIGH_RISK.search(clause):
+            return "RED", "The clause creates broad liability or restrictive obligations."
+        if self._MEDIUM_RISK.search(clause):
+            return "AMBER", "The clause governs termination, disputes or confidentiality and needs review."
+        return "GREEN", "The clause uses standard contractual language."
+
+    @staticmethod
+    def _clause_section(prompt: str) -> str:
+        marker = "CLAUSE TO ANALYZE:"
+        start = prompt.find(marker)
+        if start == -1:
+            return prompt
+        end = prompt.find("\n\n", start + len(marker) + 1)
+        return prompt[start + len(marker):end if end != -1 else None]
+
+
+def create_llm_backend(backend: Union[str, LLMBackend, None] = None) -> Union[LLMBackend, None]:
+    """Create the LLM backend named by ``backend`` or the ``LLM_BACKEND`` environment variable.
+
+    ``transformers`` (default) loads Mistral-7B/DialoGPT in-process,
+    ``llamacpp`` talks to ``LLAMACPP_URL``, ``stub`` returns deterministic
+    answers after ``STUB_LLM_LATENCY_MS``, and ``none`` disables the LLM so
+    analysis falls back to precedents.
+    """
+    if isinstance(backend, LLMBackend):
+        return backend
+
+    backend = (backend or os.getenv("LLM_BACKEND", "transformers")).lower()
+
+    if backend == "none":
+        return None
+    if backend == "stub":
+        return StubLLMBackend(
+            latency_ms=float(os.getenv("STUB_LLM_LATENCY_MS", "50")),
+            per_prompt_ms=float(os.getenv("STUB_LLM_PER_PROMPT_MS", "0")),
+            score_latency_ms=float(os.getenv("STUB_LLM_SCORE_LATENCY_MS", os.getenv("STUB_LLM_LATENCY_MS", "50")))
+        )
+    if backend == "llamacpp":
+        return LlamaCppServerBackend(base_url=os.getenv("LLAMACPP_URL", "http://127.0.0.1:8080"))
+    if backend != "transformers":
+        logger.warning(f"Unknown LLM backend '{backend}', using transformers")
+
+    return TransformersBackend()
@@ -0,0 +1,290 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+import threading
+import time
+
+# Seconds; spans sub-millisecond rule matching up to multi-second LLM generation
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues):
+        """Return the child series for these label values (cached, so hot paths can hold it)"""
+        key = tuple(str(value) for value in labelvalues)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labelvalues, child in sorted(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+    def _render_child(self, labelvalues, child) -> List[str]:
+        labels = _format_labels(self.labelnames, labelvalues)
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or computed at scrape time"""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Callable[[], Dict[Tuple[str, ...], float]] = None
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def remove(self, *labelvalues):
+        """Drop the child series for these label values, if any"""
+        with self._lock:
+            self._children.pop(tuple(str(value) for value in labelvalues), None)
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]):
+        """Compute values at scrape time; ``function`` maps label-value tuples to values.
+
+        Series the function no longer reports (e.g. closed workspaces) are dropped.
+        """
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            try:
+                values = self._function()
+                for labelvalues in [key for key in self._children if key not in values]:
+                    self.remove(*labelvalues)
+                for labelvalues, value in values.items():
+                    self.labels(*labelvalues).set(value)
+            except Exception:
+                # A failing probe must never break the scrape; the last values are kept
+                pass
+        return super().render()
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets)) + (float("inf"),)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, labelvalues, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for upper_bound, count in zip(child.upper_bounds, child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_value(upper_bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "redlining_stage_duration_seconds",
+    "Latency of each pipeline stage",
+    ["stage"]
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "redlining_stage_errors_total",
+    "Pipeline stage invocations that raised",
+    ["stage"]
+))
+LLM_GENERATED_TOKENS = REGISTRY.register(Counter(
+    "redlining_llm_generated_tokens_total",
+    "Tokens generated by the LLM"
+))
+LLM_TOKENS_PER_SECOND = REGISTRY.register(Gauge(
+    "redlining_llm_tokens_per_second",
+    "Generation throughput of the most recent LLM call"
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "redlining_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"]
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "redlining_cache_hit_ratio",
+    "Hit ratio of each cache since startup",
+    ["cache"]
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "redlining_queue_depth",
+    "Requests waiting in internal queues",
+    ["queue"]
+))
+COLLECTION_SIZE = REGISTRY.register(Gauge(
+    "redlining_collection_size",
+    "Number of items in each vector collection or index",
+    ["collection"]
+))
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Time a pipeline stage into the stage latency histogram"""
+    child = STAGE_LATENCY.labels(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        child.observe(time.perf_counter() - start)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a cache hit or miss"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_llm_generation(tokens: int, seconds: float):
+    """Record generated token count and throughput for one LLM call"""
+    LLM_GENERATED_TOKENS.inc(tokens)
+    if seconds > 0:
+        LLM_TOKENS_PER_SECOND.set(tokens / seconds)
+
+
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), child in list(CACHE_REQUESTS._children.items()):
+        hits_and_total = totals.setdefault(cache, [0.0, 0.0])
+        hits_and_total[1] += child.value
+        if result == "hit":
+            hits_and_total[0] += child.value
+    return {(cache,): hits / total for cache, (hits, total) in totals.items() if total}
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratios)
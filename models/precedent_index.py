@@ -0,0 +1,152 @@
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import mmap
+import os
+
+import numpy as np
+
+from .hybrid_search import BM25Index
+
+try:
+    import orjson
+except ImportError:  # optional; the standard json module is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_EMBEDDINGS = "embeddings.npy"
+_OFFSETS = "offsets.npy"
+_RECORDS = "records.jsonl"
+_MANIFEST = "manifest.json"
+
+
+class PrecedentIndex:
+    """Read-only, memory-mapped snapshot of the legal_knowledge collection.
+
+    Unit-normalized float32 embeddings and the id/text/metadata records live in
+    flat files that are mapped rather than read, so every process serving the
+    index shares one copy through the page cache and pre-forked workers never
+    copy it. Queries are exact cosine top-k over the whole matrix. Supports the
+    subset of the Chroma collection API used by ``HybridRetriever``; the BM25
+    index over the records is built once when the snapshot is opened.
+    """
+
+    def __init__(self, path: str, name: str = "legal_knowledge"):
+        self.path = path
+        self.name = name
+        with open(os.path.join(path, _MANIFEST)) as manifest:
+            self.manifest = json.load(manifest)
+        self._embeddings = np.load(os.path.join(path, _EMBEDDINGS), mmap_mode="r")
+        self._offsets = np.load(os.path.join(path, _OFFSETS), mmap_mode="r")
+        with open(os.path.join(path, _RECORDS), "rb") as records:
+            self._records = mmap.mmap(records.fileno(), 0, access=mmap.ACCESS_READ) if self.count() else b""
+
+        self._positions = {}
+        self.lexical_index = BM25Index()
+        ids, texts, metadatas = [], [], []
+        for position in range(self.count()):
+            record = self._record(position)
+            self._positions[record["id"]] = position
+            ids.append(record["id"])
+            texts.append(record["text"])
+            metadatas.append(record["metadata"])
+        self.lexical_index.add(ids, texts, metadatas)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, _MANIFEST))
+
+    @classmethod
+    def build(cls, collection, path: str, batch_size: int = 1000) -> "PrecedentIndex":
+        """Snapshot a Chroma collection into ``path`` (files are swapped in atomically, manifest last)"""
+        os.makedirs(path, exist_ok=True)
+        total = collection.count()
+        embeddings, offsets = [], [0]
+        with open(os.path.join(path, _RECORDS + ".tmp"), "wb") as records:
+            for offset in range(0, total, batch_size):
+                batch = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+                vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                embeddings.append(vectors / np.where(norms == 0, 1.0, norms))
+                for item_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                    records.write(_dumps({"id": item_id, "text": text, "metadata": metadata or {}}) + b"\n")
+                    offsets.append(records.tell())
+
+        matrix = np.concatenate(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+        np.save(os.path.join(path, _EMBEDDINGS + ".tmp.npy"), matrix)
+        np.save(os.path.join(path, _OFFSETS + ".tmp.npy"), np.asarray(offsets, dtype=np.int64))
+        os.replace(os.path.join(path, _EMBEDDINGS + ".tmp.npy"), os.path.join(path, _EMBEDDINGS))
+        os.replace(os.path.join(path, _OFFSETS + ".tmp.npy"), os.path.join(path, _OFFSETS))
+        os.replace(os.path.join(path, _RECORDS + ".tmp"), os.path.join(path, _RECORDS))
+        with open(os.path.join(path, _MANIFEST), "w") as manifest:
+            json.dump({"collection": collection.name, "count": len(matrix), "dimension": int(matrix.shape[1])}, manifest)
+
+        logger.info(f"✅ Snapshotted {len(matrix)} precedents from {collection.name} into {path}")
+        return cls(path, name=collection.name)
+
+    def count(self) -> int:
+        return len(self._offsets) - 1
+
+    def _record(self, position: int) -> Dict[str, Any]:
+        return _loads(self._records[int(self._offsets[position]):int(self._offsets[position + 1]) - 1])
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Exact top-``n_results`` per query embedding by cosine distance"""
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if not self.count():
+            return {field: [[] for _ in query_embeddings] for field in results}
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        similarities = (queries / np.where(norms == 0, 1.0, norms)) @ self._embeddings.T
+        for scores in similarities:
+            if where or n_results >= len(scores):
+                candidates = np.argsort(-scores, kind="stable")
+            else:
+                candidates = np.argpartition(-scores, n_results - 1)[:n_results]
+                candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            rows = []
+            for position in candidates:
+                record = self._record(position)
+                if where and not all(record["metadata"].get(key) == value for key, value in where.items()):
+                    continue
+                rows.append((record, 1.0 - float(scores[position])))
+                if len(rows) >= n_results:
+                    break
+            results["ids"].append([record["id"] for record, _ in rows])
+            results["documents"].append([record["text"] for record, _ in rows])
+            results["metadatas"].append([record["metadata"] for record, _ in rows])
+            results["distances"].append([distance for _, distance in rows])
+        return results
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None,
+            limit: Optional[int] = None, offset: Optional[int] = None) -> Dict[str, Any]:
+        if ids is not None:
+            positions = [self._positions[item_id] for item_id in ids if item_id in self._positions]
+        else:
+            start = offset or 0
+            positions = range(start, self.count() if limit is None else min(self.count(), start + limit))
+
+        include = ["documents", "metadatas"] if include is None else include
+        records = [self._record(position) for position in positions]
+        result = {"ids": [record["id"] for record in records]}
+        if "documents" in include:
+            result["documents"] = [record["text"] for record in records]
+        if "metadatas" in include:
+            result["metadatas"] = [record["metadata"] for record in records]
+        if "embeddings" in include:
+            result["embeddings"] = [self._embeddings[position] for position in positions]
+        return result
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(payload: bytes) -> Any:
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
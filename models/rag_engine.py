@@ -1,81 +1,111 @@
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-import torch
-from typing import List, Dict, Any
+from functools import partial
+from typing import List, Dict, Any, Union
 import os
 import logging
-from legal_dataset_loader import get_legal_dataset_loader
+import re
+import shutil
+import sqlite3
+import statistics
+import time
+from .embedding_backends import get_embedding_model
+from .embedding_batcher import EmbeddingBatcher
+from .hybrid_search import HybridRetriever
+from .inference_worker import InferenceClient, InferenceUnavailable, remote_models
+from .llm_backends import LLMBackend, RISK_LABELS, create_llm_backend
+from .metrics import track_stage, record_llm_generation
+from .precedent_index import PrecedentIndex
+from .sharded_collection import ShardedCollection
+from .tracing import span
+from .workspaces import DEFAULT_WORKSPACE, Workspace, WorkspaceRegistry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared by every risk prompt; LLM backends precompute its KV cache once
+LEGAL_RISK_PROMPT_PREFIX = """<s>[INST] You are a legal AI assistant specializing in contract risk analysis.
+
+Analyze the contract clause below for legal and financial risks. Based on similar legal precedents and your expertise, classify it as:
+- RED (High Risk): Significant legal/financial exposure, immediate attention needed
+- AMBER (Medium Risk): Requires careful review and consideration
+- GREEN (Low Risk): Standard terms, minimal risk
+
+"""
+
+# Chroma stores each persisted HNSW segment in a directory named after the segment id
+_SEGMENT_DIRECTORY = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
 class RAGEngine:
-    def __init__(self):
-        self.embedding_model = None
-        self.llm_pipeline = None
-        self.chroma_client = None
+    def __init__(self, hybrid_search: bool = True, embedding_backend: str = None, embedding_batch_wait_ms: float = None,
+                 embedding_model=None, chroma_client=None, llm_backend: Union[str, LLMBackend] = None,
+                 llm_mode: str = None, label_temperature: float = None, chroma_shards: int = None,
+                 chroma_shard_mode: str = None, precedent_index: Union[str, PrecedentIndex] = None,
+                 inference_client: InferenceClient = None):
+        # Pre-built components (e.g. offline stubs for benchmarks) may be injected
+        self.embedding_model = embedding_model
+        self.embedding_backend = embedding_backend  # torch, onnx or onnx-int8 (defaults to EMBEDDING_BACKEND)
+        # Micro-batching window for concurrent encodes; 0 disables the batcher
+        if embedding_batch_wait_ms is None:
+            embedding_batch_wait_ms = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+        self.embedding_batch_wait_ms = embedding_batch_wait_ms
+        # transformers, llamacpp, stub or none (defaults to LLM_BACKEND), or a backend instance
+        self.llm_backend = llm_backend
+        # Connection to an out-of-process inference worker; when set, both models run there and only proxies live here
+        self.inference_client = inference_client
+        # classify: score RED/AMBER/GREEN in one forward pass; generate: free-text analysis
+        self.llm_mode = (llm_mode or os.getenv("LLM_MODE", "classify")).lower()
+        # Calibration temperature for label probabilities (see llm_backends.fit_label_temperature)
+        if label_temperature is None:
+            label_temperature = float(os.getenv("LLM_LABEL_TEMPERATURE", "1.0"))
+        self.label_temperature = label_temperature
+        self.chroma_client = chroma_client
+        # Hash-partition clause collections over N shards (1 = a single collection)
+        if chroma_shards is None:
+            chroma_shards = int(os.getenv("CHROMA_SHARDS", "1"))
+        self.chroma_shards = max(1, chroma_shards)
+        # collections: shards share the main client; directories: one client (and directory) per shard
+        self.chroma_shard_mode = (chroma_shard_mode or os.getenv("CHROMA_SHARD_MODE", "collections")).lower()
+        self._shard_clients = None
         self.collection = None
         self.legal_collection = None  # New legal knowledge collection
+        # Memory-mapped legal_knowledge snapshot (instance or directory) served instead of Chroma; shared by pre-forked workers
+        self.precedent_index = precedent_index or os.getenv("PRECEDENT_INDEX_PATH") or None
+        self.hybrid_search = hybrid_search  # Fuse BM25 with dense retrieval by default
+        self.clause_retriever = None  # Retriever of the default workspace
+        self.legal_retriever = None
+        self.workspaces = None
+        # Idle time after which a workspace's collection handle and lexical index are released
+        self.workspace_idle_seconds = float(os.getenv("WORKSPACE_IDLE_SECONDS", "900"))
         self.initialize_models()
+        self.initialize_retrievers()
         self.initialize_legal_knowledge()
     
     def initialize_models(self):
         """Initialize embedding model, LLM, and vector database"""
+        if self.inference_client is not None and self.embedding_model is None:
+            # Raises InferenceUnavailable rather than falling back to loading the models in this process
+            self.embedding_model, remote_llm = remote_models(self.inference_client)
+            if self.llm_backend is None:
+                self.llm_backend = remote_llm or "none"
+            logger.info(f"Using models of the inference worker at {self.inference_client.address}")
+        
         try:
-            logger.info("Initializing embedding model...")
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            logger.info("Initializing MISTRAL-7B model...")
-            # Enable actual Mistral model
-            model_name = "mistralai/Mistral-7B-Instruct-v0.1"
+            if self.embedding_model is None:
+                logger.info("Initializing embedding model...")
+                self.embedding_model = self._create_embedding_model()
             
-            try:
-                # Try to load Mistral model
-                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-                self.llm_model = AutoModelForCausalLM.from_pretrained(
-                    model_name,
-                    torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-                    device_map="auto" if torch.cuda.is_available() else None,
-                    trust_remote_code=True
-                )
-                
-                self.llm_pipeline = pipeline(
-                    "text-generation",
-                    model=self.llm_model,
-                    tokenizer=self.tokenizer,
-                    device=0 if torch.cuda.is_available() else -1,
-                    max_new_tokens=256,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.95
-                )
-                logger.info("✅ Mistral-7B model loaded successfully!")
-                
-            except Exception as e:
-                logger.warning(f"Could not load Mistral-7B: {str(e)}")
-                logger.info("Falling back to DialoGPT-medium...")
-                # Fallback model
-                fallback_model = "microsoft/DialoGPT-medium"
-                self.llm_pipeline = pipeline(
-                    "text-generation",
-                    model=fallback_model,
-                    tokenizer=fallback_model,
-                    device=0 if torch.cuda.is_available() else -1,
-                    max_length=512,
-                    do_sample=True,
-                    temperature=0.7
-                )
+            self.llm_backend = create_llm_backend(self.llm_backend)
+            if self.llm_backend:
+                logger.info(f"LLM backend: {self.llm_backend.name}")
+                self.llm_backend.set_prompt_prefix(LEGAL_RISK_PROMPT_PREFIX)
             
             logger.info("Initializing ChromaDB...")
-            self.chroma_client = chromadb.PersistentClient(path="./chroma_db")
+            if self.chroma_client is None:
+                import chromadb
+
+                self.chroma_client = chromadb.PersistentClient(path="./chroma_db")
             
-            # Contract clauses collection
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="contract_clauses",
-                metadata={"hnsw:space": "cosine"}
-            )
+            # Contract clauses collection (default workspace)
+            self.collection = self._open_clause_collection("contract_clauses")
             
             # Legal knowledge collection
             self.legal_collection = self.chroma_client.get_or_create_collection(
@@ -88,34 +118,148 @@ class RAGEngine:
         except Exception as e:
             logger.error(f"Error initializing models: {str(e)}")
             # Fallback initialization
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            self.llm_pipeline = None
+            if self.embedding_model is None:
+                self.embedding_model = self._create_embedding_model()
+            if not isinstance(self.llm_backend, LLMBackend):
+                self.llm_backend = None
+            import chromadb
             self.chroma_client = chromadb.Client()
             self.collection = self.chroma_client.get_or_create_collection(name="contract_clauses")
             self.legal_collection = self.chroma_client.get_or_create_collection(name="legal_knowledge")
     
+    def _open_clause_collection(self, name: str):
+        """A clause collection, sharded when CHROMA_SHARDS > 1"""
+        metadata = {"hnsw:space": "cosine"}
+        if self.chroma_shards <= 1:
+            return self.chroma_client.get_or_create_collection(name=name, metadata=metadata)
+        
+        collection = ShardedCollection.open(self._get_shard_clients(), name, self.chroma_shards, metadata)
+        if collection.count() == 0:
+            self._import_unsharded(name, collection)
+        return collection
+    
+    def _get_shard_clients(self) -> List:
+        if self._shard_clients is None:
+            clients = [self.chroma_client]
+            path = self._chroma_persist_directory()
+            if self.chroma_shard_mode == "directories" and path is not None:
+                import chromadb
+                clients += [
+                    chromadb.PersistentClient(path=os.path.join(path, f"shard_{i}"))
+                    for i in range(1, self.chroma_shards)
+                ]
+            self._shard_clients = clients
+        return self._shard_clients
+    
+    def _import_unsharded(self, name: str, sharded: ShardedCollection, batch_size: int = 1000):
+        """Copy an existing unsharded collection into newly created shards (the original is left untouched)"""
+        try:
+            legacy = self.chroma_client.get_collection(name=name)
+        except Exception:
+            return
+        total = legacy.count()
+        for offset in range(0, total, batch_size):
+            batch = legacy.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+            sharded.add(
+                ids=batch["ids"],
+                embeddings=batch["embeddings"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"]
+            )
+        if total:
+            logger.info(f"Imported {total} items from {name} into {len(sharded)} shards; delete {name} once verified")
+    
+    def loaded_embedding_backend(self) -> str:
+        """Backend of the embedding model in use (ONNX may have fallen back to torch)"""
+        loaded = getattr(self.embedding_model, "embedding_backend", None)
+        return loaded or self.embedding_backend or os.getenv("EMBEDDING_BACKEND", "torch")
+
+    def _create_embedding_model(self):
+        """Load the embedding model, wrapped in a micro-batcher when enabled"""
+        model = get_embedding_model(self.embedding_backend)
+        if self.embedding_batch_wait_ms > 0:
+            return EmbeddingBatcher(model, max_wait_ms=self.embedding_batch_wait_ms)
+        return model
+    
+    def initialize_retrievers(self):
+        """Build hybrid retrievers and backfill lexical indexes from persisted collections"""
+        self.clause_retriever = HybridRetriever(self.collection, self.embedding_model)
+        if isinstance(self.precedent_index, str):
+            self.precedent_index = self._open_precedent_index(self.precedent_index)
+        if self.precedent_index is not None:
+            # The snapshot brings its own BM25 index, built once when it was opened
+            self.legal_retriever = HybridRetriever(
+                self.precedent_index, self.embedding_model, lexical_index=self.precedent_index.lexical_index
+            )
+        else:
+            self.legal_retriever = HybridRetriever(self.legal_collection, self.embedding_model)
+        # contract_clauses backs the default workspace; other workspaces get their own collections
+        self.workspaces = WorkspaceRegistry(
+            self._open_clause_collection,
+            self.embedding_model,
+            default=Workspace(DEFAULT_WORKSPACE, self.collection, self.clause_retriever),
+            base_name=self.collection.name,
+            idle_seconds=self.workspace_idle_seconds
+        )
+        
+        try:
+            self.clause_retriever.index_existing_documents()
+            if self.precedent_index is None:
+                self.legal_retriever.index_existing_documents()
+            logger.info(
+                f"Lexical indexes ready: {len(self.clause_retriever.lexical_index)} clauses, "
+                f"{len(self.legal_retriever.lexical_index)} precedents"
+            )
+        except Exception as e:
+            logger.error(f"Error building lexical indexes: {str(e)}")
+    
+    def _open_precedent_index(self, path: str) -> Union[PrecedentIndex, None]:
+        """Open the snapshot at ``path``, building it from legal_knowledge first if it does not exist yet"""
+        try:
+            if PrecedentIndex.exists(path):
+                return PrecedentIndex(path)
+            if self.legal_collection.count() == 0:
+                logger.info("legal_knowledge is empty; precedents are served from Chroma until the next start")
+                return None
+            return PrecedentIndex.build(self.legal_collection, path)
+        except Exception as e:
+            logger.error(f"Error opening precedent index {path}: {str(e)}")
+            return None
+    
     def initialize_legal_knowledge(self):
         """Initialize legal knowledge database"""
         try:
             # Check if legal knowledge is already populated
             existing_count = self.legal_collection.count()
             
+            if self.precedent_index is not None:
+                if existing_count != self.precedent_index.count():
+                    logger.warning(
+                        f"⚠️ Precedent index {self.precedent_index.path} has {self.precedent_index.count()} items, "
+                        f"legal_knowledge has {existing_count}; rebuild it with python prefork.py --build-precedent-index"
+                    )
+                return
+            
             if existing_count > 0:
                 logger.info(f"Legal knowledge collection already contains {existing_count} items")
                 return
             
             logger.info("Loading legal dataset...")
-            dataset_loader = get_legal_dataset_loader()
+            # Only needed to seed an empty collection; keeps datasets off the serving import path
+            from legal_dataset_loader import get_legal_dataset_loader
+            dataset_loader = get_legal_dataset_loader(self.embedding_model)
             legal_data = dataset_loader.load_and_format_legal_dataset()
             
             if legal_data:
                 # Populate legal knowledge collection
-                self.legal_collection.add(
-                    embeddings=legal_data['embeddings'],
-                    documents=legal_data['texts'],
-                    metadatas=legal_data['metadatas'],
-                    ids=legal_data['ids']
-                )
+                with track_stage("chroma_add"):
+                    self.legal_collection.add(
+                        embeddings=legal_data['embeddings'],
+                        documents=legal_data['texts'],
+                        metadatas=legal_data['metadatas'],
+                        ids=legal_data['ids']
+                    )
+                self.legal_retriever.add(legal_data['ids'], legal_data['texts'], legal_data['metadatas'])
                 logger.info(f"✅ Added {len(legal_data['texts'])} legal precedents to knowledge base")
             else:
                 logger.warning("Failed to load legal dataset")
@@ -123,11 +267,12 @@ class RAGEngine:
         except Exception as e:
             logger.error(f"Error initializing legal knowledge: {str(e)}")
     
-    def add_document_to_vectordb(self, chunks: List[Dict], document_id: str):
-        """Add document chunks to vector database"""
+    def add_document_to_vectordb(self, chunks: List[Dict], document_id: str, workspace: str = None):
+        """Add document chunks to the workspace's collection in the vector database"""
         try:
             texts = [chunk["text"] for chunk in chunks]
-            embeddings = self.embedding_model.encode(texts).tolist()
+            with track_stage("embedding"):
+                embeddings = self.embedding_model.encode(texts).tolist()
             
             ids = [f"{document_id}_chunk_{chunk['chunk_id']}" for chunk in chunks]
             metadatas = [
@@ -140,12 +285,14 @@ class RAGEngine:
                 for chunk in chunks
             ]
             
-            self.collection.add(
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            with self.workspaces.use(workspace) as opened, opened.lock, track_stage("chroma_add"):
+                opened.collection.add(
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                opened.retriever.add(ids, texts, metadatas)
             
             logger.info(f"Added {len(chunks)} chunks to vector database")
             
@@ -153,97 +300,322 @@ class RAGEngine:
             logger.error(f"Error adding document to vector DB: {str(e)}")
             raise
     
-    def semantic_search(self, query: str, n_results: int = 5) -> List[Dict]:
-        """Perform semantic search for relevant clauses"""
+    def get_document_chunks(self, document_id: str, clauses_only: bool = True, workspace: str = None) -> List[Dict]:
+        """All stored chunks of one document in reading order (no similarity query, no result cap)"""
         try:
-            query_embedding = self.embedding_model.encode([query]).tolist()
+            with self.workspaces.use(workspace) as opened, track_stage("chroma_get"):
+                results = opened.collection.get(where={"document_id": document_id}, include=["documents", "metadatas"])
             
-            results = self.collection.query(
-                query_embeddings=query_embedding,
-                n_results=n_results,
-                where={"is_clause": True}
-            )
+            chunks = [
+                {"text": text, "metadata": metadata, "id": chunk_id}
+                for chunk_id, text, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+                if metadata.get("is_clause") or not clauses_only
+            ]
+            chunks.sort(key=lambda chunk: chunk["metadata"].get("chunk_id", 0))
+            return chunks
             
-            search_results = []
-            for i in range(len(results["documents"][0])):
-                search_results.append({
-                    "text": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "distance": results["distances"][0][i],
-                    "id": results["ids"][0][i]
-                })
+        except Exception as e:
+            logger.error(f"Error fetching chunks for document {document_id}: {str(e)}")
+            return []
+    
+    def delete_document(self, document_id: str, workspace: str = None) -> int:
+        """Remove a document's chunks from its workspace collection and the lexical index"""
+        try:
+            with self.workspaces.use(workspace) as opened, opened.lock:
+                with track_stage("chroma_get"):
+                    ids = set(opened.collection.get(where={"document_id": document_id}, include=[])["ids"])
+                # Chunks indexed before metadata filtering was reliable are still found by ID prefix
+                ids.update(opened.retriever.lexical_index.ids_with_prefix(f"{document_id}_chunk_"))
+                ids = sorted(ids)
+                if ids:
+                    with track_stage("chroma_delete"):
+                        opened.collection.delete(ids=ids)
+                    opened.retriever.remove(ids)
             
-            return search_results
+            logger.info(f"Deleted {len(ids)} chunks of document {document_id}")
+            return len(ids)
             
+        except Exception as e:
+            logger.error(f"Error deleting document {document_id}: {str(e)}")
+            raise
+    
+    def compact_collection(self, workspace: str = None, batch_size: int = 1000, probe_queries: int = 20) -> Dict[str, Any]:
+        """Rebuild a workspace's clause collection to reclaim space left by deletions.
+        
+        Chroma only marks deleted HNSW entries, so the index keeps the size of
+        everything ever uploaded. Copying the live entries into a new collection
+        and swapping it in drops them. Returns a before/after report of on-disk
+        size and dense query latency.
+        """
+        with self.workspaces.use(workspace) as opened, opened.lock:
+            started = time.perf_counter()
+            probes = self._latency_probes(opened.collection, probe_queries)
+            before = {
+                "chunks": opened.collection.count(),
+                "disk_bytes": self._chroma_disk_bytes(),
+                "query_p50_ms": self._dense_query_p50_ms(opened.collection, probes),
+                "lexical_tombstones": opened.retriever.lexical_index.tombstones,
+            }
+            
+            name = opened.collection.name
+            if isinstance(opened.collection, ShardedCollection):
+                sharded = opened.collection
+                for i, (client, shard) in enumerate(zip(sharded.clients, sharded.shards)):
+                    self._rebuild_collection(client, shard, batch_size, partial(sharded.replace_shard, i))
+                clients = set(sharded.clients)
+            else:
+                def swap(rebuilt):
+                    opened.collection = rebuilt
+                    opened.retriever.collection = rebuilt
+                    if opened.name == DEFAULT_WORKSPACE:
+                        self.collection = rebuilt
+                self._rebuild_collection(self.chroma_client, opened.collection, batch_size, swap)
+                clients = {self.chroma_client}
+            opened.retriever.lexical_index.compact()
+            for client in clients:
+                self._reclaim_chroma_files(client)
+            
+            after = {
+                "chunks": opened.collection.count(),
+                "disk_bytes": self._chroma_disk_bytes(),
+                "query_p50_ms": self._dense_query_p50_ms(opened.collection, probes),
+                "lexical_tombstones": opened.retriever.lexical_index.tombstones,
+            }
+        
+        report = {
+            "workspace": opened.name,
+            "collection": name,
+            "before": before,
+            "after": after,
+            "duration_s": round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Compacted {name}: {before['disk_bytes']} -> {after['disk_bytes']} bytes on disk")
+        return report
+    
+    @staticmethod
+    def _rebuild_collection(client, collection, batch_size: int, swap):
+        """Copy a collection's live items into a fresh one, hand it to ``swap``, then drop the original"""
+        name = collection.name
+        # Workspace names cannot contain dots, so this never collides with a workspace collection
+        rebuilt = client.create_collection(name=f"{name}.compacting", metadata=collection.metadata)
+        try:
+            for offset in range(0, collection.count(), batch_size):
+                batch = collection.get(
+                    include=["embeddings", "documents", "metadatas"],
+                    limit=batch_size,
+                    offset=offset
+                )
+                rebuilt.add(
+                    ids=batch["ids"],
+                    embeddings=batch["embeddings"],
+                    documents=batch["documents"],
+                    metadatas=batch["metadatas"]
+                )
+        except Exception:
+            client.delete_collection(rebuilt.name)
+            raise
+        
+        # Queries switch to the rebuilt copy before the original is dropped
+        swap(rebuilt)
+        client.delete_collection(name)
+        rebuilt.modify(name=name)
+    
+    @staticmethod
+    def _latency_probes(collection, count: int) -> List[List[float]]:
+        """Stored clause embeddings reused as query vectors for before/after latency"""
+        if collection.count() == 0:
+            return []
+        sample = collection.get(include=["embeddings"], limit=count)
+        return [list(embedding) for embedding in sample["embeddings"]]
+    
+    @staticmethod
+    def _dense_query_p50_ms(collection, probes: List[List[float]]) -> float:
+        timings = []
+        for embedding in probes:
+            start = time.perf_counter()
+            collection.query(query_embeddings=[embedding], n_results=5)
+            timings.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(timings), 2) if timings else 0.0
+    
+    def _chroma_persist_directory(self, client=None):
+        try:
+            settings = (client or self.chroma_client).get_settings()
+        except Exception:
+            return None
+        if not settings.is_persistent or not os.path.isdir(settings.persist_directory):
+            return None
+        return settings.persist_directory
+    
+    def _reclaim_chroma_files(self, client=None):
+        """Remove HNSW segment directories of dropped collections and vacuum Chroma's SQLite file.
+        
+        Chroma leaves both behind when a collection is deleted, so without this
+        a rebuild would grow the directory instead of shrinking it.
+        """
+        path = self._chroma_persist_directory(client)
+        if path is None:
+            return
+        try:
+            database = sqlite3.connect(os.path.join(path, "chroma.sqlite3"), timeout=5)
+            try:
+                live_segments = {row[0] for row in database.execute("SELECT id FROM segments")}
+                for entry in os.listdir(path):
+                    if _SEGMENT_DIRECTORY.match(entry) and entry not in live_segments:
+                        shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+                database.execute("VACUUM")
+            finally:
+                database.close()
+        except Exception as e:
+            logger.error(f"Error reclaiming Chroma files: {str(e)}")
+    
+    def _chroma_disk_bytes(self) -> int:
+        """Size of the persisted Chroma directory (0 for in-memory clients)"""
+        path = self._chroma_persist_directory()
+        if path is None:
+            return 0
+        total = 0
+        for root, _, files in os.walk(path):
+            for filename in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, filename))
+                except OSError:
+                    pass
+        return total
+    
+    def semantic_search(self, query: str, n_results: int = 5, hybrid: bool = None, workspace: str = None) -> List[Dict]:
+        """Perform semantic search for relevant clauses within one workspace, fused with BM25 when hybrid is enabled"""
+        try:
+            use_hybrid = self.hybrid_search if hybrid is None else hybrid
+            where = {"is_clause": True}
+            with self.workspaces.use(workspace) as opened:
+                if use_hybrid:
+                    return opened.retriever.search(query, n_results, where=where)
+                return opened.retriever.dense_search(query, n_results, where=where)
+            
+        except InferenceUnavailable:
+            raise  # a busy or restarting inference worker must not pass for "no results"
         except Exception as e:
             logger.error(f"Error in semantic search: {str(e)}")
             return []
     
-    def find_legal_precedents(self, clause_text: str, n_results: int = 3) -> List[Dict]:
+    def find_legal_precedents(self, clause_text: str, n_results: int = 3, hybrid: bool = None) -> List[Dict]:
         """Find similar legal precedents for a given clause"""
         try:
-            query_embedding = self.embedding_model.encode([clause_text]).tolist()
+            use_hybrid = self.hybrid_search if hybrid is None else hybrid
             
-            results = self.legal_collection.query(
-                query_embeddings=query_embedding,
-                n_results=n_results
-            )
+            if use_hybrid:
+                results = self.legal_retriever.search(clause_text, n_results)
+            else:
+                results = self.legal_retriever.dense_search(clause_text, n_results)
             
             precedents = []
-            for i in range(len(results["documents"][0])):
+            for result in results:
                 precedents.append({
-                    "text": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "similarity": 1 - results["distances"][0][i],  # Convert distance to similarity
-                    "id": results["ids"][0][i]
+                    "text": result["text"],
+                    "metadata": result["metadata"],
+                    "similarity": 1 - result["distance"],  # Convert distance to similarity
+                    "id": result["id"]
                 })
             
             return precedents
             
+        except InferenceUnavailable:
+            raise  # a busy or restarting inference worker must not pass for "no results"
         except Exception as e:
             logger.error(f"Error finding legal precedents: {str(e)}")
             return []
     
     def generate_risk_analysis(self, clause_text: str, context: Dict = None) -> Dict[str, Any]:
         """Generate enhanced risk analysis using legal precedents and LLM"""
+        return self.generate_risk_analysis_batch([clause_text], context)[0]
+    
+    def generate_risk_analysis_batch(self, clause_texts: List[str], context: Dict = None,
+                                     precedents: List[List[Dict]] = None, use_llm: bool = True) -> List[Dict[str, Any]]:
+        """Risk analysis for several clauses with a single batched LLM call.
+        
+        ``precedents`` (one list per clause) skips retrieval; ``use_llm=False``
+        gives the cheap precedent-only analysis.
+        """
         try:
-            # Find similar legal precedents
-            precedents = self.find_legal_precedents(clause_text, n_results=3)
-            
-            # Create enhanced prompt with legal context
-            prompt = self._create_legal_risk_prompt(clause_text, precedents, context or {})
+            all_precedents = precedents
+            if all_precedents is None:
+                # Find similar legal precedents
+                with span("retrieval"):
+                    all_precedents = [self.find_legal_precedents(clause_text, n_results=3) for clause_text in clause_texts]
             
-            if self.llm_pipeline:
-                # Generate response using the pipeline
-                response = self.llm_pipeline(
-                    prompt, 
-                    max_new_tokens=200, 
-                    num_return_sequences=1,
-                    pad_token_id=self.tokenizer.eos_token_id if hasattr(self, 'tokenizer') else None
-                )
-                generated_text = response[0]["generated_text"]
+            label_probabilities = [None] * len(clause_texts)
+            if self.llm_backend and use_llm:
+                classify = self.llm_mode == "classify"
+                # Create enhanced prompts with legal context
+                with span("prompt_build"):
+                    prompts = [
+                        self._create_legal_risk_prompt(clause_text, precedents, context or {}, classify=classify)
+                        for clause_text, precedents in zip(clause_texts, all_precedents)
+                    ]
                 
-                # Parse the response
-                risk_level, explanation, confidence = self._parse_enhanced_llm_response(generated_text, precedents)
+                if classify:
+                    # Label log-probabilities from a single forward pass, no decoding
+                    with span("generation"), track_stage("llm_scoring"):
+                        label_probabilities = self.llm_backend.score_labels(prompts, RISK_LABELS, self.label_temperature)
+                    with span("parse"):
+                        analyses = [
+                            self._label_probabilities_to_analysis(probabilities, precedents)
+                            for probabilities, precedents in zip(label_probabilities, all_precedents)
+                        ]
+                else:
+                    start = time.perf_counter()
+                    with span("generation"), track_stage("llm_generation"):
+                        completions = self.llm_backend.generate(prompts, max_new_tokens=200)
+                    record_llm_generation(
+                        sum(self.llm_backend.count_tokens(completion) for completion in completions),
+                        time.perf_counter() - start
+                    )
+                    
+                    # Parse the completions (prompt text excluded)
+                    with span("parse"):
+                        analyses = [
+                            self._parse_enhanced_llm_response(completion, precedents)
+                            for completion, precedents in zip(completions, all_precedents)
+                        ]
                 
             else:
                 # Enhanced fallback analysis using precedents
-                risk_level, explanation, confidence = self._precedent_based_analysis(clause_text, precedents)
+                with span("precedent_analysis"):
+                    analyses = [
+                        self._precedent_based_analysis(clause_text, precedents)
+                        for clause_text, precedents in zip(clause_texts, all_precedents)
+                    ]
             
-            return {
-                "risk_level": risk_level,
-                "explanation": explanation,
-                "confidence": confidence,
-                "precedents": precedents[:2],  # Include top 2 precedents
-                "clause_text": clause_text
-            }
+            results = []
+            for clause_text, precedents, analysis, probabilities in zip(
+                clause_texts, all_precedents, analyses, label_probabilities
+            ):
+                if isinstance(analysis, dict):
+                    # No precedents: keyword fallback already returned a full result
+                    results.append(analysis)
+                    continue
+                risk_level, explanation, confidence = analysis
+                result = {
+                    "risk_level": risk_level,
+                    "explanation": explanation,
+                    "confidence": confidence,
+                    "precedents": precedents[:2],  # Include top 2 precedents
+                    "clause_text": clause_text
+                }
+                if probabilities:
+                    result["label_probabilities"] = probabilities
+                results.append(result)
+            return results
             
+        except InferenceUnavailable:
+            raise  # a busy or restarting inference worker must not pass for "no results"
         except Exception as e:
             logger.error(f"Error generating risk analysis: {str(e)}")
-            return self._fallback_risk_analysis(clause_text)
+            return [self._fallback_risk_analysis(clause_text) for clause_text in clause_texts]
     
-    def _create_legal_risk_prompt(self, clause_text: str, precedents: List[Dict], context: Dict) -> str:
-        """Create a legal-specific prompt with precedent context"""
+    @staticmethod
+    def _create_legal_risk_prompt(clause_text: str, precedents: List[Dict], context: Dict, classify: bool = False) -> str:
+        """Create a legal-specific prompt with precedent context (ending at "Risk Level:" when classifying)"""
         precedent_context = ""
         if precedents:
             precedent_context = "\nSimilar legal precedents:\n"
@@ -252,23 +624,19 @@ class RAGEngine:
                 domain = precedent['metadata'].get('contract_domain', 'general')
                 precedent_context += f"{i}. [{risk} Risk, {domain} domain] {precedent['text'][:100]}...\n"
         
-        prompt = f"""<s>[INST] You are a legal AI assistant specializing in contract risk analysis. 
-        
-Analyze the following contract clause for legal and financial risks:
-
+        # Fixed prefix first so backends can reuse its KV cache; per-clause parts come last
+        prompt = LEGAL_RISK_PROMPT_PREFIX + f"""CONTEXT: {context.get('contract_type', 'General contract')}
+{precedent_context}
 CLAUSE TO ANALYZE:
 "{clause_text}"
 
-CONTEXT: {context.get('contract_type', 'General contract')}
-
-{precedent_context}
-
-Based on similar legal precedents and your expertise, classify this clause as:
-- RED (High Risk): Significant legal/financial exposure, immediate attention needed
-- AMBER (Medium Risk): Requires careful review and consideration
-- GREEN (Low Risk): Standard terms, minimal risk
-
-Provide:
+"""
+        
+        if classify:
+            # Score the label as the very next token instead of generating free text
+            prompt += "Answer with the risk level only. [/INST] Risk Level:"
+        else:
+            prompt += """Provide:
 1. Risk Level: [RED/AMBER/GREEN]
 2. Explanation: Brief reasoning (max 100 words)
 3. Confidence: [High/Medium/Low]
@@ -281,8 +649,11 @@ Analysis: [/INST]"""
         """Parse enhanced LLM response with precedent context"""
         response_lower = response.lower()
         
-        # Extract risk level
-        if "red" in response_lower and "risk" in response_lower:
+        # Extract risk level, preferring the requested "Risk Level: X" field
+        stated_level = re.search(r"risk level:\W*(red|amber|green)", response_lower)
+        if stated_level:
+            risk_level = stated_level.group(1).upper()
+        elif "red" in response_lower and "risk" in response_lower:
             risk_level = "RED"
         elif "amber" in response_lower or "yellow" in response_lower:
             risk_level = "AMBER"  
@@ -310,14 +681,25 @@ Analysis: [/INST]"""
             confidence = min(0.95, confidence + (avg_similarity * 0.1))
         
         # Extract explanation
-        explanation_parts = response.split("Analysis:")
-        if len(explanation_parts) > 1:
-            explanation = explanation_parts[-1].strip()[:200]
+        stated_explanation = re.search(r"explanation:\s*(.+)", response, re.IGNORECASE)
+        if stated_explanation:
+            explanation = stated_explanation.group(1).strip()[:200]
+        elif response.strip():
+            explanation = response.strip()[:200]
         else:
             explanation = f"Legal analysis indicates {risk_level} risk level based on clause content and similar precedents."
         
         return risk_level, explanation, round(confidence, 2)
     
+    def _label_probabilities_to_analysis(self, probabilities: Dict[str, float], precedents: List[Dict]) -> tuple:
+        """Risk level, explanation and calibrated confidence from label probabilities"""
+        risk_level = max(probabilities, key=probabilities.get)
+        scores = ", ".join(f"{label} {probability:.0%}" for label, probability in probabilities.items())
+        explanation = f"Model label probabilities: {scores}."
+        if precedents:
+            explanation += f" Scored against {len(precedents)} similar legal precedents."
+        return risk_level, explanation, round(probabilities[risk_level], 2)
+    
     def _precedent_based_analysis(self, clause_text: str, precedents: List[Dict]) -> tuple:
         """Enhanced fallback analysis using legal precedents"""
         if not precedents:
@@ -1,16 +1,90 @@
-from typing import Dict, List, Any
+from typing import Collection, Dict, List, Any, Optional, Tuple
+import hashlib
+import json
 import logging
+import os
+from .inference_worker import InferenceUnavailable
 from .rag_engine import RAGEngine
+from .explanations import RENDERERS, explanation_facts, render_field, render_rule_explanation
+from .metrics import track_stage
+from .revision_diff import diff_revisions
+from .tracing import Span, batch_span, resume_trace, span
 
 logger = logging.getLogger(__name__)
 
+# Fields of a clause classification, in response order; the core fields are always present.
+# The prose fields are rendered from "facts" on request (see models/explanations.py).
+CLASSIFICATION_FIELDS = (
+    "risk_level", "confidence", "explanation", "legal_reasoning", "recommendations",
+    "precedents", "rule_based", "rag_based", "clause_text", "gating", "facts"
+)
+CORE_FIELDS = ("risk_level", "confidence")
+PROSE_FIELDS = tuple(RENDERERS)
+VIEWS = {"minimal": CORE_FIELDS, "compact": CORE_FIELDS + ("explanation",), "full": CLASSIFICATION_FIELDS}
+
+
+def resolve_fields(view: Optional[str] = None, fields: Optional[str] = None) -> Tuple[str, ...]:
+    """Classification fields for a view name or a comma-separated field list (which wins); raises ValueError"""
+    if fields:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(CLASSIFICATION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} (available: {', '.join(CLASSIFICATION_FIELDS)})")
+        return tuple(name for name in CLASSIFICATION_FIELDS if name in requested or name in CORE_FIELDS)
+    if view not in (None, *VIEWS):
+        raise ValueError(f"view must be one of {', '.join(VIEWS)}")
+    return VIEWS[view or "full"]
+
+
+def project_classification(classification: Dict[str, Any], fields: Collection[str]) -> Dict[str, Any]:
+    """Classification reduced to ``fields``, rendering requested prose fields from its facts when not stored"""
+    projected = {name: value for name, value in classification.items() if name in fields}
+    for name in PROSE_FIELDS:
+        if name in fields and name not in projected:
+            value = render_field(name, classification)
+            if value is not None:
+                projected[name] = value
+    return projected
+
+
+def with_facts(fields: Collection[str]) -> Tuple[str, ...]:
+    """``fields`` plus "facts", so prose (e.g. the redlined HTML's explanations) can be rendered later"""
+    return tuple(name for name in CLASSIFICATION_FIELDS if name in fields or name == "facts")
+
+
 class RedliningClassifier:
-    def __init__(self, rag_engine: RAGEngine):
+    def __init__(self, rag_engine: RAGEngine, cascade: bool = None, gate_confidence: float = None,
+                 gate_similarity: float = None, gate_strength: float = None):
         self.rag_engine = rag_engine
         self.risk_criteria = self._initialize_risk_criteria()
         # Updated weights: More emphasis on RAG/precedent-based analysis
         self.rule_weight = 0.4  # Reduced from 0.7
         self.rag_weight = 0.6   # Increased from 0.3
+        # Cascade: rules and precedents first, the LLM only where they are not decisive
+        if cascade is None:
+            cascade = os.getenv("LLM_CASCADE", "true").lower() in ("1", "true", "yes")
+        self.cascade = cascade
+        self.gate_confidence = gate_confidence if gate_confidence is not None else float(os.getenv("LLM_GATE_CONFIDENCE", "0.8"))
+        self.gate_similarity = gate_similarity if gate_similarity is not None else float(os.getenv("LLM_GATE_SIMILARITY", "0.6"))
+        self.gate_strength = gate_strength if gate_strength is not None else float(os.getenv("LLM_GATE_STRENGTH", "0.5"))
+    
+    def config_version(self) -> str:
+        """Short hash of the settings that affect classification results (keys stored analyses)"""
+        llm_backend = self.rag_engine.llm_backend
+        settings = {
+            "llm_backend": getattr(llm_backend, "name", "none"),
+            "llm_model": getattr(llm_backend, "model_name", None),
+            "llm_mode": self.rag_engine.llm_mode,
+            "label_temperature": self.rag_engine.label_temperature,
+            "embedding_backend": self.rag_engine.loaded_embedding_backend(),
+            "hybrid_search": self.rag_engine.hybrid_search,
+            "cascade": self.cascade,
+            "gate_confidence": self.gate_confidence,
+            "gate_similarity": self.gate_similarity,
+            "gate_strength": self.gate_strength,
+            "weights": [self.rule_weight, self.rag_weight]
+        }
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
     
     def _initialize_risk_criteria(self) -> Dict:
         """Initialize comprehensive risk assessment criteria"""
@@ -70,39 +144,129 @@ class RedliningClassifier:
             }
         }
     
-    def classify_clause(self, clause_text: str, context: Dict = None) -> Dict[str, Any]:
-        """Enhanced clause classification using legal precedents"""
+    def classify_clause(self, clause_text: str, context: Dict = None, rag_result: Dict = None,
+                        precedents: List[Dict] = None, rule_based_result: Dict = None,
+                        fields: Collection[str] = CLASSIFICATION_FIELDS) -> Dict[str, Any]:
+        """Enhanced clause classification using legal precedents (stage results may be precomputed in a batch).
+        
+        Only ``fields`` are returned. "facts" (the matched terms and precedent consensus that explanation,
+        legal_reasoning and recommendations are rendered from) are only computed for those fields or "facts".
+        Without ``rag_result`` the LLM is called only if the cascade gate opens ("gating" says why).
+        """
         try:
             # Get initial rule-based classification
-            rule_based_result = self._rule_based_classification(clause_text)
-            
-            # Enhanced RAG analysis with legal precedents
-            rag_result = self.rag_engine.generate_risk_analysis(clause_text, context or {})
+            if rule_based_result is None:
+                with span("rule"), track_stage("rule_matching"):
+                    rule_based_result = self._rule_based_classification(clause_text)
             
             # Find legal precedents for this clause
-            precedents = self.rag_engine.find_legal_precedents(clause_text, n_results=3)
+            if precedents is None:
+                with span("retrieval"):
+                    precedents = self.rag_engine.find_legal_precedents(clause_text, n_results=3)
             
-            # Combine results with enhanced logic
-            final_result = self._combine_classifications_enhanced(rule_based_result, rag_result, precedents)
+            # Enhanced RAG analysis with legal precedents, behind the same gate as whole documents
+            gate = None
+            if rag_result is None:
+                rag_results, gating = self._gated_rag_analysis([clause_text], [rule_based_result], [precedents], context=context)
+                rag_result, gate = rag_results[0], gating[0]
             
-            # Generate legal reasoning
-            legal_reasoning = self._generate_legal_reasoning(clause_text, precedents, final_result)
+            # Combine results with enhanced logic
+            with span("combine"):
+                final_result = self._combine_classifications_enhanced(rule_based_result, rag_result, precedents)
             
-            return {
-                "clause_text": clause_text,
+            classification = {
                 "risk_level": final_result["risk_level"],
-                "explanation": final_result["explanation"],
-                "confidence": final_result["confidence"],
-                "legal_reasoning": legal_reasoning,
-                "precedents": precedents[:2],  # Top 2 precedents
-                "rule_based": rule_based_result,
-                "rag_based": rag_result,
-                "recommendations": self._generate_enhanced_recommendations(final_result["risk_level"], clause_text, precedents)
+                "confidence": final_result["confidence"]
             }
+            if "facts" in fields or any(name in fields for name in RENDERERS):
+                with span("explanation"):
+                    facts = explanation_facts(clause_text, rule_based_result, rag_result, precedents)
+                    for name, render in RENDERERS.items():
+                        if name in fields:
+                            classification[name] = render(final_result["risk_level"], facts)
+                if "facts" in fields:
+                    classification["facts"] = facts
+            
+            if "precedents" in fields:
+                classification["precedents"] = precedents[:2]  # Top 2 precedents
+            if "rule_based" in fields:
+                # Its prose is rendered from the matched keywords only when the rule result is returned
+                classification["rule_based"] = {**rule_based_result, "explanation": render_rule_explanation(rule_based_result)}
+            if "rag_based" in fields:
+                classification["rag_based"] = rag_result
+            if "clause_text" in fields:
+                classification["clause_text"] = clause_text
+            if gate is not None and "gating" in fields:
+                classification["gating"] = gate
+            return classification
             
+        except InferenceUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error classifying clause: {str(e)}")
-            return self._default_classification(clause_text)
+            return project_classification(self._default_classification(clause_text), fields)
+    
+    def _gated_rag_analysis(self, clause_texts: List[str], rule_results: List[Dict],
+                            precedents: List[List[Dict]], clause_traces: List[Span] = None,
+                            context: Dict = None) -> tuple:
+        """RAG results per clause, calling the LLM (in one batch) only where the cascade gate opens.
+        
+        With ``clause_traces`` each clause's tree gets a share of the batched stages and a "gate" span
+        recording whether (and why) the LLM was called for it.
+        """
+        traces = clause_traces or [None] * len(clause_texts)
+        if not self.cascade or not self.rag_engine.llm_backend:
+            reason = "cascade disabled" if self.rag_engine.llm_backend else "no LLM backend"
+            with batch_span("rag_analysis", clause_traces):
+                rag_results = self.rag_engine.generate_risk_analysis_batch(clause_texts, context, precedents=precedents)
+            gating = [{"llm_called": self.rag_engine.llm_backend is not None, "reason": reason} for _ in clause_texts]
+            for clause_trace, gate in zip(traces, gating):
+                with resume_trace(clause_trace), span("gate", **gate):
+                    pass
+            return rag_results, gating
+        
+        # Cheap stage: precedent-weighted analysis, no LLM
+        with batch_span("rag_analysis", clause_traces):
+            rag_results = self.rag_engine.generate_risk_analysis_batch(clause_texts, context, precedents=precedents, use_llm=False)
+        
+        gating = []
+        for rule_based, precedent_result, clause_precedents, clause_trace in zip(rule_results, rag_results, precedents, traces):
+            with resume_trace(clause_trace), span("gate") as gate_span:
+                reason = self._llm_gate_reason(rule_based, precedent_result, clause_precedents)
+                gate = {"llm_called": reason is not None, "reason": reason or "rules and precedents agree"}
+                if gate_span is not None:
+                    gate_span.attributes = dict(gate)
+            gating.append(gate)
+        
+        selected = [i for i, gate in enumerate(gating) if gate["llm_called"]]
+        if selected:
+            with batch_span("llm_analysis", [clause_traces[i] for i in selected] if clause_traces else None):
+                llm_results = self.rag_engine.generate_risk_analysis_batch(
+                    [clause_texts[i] for i in selected], context,
+                    precedents=[precedents[i] for i in selected]
+                )
+            for i, llm_result in zip(selected, llm_results):
+                rag_results[i] = llm_result
+        
+        return rag_results, gating
+    
+    def _llm_gate_reason(self, rule_based: Dict, precedent_result: Dict, precedents: List[Dict]) -> Optional[str]:
+        """Why the LLM is needed for this clause, or None when rules and precedents are decisive"""
+        if not precedents:
+            return "no precedents"
+        # A rule result without any matched keyword is only a default, not a conflicting signal
+        if rule_based.get("matched_keywords") and rule_based["risk_level"] != precedent_result["risk_level"]:
+            return "rules and precedents disagree"
+        if max(p.get('similarity', 0) for p in precedents) < self.gate_similarity:
+            return "no strongly similar precedent"
+        if precedent_result.get("confidence", 0) < self.gate_confidence:
+            return "low precedent consensus"
+        # Agreement among weak precedents (short, plain-language clauses) is not enough on its own
+        consensus = [p['metadata'].get('legal_precedent', 0.5) for p in precedents
+                     if p['metadata'].get('risk_level') == precedent_result["risk_level"]]
+        if not consensus or sum(consensus) / len(consensus) < self.gate_strength:
+            return "weak precedents"
+        return None
     
     def _rule_based_classification(self, clause_text: str) -> Dict[str, Any]:
         """Perform rule-based classification using keywords and patterns"""
@@ -130,8 +294,7 @@ class RedliningClassifier:
             "risk_level": risk_level,
             "confidence": confidence,
             "scores": scores,
-            "matched_keywords": matched_keywords[risk_level],
-            "explanation": self._generate_rule_explanation(risk_level, matched_keywords[risk_level])
+            "matched_keywords": matched_keywords[risk_level]
         }
     
     def _combine_classifications_enhanced(self, rule_based: Dict, rag_based: Dict, precedents: List[Dict]) -> Dict[str, Any]:
@@ -183,206 +346,12 @@ class RedliningClassifier:
             if precedent_risks.count(final_risk) > len(precedent_risks) / 2:
                 base_confidence = min(0.95, base_confidence + 0.1)
         
-        # Create enhanced explanation
-        enhanced_explanation = self._create_enhanced_explanation(rule_based, rag_based, precedents, final_risk)
-        
         return {
             "risk_level": final_risk,
             "confidence": round(base_confidence, 2),
-            "explanation": enhanced_explanation,
             "weighted_priority": round(weighted_priority, 2)
         }
     
-    def _generate_legal_reasoning(self, clause_text: str, precedents: List[Dict], final_result: Dict) -> str:
-        """Generate detailed legal reasoning based on precedents and analysis"""
-        reasoning_parts = []
-        
-        # Start with risk assessment
-        risk_level = final_result["risk_level"]
-        risk_descriptions = {
-            "RED": "⚠️ **HIGH RISK**: This clause creates significant legal or financial exposure",
-            "AMBER": "⚡ **MEDIUM RISK**: This clause requires careful legal consideration", 
-            "GREEN": "✅ **LOW RISK**: This clause appears to follow standard practices"
-        }
-        
-        reasoning_parts.append(risk_descriptions[risk_level])
-        
-        # Add precedent analysis
-        if precedents:
-            similar_risks = [p['metadata'].get('risk_level', 'GREEN') for p in precedents]
-            risk_consensus = max(set(similar_risks), key=similar_risks.count) if similar_risks else 'GREEN'
-            consensus_pct = similar_risks.count(risk_consensus) / len(similar_risks) * 100
-            
-            reasoning_parts.append(f"**Legal Precedent Analysis**: {len(precedents)} similar clauses analyzed")
-            reasoning_parts.append(f"• {consensus_pct:.0f}% of similar clauses are classified as {risk_consensus} risk")
-            
-            # Add domain-specific insights
-            domains = [p['metadata'].get('contract_domain', 'general') for p in precedents]
-            most_common_domain = max(set(domains), key=domains.count) if domains else 'general'
-            reasoning_parts.append(f"• Most common context: {most_common_domain} contracts")
-            
-            # Highlight key precedent
-            best_precedent = max(precedents, key=lambda x: x.get('similarity', 0))
-            if best_precedent['similarity'] > 0.8:
-                reasoning_parts.append(f"• **Strong precedent match** (similarity: {best_precedent['similarity']:.1%})")
-        
-        # Add specific legal concerns
-        clause_lower = clause_text.lower()
-        legal_concerns = []
-        
-        if any(term in clause_lower for term in ['unlimited', 'personal guarantee', 'joint and several']):
-            legal_concerns.append("Unlimited liability exposure")
-        if any(term in clause_lower for term in ['indemnify', 'hold harmless']):
-            legal_concerns.append("Indemnification obligations") 
-        if any(term in clause_lower for term in ['non-compete', 'restraint', 'exclusivity']):
-            legal_concerns.append("Business operation restrictions")
-        if any(term in clause_lower for term in ['termination for convenience', 'unilateral']):
-            legal_concerns.append("Unbalanced termination rights")
-        
-        if legal_concerns:
-            reasoning_parts.append(f"**Key Legal Concerns**: {', '.join(legal_concerns)}")
-        
-        return " • ".join(reasoning_parts)
-    
-    def _create_enhanced_explanation(self, rule_based: Dict, rag_based: Dict, precedents: List[Dict], final_risk: str) -> str:
-        """Create comprehensive explanation combining all analyses"""
-        rule_explanation = rule_based.get("explanation", "")
-        rag_explanation = rag_based.get("explanation", "")
-        
-        base_explanations = {
-            "RED": "⚠️ HIGH RISK: This clause poses significant legal or financial risks.",
-            "AMBER": "⚡ MEDIUM RISK: This clause requires careful consideration and review.", 
-            "GREEN": "✅ LOW RISK: This clause appears to be standard and acceptable."
-        }
-        
-        # Start with base explanation
-        explanation = base_explanations[final_risk]
-        
-        # Add rule-based insights
-        if rule_based.get("matched_keywords"):
-            keywords = rule_based["matched_keywords"][:3]  # Top 3
-            explanation += f" Keywords detected: {', '.join(keywords)}."
-        
-        # Add precedent insights
-        if precedents:
-            precedent_count = len(precedents)
-            avg_similarity = sum(p.get('similarity', 0) for p in precedents) / precedent_count
-            explanation += f" Based on {precedent_count} legal precedents (avg. similarity: {avg_similarity:.1%})."
-        
-        # Add RAG insights if different
-        if rag_explanation and len(rag_explanation) > 20:
-            explanation += f" AI analysis: {rag_explanation[:100]}..."
-        
-        return explanation
-    
-    def _generate_enhanced_recommendations(self, risk_level: str, clause_text: str, precedents: List[Dict]) -> List[str]:
-        """Generate enhanced recommendations based on risk level and precedents"""
-        base_recommendations = {
-            "RED": [
-                "🔍 **Immediate legal review required**",
-                "💼 Consider negotiating alternative terms",
-                "⚖️ Assess potential financial exposure",
-                "📋 Document all risk factors"
-            ],
-            "AMBER": [
-                "📖 **Careful review recommended**",
-                "🔄 Consider clarifying ambiguous language",
-                "💭 Understand full implications", 
-                "⏰ Set appropriate timelines"
-            ],
-            "GREEN": [
-                "✓ **Standard clause - generally acceptable**",
-                "👀 Quick consistency check recommended",
-                "📝 Ensure alignment with business terms"
-            ]
-        }
-        
-        recommendations = base_recommendations.get(risk_level, [])
-        
-        # Add precedent-based recommendations
-        if precedents:
-            similar_domains = [p['metadata'].get('contract_domain', 'general') for p in precedents]
-            most_common_domain = max(set(similar_domains), key=similar_domains.count)
-            
-            if most_common_domain != 'general':
-                recommendations.append(f"📊 **Industry insight**: Consider {most_common_domain} industry standards")
-            
-            # Add specific recommendations based on precedent analysis
-            high_risk_precedents = [p for p in precedents if p['metadata'].get('risk_level') == 'RED']
-            if high_risk_precedents and risk_level != 'RED':
-                recommendations.append("⚠️ **Warning**: Similar clauses have been flagged as high-risk elsewhere")
-        
-        # Add clause-specific recommendations
-        clause_lower = clause_text.lower()
-        if 'liability' in clause_lower:
-            recommendations.append("💰 **Liability Focus**: Consider liability caps and insurance requirements")
-        if 'termination' in clause_lower:
-            recommendations.append("📅 **Termination Review**: Ensure balanced notice periods and conditions")
-        if 'confidential' in clause_lower:
-            recommendations.append("🔒 **Confidentiality**: Verify scope and duration are reasonable")
-        
-        return recommendations[:6]  # Limit to 6 recommendations
-    
-    def _generate_rule_explanation(self, risk_level: str, matched_keywords: List[str]) -> str:
-        """Generate explanation for rule-based classification"""
-        if not matched_keywords:
-            return "No specific risk indicators found in standard keyword analysis."
-        
-        keyword_text = ", ".join(matched_keywords[:3])  # Show top 3 keywords
-        
-        explanations = {
-            "RED": f"High-risk terms detected: {keyword_text}. Requires immediate legal review and negotiation.",
-            "AMBER": f"Medium-risk terms identified: {keyword_text}. Careful review and potential modification recommended.",
-            "GREEN": f"Standard terms found: {keyword_text}. Generally acceptable with minimal risk."
-        }
-        
-        return explanations.get(risk_level, "Standard contractual language.")
-    
-    def _create_combined_explanation(self, rule_based: Dict, rag_based: Dict, final_risk: str) -> str:
-        """Create comprehensive explanation combining both analyses"""
-        rule_explanation = rule_based.get("explanation", "")
-        rag_explanation = rag_based.get("explanation", "")
-        
-        base_explanations = {
-            "RED": "⚠️ HIGH RISK: This clause poses significant legal or financial risks.",
-            "AMBER": "⚡ MEDIUM RISK: This clause requires careful consideration and review.", 
-            "GREEN": "✅ LOW RISK: This clause appears to be standard and acceptable."
-        }
-        
-        combined = f"{base_explanations[final_risk]} {rule_explanation}"
-        
-        if rag_explanation and rag_explanation != rule_explanation:
-            combined += f" Additional analysis: {rag_explanation[:100]}..."
-        
-        return combined
-    
-    def _generate_recommendations(self, risk_level: str, clause_text: str) -> List[str]:
-        """Generate specific recommendations based on risk level"""
-        recommendations = {
-            "RED": [
-                "🔍 Immediate legal review required",
-                "💼 Consider negotiating alternative terms",
-                "⚖️ Assess potential financial exposure",
-                "📋 Document all risk factors",
-                "🤝 Seek mutual liability caps"
-            ],
-            "AMBER": [
-                "📖 Review clause carefully",
-                "🔄 Consider clarifying language",
-                "💭 Understand implications fully",
-                "⏰ Set appropriate timelines",
-                "📞 Consult legal counsel if needed"
-            ],
-            "GREEN": [
-                "✓ Standard clause - generally acceptable",
-                "👀 Quick review for consistency",
-                "📝 Ensure alignment with business terms",
-                "🔗 Check integration with other clauses"
-            ]
-        }
-        
-        return recommendations.get(risk_level, ["Review clause as needed"])
-    
     def _default_classification(self, clause_text: str) -> Dict[str, Any]:
         """Enhanced default classification when analysis fails"""
         return {
@@ -401,42 +370,188 @@ class RedliningClassifier:
             ]
         }
     
-    def classify_document(self, clauses: List[Dict]) -> Dict[str, Any]:
-        """Classify all clauses in a document"""
+    def classify_document(self, clauses: List[Dict], trace: bool = False,
+                          fields: Collection[str] = CLASSIFICATION_FIELDS) -> Dict[str, Any]:
+        """Classify all clauses in a document (returning only ``fields``), optionally attaching a per-clause timing trace"""
         try:
             classified_clauses = []
-            risk_summary = {"RED": 0, "AMBER": 0, "GREEN": 0}
+            stage_totals = {}
+            clause_texts = [clause["text"] for clause in clauses]
             
-            for clause in clauses:
-                classification = self.classify_clause(clause["text"])
-                classified_clauses.append({
-                    **clause,
-                    "classification": classification
-                })
-                risk_summary[classification["risk_level"]] += 1
+            # Cheap stages for every clause, then one batched LLM call for the clauses that need it.
+            # Per-clause work is timed in each clause's tree; batched stages are credited to it in equal shares
+            clause_traces = [Span("clause") for _ in clauses] if trace else None
+            traces = clause_traces or [None] * len(clauses)
+            rule_results = []
+            for clause_text, clause_trace in zip(clause_texts, traces):
+                with resume_trace(clause_trace), span("rule"), track_stage("rule_matching"):
+                    rule_results.append(self._rule_based_classification(clause_text))
+            precedents = []
+            for clause_text, clause_trace in zip(clause_texts, traces):
+                with resume_trace(clause_trace), span("retrieval"):
+                    precedents.append(self.rag_engine.find_legal_precedents(clause_text, n_results=3))
+            rag_results, gating = self._gated_rag_analysis(clause_texts, rule_results, precedents, clause_traces)
             
-            # Calculate overall document risk
-            total_clauses = len(classified_clauses)
-            risk_percentage = {
-                level: round((count / total_clauses) * 100, 1) 
-                for level, count in risk_summary.items()
+            for clause, rule_based, clause_precedents, rag_result, gate, clause_trace in zip(
+                clauses, rule_results, precedents, rag_results, gating, traces
+            ):
+                if trace:
+                    with resume_trace(clause_trace):
+                        classification = self.classify_clause(
+                            clause["text"], rag_result=rag_result, precedents=clause_precedents,
+                            rule_based_result=rule_based, fields=fields
+                        )
+                    clause_trace.duration = sum(child.duration for child in clause_trace.children)
+                    for stage, ms in clause_trace.stage_totals().items():
+                        stage_totals[stage] = stage_totals.get(stage, 0.0) + ms
+                    if "gating" in fields:
+                        classification["gating"] = gate
+                    classified_clauses.append({
+                        **clause,
+                        "classification": classification,
+                        "trace": clause_trace.to_dict()
+                    })
+                else:
+                    classification = self.classify_clause(
+                        clause["text"], rag_result=rag_result, precedents=clause_precedents,
+                        rule_based_result=rule_based, fields=fields
+                    )
+                    if "gating" in fields:
+                        classification["gating"] = gate
+                    classified_clauses.append({
+                        **clause,
+                        "classification": classification
+                    })
+            
+            result = {
+                **self._summarize_document(classified_clauses),
+                "llm_gating": self._gating_summary(gating)
             }
+            if trace:
+                result["stage_totals_ms"] = {stage: round(ms, 3) for stage, ms in sorted(stage_totals.items())}
+            
+            return result
             
-            overall_risk = self._calculate_overall_risk(risk_summary)
+        except Exception as e:
+            logger.error(f"Error classifying document: {str(e)}")
+            raise
+    
+    def classify_revision(self, clauses: List[Dict], previous_result: Dict, trace: bool = False,
+                          fields: Collection[str] = CLASSIFICATION_FIELDS) -> Dict[str, Any]:
+        """Re-analyze a revised document, classifying only clauses that are new or edited since ``previous_result``.
+        
+        ``previous_result`` must hold at least ``fields`` for every clause.
+        """
+        try:
+            previous_clauses = previous_result["classified_clauses"]
+            with span("revision_diff"), track_stage("revision_diff"):
+                diff = diff_revisions([clause["text"] for clause in previous_clauses], [clause["text"] for clause in clauses])
+            
+            classified_clauses = [None] * len(clauses)
+            for previous_index, current_index in diff["unchanged"]:
+                classified_clauses[current_index] = {
+                    **clauses[current_index],
+                    "classification": project_classification(previous_clauses[previous_index]["classification"], fields),
+                    "revision_status": "unchanged"
+                }
+            
+            modified_from = {current_index: previous_index for previous_index, current_index, _ in diff["modified"]}
+            changed = sorted(diff["added"] + list(modified_from))
+            fresh = self.classify_document([clauses[i] for i in changed], trace=trace, fields=fields) if changed else None
+            for current_index, item in zip(changed, fresh["classified_clauses"] if fresh else []):
+                item["revision_status"] = "modified" if current_index in modified_from else "added"
+                classified_clauses[current_index] = item
+            
+            # Per-clause risk changes
+            changes = []
+            for previous_index, current_index, similarity in diff["modified"]:
+                changes.append({
+                    "status": "modified",
+                    "clause_index": current_index,
+                    "similarity": similarity,
+                    "previous_risk": previous_clauses[previous_index]["classification"]["risk_level"],
+                    "risk_level": classified_clauses[current_index]["classification"]["risk_level"],
+                    "text": clauses[current_index]["text"][:200]
+                })
+            for current_index in diff["added"]:
+                changes.append({
+                    "status": "added",
+                    "clause_index": current_index,
+                    "previous_risk": None,
+                    "risk_level": classified_clauses[current_index]["classification"]["risk_level"],
+                    "text": clauses[current_index]["text"][:200]
+                })
+            for previous_index in diff["removed"]:
+                changes.append({
+                    "status": "removed",
+                    "clause_index": None,
+                    "previous_risk": previous_clauses[previous_index]["classification"]["risk_level"],
+                    "risk_level": None,
+                    "text": previous_clauses[previous_index]["text"][:200]
+                })
             
-            return {
-                "classified_clauses": classified_clauses,
-                "risk_summary": risk_summary,
-                "risk_percentage": risk_percentage,
-                "overall_risk": overall_risk,
-                "total_clauses": total_clauses,
-                "recommendations": self._generate_document_recommendations(overall_risk, risk_summary)
+            result = self._summarize_document(classified_clauses)
+            result["llm_gating"] = fresh["llm_gating"] if fresh else self._gating_summary([])
+            result["revision"] = {
+                "unchanged": len(diff["unchanged"]),
+                "modified": len(diff["modified"]),
+                "added": len(diff["added"]),
+                "removed": len(diff["removed"]),
+                "reclassified": len(changed),
+                "previous_overall_risk": previous_result["overall_risk"],
+                "overall_risk_changed": previous_result["overall_risk"] != result["overall_risk"],
+                "risk_summary_delta": {
+                    level: result["risk_summary"][level] - previous_result["risk_summary"].get(level, 0)
+                    for level in result["risk_summary"]
+                },
+                "changes": changes
             }
+            if trace:
+                result["stage_totals_ms"] = fresh["stage_totals_ms"] if fresh else {}
+            
+            return result
             
         except Exception as e:
-            logger.error(f"Error classifying document: {str(e)}")
+            logger.error(f"Error classifying revision: {str(e)}")
             raise
     
+    def _summarize_document(self, classified_clauses: List[Dict]) -> Dict[str, Any]:
+        """Risk counts, percentages, overall risk and recommendations for classified clauses"""
+        risk_summary = {"RED": 0, "AMBER": 0, "GREEN": 0}
+        for clause in classified_clauses:
+            risk_summary[clause["classification"]["risk_level"]] += 1
+        
+        # Calculate overall document risk
+        total_clauses = len(classified_clauses)
+        risk_percentage = {
+            level: round((count / total_clauses) * 100, 1) if total_clauses else 0.0
+            for level, count in risk_summary.items()
+        }
+        
+        overall_risk = self._calculate_overall_risk(risk_summary)
+        
+        return {
+            "classified_clauses": classified_clauses,
+            "risk_summary": risk_summary,
+            "risk_percentage": risk_percentage,
+            "overall_risk": overall_risk,
+            "total_clauses": total_clauses,
+            "recommendations": self._generate_document_recommendations(overall_risk, risk_summary)
+        }
+    
+    def _gating_summary(self, gating: List[Dict]) -> Dict[str, Any]:
+        """LLM call count and rate for a document, with the reasons the gate opened"""
+        llm_calls = sum(1 for gate in gating if gate["llm_called"])
+        reasons = {}
+        for gate in gating:
+            reasons[gate["reason"]] = reasons.get(gate["reason"], 0) + 1
+        return {
+            "mode": "cascade" if self.cascade else "always",
+            "llm_calls": llm_calls,
+            "llm_call_rate": round(llm_calls / len(gating), 3) if gating else 0.0,
+            "reasons": reasons
+        }
+    
     def _calculate_overall_risk(self, risk_summary: Dict[str, int]) -> str:
         """Calculate overall document risk level"""
         total = sum(risk_summary.values())
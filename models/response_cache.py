@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from typing import Any, Optional
+import hashlib
+import json
+import threading
+import time
+
+from .metrics import record_cache_lookup
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire ``ttl_seconds`` after being stored.
+
+    Keys are digests of the request parameters (see ``key``), so long inputs
+    such as full clause texts are hashed once instead of being kept around.
+    Lookups are counted under ``name`` in the cache hit-ratio metrics.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Stable digest of JSON-serializable request parameters"""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup(self.name, entry is not None)
+        return None if entry is None else entry[1]
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
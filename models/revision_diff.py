@@ -0,0 +1,91 @@
+from difflib import SequenceMatcher
+from typing import Dict, List
+import hashlib
+import re
+
+
+def clause_hash(text: str) -> str:
+    """Content hash of a clause, insensitive to case and whitespace changes"""
+    normalized = re.sub(r"\s+", " ", text).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def diff_revisions(previous: List[str], current: List[str], fuzzy_threshold: float = 0.8,
+                   window: int = 5) -> Dict[str, List]:
+    """Align the clauses of a revised document with the previous version.
+
+    Clauses are aligned by content hash with difflib, so unchanged runs cost
+    one hash each. Clauses that moved are then matched by hash, and only the
+    remaining edited regions are compared word-by-word against the previous
+    clauses near the same position (``window``). The cost therefore grows
+    with the size of the edit rather than the document. Returns index lists:
+
+        unchanged: [(previous_index, current_index)]
+        modified:  [(previous_index, current_index, similarity)]
+        added:     [current_index]
+        removed:   [previous_index]
+    """
+    previous_hashes = [clause_hash(text) for text in previous]
+    current_hashes = [clause_hash(text) for text in current]
+
+    unchanged = []
+    blocks = []  # (previous indexes, current indexes) of each non-equal region
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, previous_hashes, current_hashes, autojunk=False).get_opcodes():
+        if tag == "equal":
+            unchanged.extend(zip(range(i1, i2), range(j1, j2)))
+        else:
+            blocks.append((list(range(i1, i2)), list(range(j1, j2))))
+
+    # Moved clauses: identical text in a different region
+    leftover_previous: Dict[str, List[int]] = {}
+    for previous_indexes, _ in blocks:
+        for index in previous_indexes:
+            leftover_previous.setdefault(previous_hashes[index], []).append(index)
+    moved_previous = set()
+    moved_current = set()
+    for _, current_indexes in blocks:
+        for index in current_indexes:
+            candidates = leftover_previous.get(current_hashes[index])
+            if candidates:
+                previous_index = candidates.pop(0)
+                unchanged.append((previous_index, index))
+                moved_previous.add(previous_index)
+                moved_current.add(index)
+
+    # Edited clauses: best word-level similarity near the same position within each region
+    modified, added, removed = [], [], []
+    for previous_indexes, current_indexes in blocks:
+        previous_indexes = [i for i in previous_indexes if i not in moved_previous]
+        current_indexes = [j for j in current_indexes if j not in moved_current]
+        available = set(previous_indexes)
+        scale = len(previous_indexes) / len(current_indexes) if current_indexes else 0
+
+        for position, current_index in enumerate(current_indexes):
+            expected = int(position * scale)
+            nearby = previous_indexes[max(0, expected - window):expected + window + 1]
+            matcher = SequenceMatcher(None, autojunk=False)
+            matcher.set_seq2(current[current_index].split())
+            best_index, best_ratio = None, fuzzy_threshold
+            for previous_index in nearby:
+                if previous_index not in available:
+                    continue
+                matcher.set_seq1(previous[previous_index].split())
+                if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= best_ratio:
+                    best_index, best_ratio = previous_index, ratio
+            if best_index is None:
+                added.append(current_index)
+            else:
+                available.discard(best_index)
+                modified.append((best_index, current_index, round(best_ratio, 3)))
+
+        removed.extend(i for i in previous_indexes if i in available)
+
+    return {
+        "unchanged": sorted(unchanged, key=lambda pair: pair[1]),
+        "modified": modified,
+        "added": added,
+        "removed": sorted(removed),
+    }
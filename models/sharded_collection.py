@@ -0,0 +1,172 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+_QUERY_FIELDS = ("ids", "distances", "documents", "metadatas", "embeddings")
+
+
+def shard_index(item_id: str, num_shards: int) -> int:
+    """Stable hash partition of an id (Python's hash() is salted per process)"""
+    digest = hashlib.blake2b(item_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % num_shards
+
+
+class ShardedCollection:
+    """Chroma collection facade over N hash-partitioned shard collections.
+
+    Items are routed by id, so adds, gets and deletes by id touch one shard
+    each. Similarity queries fan out to every shard in parallel threads and
+    the per-shard top-k lists are merged with a heap. Supports the subset of
+    the Chroma collection API used by ``RAGEngine`` and ``HybridRetriever``.
+    Shards may live in one client or in separate clients (one directory each).
+    """
+
+    def __init__(self, name: str, shards: Sequence, clients: Sequence, metadata: Optional[Dict] = None):
+        self.name = name
+        self.shards = list(shards)
+        self.clients = list(clients)  # clients[i] owns shards[i]
+        self.metadata = metadata
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix=f"{name}-shard")
+
+    @classmethod
+    def open(cls, clients: Sequence, name: str, num_shards: int, metadata: Optional[Dict] = None) -> "ShardedCollection":
+        """Get or create ``{name}.shard{i}`` for i < num_shards, spread round-robin over ``clients``"""
+        shard_clients = [clients[i % len(clients)] for i in range(num_shards)]
+        shards = [
+            client.get_or_create_collection(name=f"{name}.shard{i}", metadata=metadata)
+            for i, client in enumerate(shard_clients)
+        ]
+        return cls(name, shards, shard_clients, metadata)
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def _fan_out(self, call, shard_numbers: Optional[Sequence[int]] = None) -> List:
+        """``call(shard_number)`` on each shard in parallel, results in shard order"""
+        shard_numbers = list(range(len(self.shards)) if shard_numbers is None else shard_numbers)
+        if len(shard_numbers) == 1:
+            return [call(shard_numbers[0])]
+        return list(self._executor.map(call, shard_numbers))
+
+    def _partition(self, ids: Sequence[str]) -> Dict[int, List[int]]:
+        """Positions of ``ids`` grouped by owning shard"""
+        groups: Dict[int, List[int]] = {}
+        for position, item_id in enumerate(ids):
+            groups.setdefault(shard_index(item_id, len(self.shards)), []).append(position)
+        return groups
+
+    def count(self) -> int:
+        return sum(self._fan_out(lambda i: self.shards[i].count()))
+
+    def add(self, ids: List[str], embeddings=None, documents=None, metadatas=None):
+        groups = self._partition(ids)
+
+        def pick(values, positions):
+            return None if values is None else [values[p] for p in positions]
+
+        def add_group(shard_number):
+            positions = groups[shard_number]
+            self.shards[shard_number].add(
+                ids=pick(ids, positions),
+                embeddings=pick(embeddings, positions),
+                documents=pick(documents, positions),
+                metadatas=pick(metadatas, positions)
+            )
+
+        self._fan_out(add_group, list(groups))
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, include: Optional[List[str]] = None,
+            limit: Optional[int] = None, offset: Optional[int] = None) -> Dict[str, Any]:
+        kwargs = {}
+        if where:
+            kwargs["where"] = where
+        if include is not None:
+            kwargs["include"] = include
+
+        if ids is not None:
+            groups = self._partition(ids)
+            parts = self._fan_out(
+                lambda i: self.shards[i].get(ids=[ids[p] for p in groups[i]], **kwargs),
+                list(groups)
+            )
+            return self._concat(parts, include)
+
+        if limit is None and not offset:
+            return self._concat(self._fan_out(lambda i: self.shards[i].get(**kwargs)), include)
+
+        # Pages walk the shards in order; counts map the global offset onto one shard's range
+        if where:
+            rows = self._concat(self._fan_out(lambda i: self.shards[i].get(**kwargs)), include)
+            end = None if limit is None else (offset or 0) + limit
+            return {key: value[(offset or 0):end] if isinstance(value, list) else value for key, value in rows.items()}
+
+        parts = []
+        remaining = limit
+        skip = offset or 0
+        for shard, size in zip(self.shards, self._fan_out(lambda i: self.shards[i].count())):
+            if skip >= size:
+                skip -= size
+                continue
+            take = size - skip if remaining is None else min(remaining, size - skip)
+            parts.append(shard.get(limit=take, offset=skip, **kwargs))
+            skip = 0
+            if remaining is not None:
+                remaining -= take
+                if remaining <= 0:
+                    break
+        return self._concat(parts, include)
+
+    @staticmethod
+    def _concat(parts: List[Dict[str, Any]], include: Optional[List[str]]) -> Dict[str, Any]:
+        fields = ["ids"] + list(include if include is not None else ["documents", "metadatas"])
+        merged: Dict[str, Any] = {field: [] for field in fields}
+        for part in parts:
+            for field in fields:
+                values = part.get(field)
+                if values is not None:
+                    merged[field].extend(values)
+        return merged
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Top-``n_results`` per query embedding across all shards"""
+        kwargs = {"query_embeddings": query_embeddings, "n_results": n_results}
+        if where:
+            kwargs["where"] = where
+        if include is not None:
+            # Distances drive the merge even when the caller did not ask for them
+            kwargs["include"] = list(include) + ([] if "distances" in include else ["distances"])
+        parts = self._fan_out(lambda i: self.shards[i].query(**kwargs))
+
+        requested = _QUERY_FIELDS if include is None else ["ids"] + list(include)
+        fields = [field for field in _QUERY_FIELDS if field in requested and parts[0].get(field) is not None]
+        merged: Dict[str, Any] = {field: [] for field in fields}
+        for query_number in range(len(query_embeddings)):
+            # Each shard's list is already sorted by distance, so a k-way heap merge yields the global top-k
+            top = list(islice(heapq.merge(*[
+                [(distance, shard_number, rank) for rank, distance in enumerate(part["distances"][query_number])]
+                for shard_number, part in enumerate(parts)
+            ]), n_results))
+            for field in fields:
+                merged[field].append([parts[shard_number][field][query_number][rank] for _, shard_number, rank in top])
+        return merged
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        if ids is not None:
+            groups = self._partition(ids)
+            for shard_number, positions in groups.items():
+                self.shards[shard_number].delete(ids=[ids[p] for p in positions])
+            return
+        self._fan_out(lambda i: self.shards[i].delete(where=where))
+
+    def replace_shard(self, shard_number: int, collection):
+        """Swap in a rebuilt shard (see RAGEngine.compact_collection)"""
+        self.shards[shard_number] = collection
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,114 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+import time
+
+
+class Span:
+    """One timed node in a request trace"""
+    __slots__ = ("name", "duration", "children", "attributes")
+
+    def __init__(self, name: str, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.duration = 0.0
+        self.children: List["Span"] = []
+        self.attributes = attributes
+
+    def to_dict(self, depth: int = None) -> Dict[str, Any]:
+        """Serialize the span tree; ``depth`` limits how many child levels are included"""
+        result = {"name": self.name, "duration_ms": round(self.duration * 1000, 3)}
+        if self.attributes:
+            result["attributes"] = self.attributes
+        if self.children and (depth is None or depth > 0):
+            next_depth = None if depth is None else depth - 1
+            result["children"] = [child.to_dict(next_depth) for child in self.children]
+        return result
+
+    def share(self, parts: int, **attributes) -> "Span":
+        """Copy of the tree with every duration divided by ``parts`` (one clause's share of a batched stage)"""
+        copy = Span(self.name, {**(self.attributes or {}), **attributes} or None)
+        copy.duration = self.duration / parts
+        copy.children = [child.share(parts) for child in self.children]
+        return copy
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Total milliseconds per span name across all descendants"""
+        totals: Dict[str, float] = {}
+        stack = list(self.children)
+        while stack:
+            node = stack.pop()
+            totals[node.name] = totals.get(node.name, 0.0) + node.duration * 1000
+            stack.extend(node.children)
+        return {name: round(ms, 3) for name, ms in sorted(totals.items())}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("redlining_current_span", default=None)
+
+
+@contextmanager
+def start_trace(name: str):
+    """Open a root span; nested ``span`` calls in this context are recorded beneath it"""
+    root = Span(name)
+    token = _current_span.set(root)
+    start = time.perf_counter()
+    try:
+        yield root
+    finally:
+        root.duration = time.perf_counter() - start
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a child span (tagged with ``attributes``) when a trace is active; a single context lookup otherwise"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, attributes or None)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    start = time.perf_counter()
+    try:
+        yield child
+    finally:
+        child.duration = time.perf_counter() - start
+        _current_span.reset(token)
+
+
+@contextmanager
+def resume_trace(parent: Optional[Span]):
+    """Record nested spans under an existing span, e.g. one clause's tree while its document is processed; no-op for None"""
+    if parent is None:
+        yield None
+        return
+
+    token = _current_span.set(parent)
+    try:
+        yield parent
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def batch_span(name: str, parents: Optional[List[Span]]):
+    """Time a stage run once for many items and credit each of ``parents`` an equal share (tagged ``batch_size``).
+
+    Without ``parents`` this is a plain ``span``.
+    """
+    if parents is None:
+        with span(name) as child:
+            yield child
+        return
+
+    batch = Span(name)
+    token = _current_span.set(batch)
+    start = time.perf_counter()
+    try:
+        yield batch
+    finally:
+        batch.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        for parent in parents:
+            parent.children.append(batch.share(len(parents), batch_size=len(parents)))
@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import logging
+import re
+import threading
+import time
+
+from .hybrid_search import HybridRetriever
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKSPACE = "default"
+
+# Workspace names become part of Chroma collection names, so keep them to a safe subset
+# (Chroma also requires collection names to end in a letter or digit)
+_WORKSPACE_NAME = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9])?$")
+
+
+def validate_workspace(name: Optional[str]) -> str:
+    """Normalize a workspace name; raises ValueError for names Chroma cannot use"""
+    if not name:
+        return DEFAULT_WORKSPACE
+    if not _WORKSPACE_NAME.match(name):
+        raise ValueError(f"Invalid workspace name: {name!r} (letters, digits, '-' and '_', starting and ending with a letter or digit, max 63 characters)")
+    return name
+
+
+class Workspace:
+    """One workspace's clause collection, its hybrid retriever, a write lock and its in-flight user count"""
+
+    def __init__(self, name: str, collection, retriever: HybridRetriever):
+        self.name = name
+        self.collection = collection
+        self.retriever = retriever
+        # Serializes writes with deletions and compaction rebuilds
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+        # Requests inside WorkspaceRegistry.use(); the workspace is never closed while any remain
+        self.users = 0
+
+
+class WorkspaceRegistry:
+    """Per-workspace clause collections, opened lazily and closed after ``idle_seconds`` unused.
+
+    The default workspace uses the base collection itself and is never closed.
+    Other workspaces live in ``{base_name}__{workspace}``, so searches only
+    touch the data of the workspace they were issued for.
+    """
+
+    def __init__(self, open_collection: Callable, embedding_model, default: Workspace,
+                 base_name: str = "contract_clauses", idle_seconds: float = 900):
+        self.open_collection = open_collection  # name -> Chroma (or sharded) collection
+        self.embedding_model = embedding_model
+        self.base_name = base_name
+        self.idle_seconds = idle_seconds
+        self._workspaces: Dict[str, Workspace] = {DEFAULT_WORKSPACE: default}
+        self._lock = threading.Lock()
+        # Per-workspace locks serializing first opens, so a slow backfill only blocks its own workspace
+        self._opening: Dict[str, threading.Lock] = {}
+        self._last_sweep = time.monotonic()
+
+    def collection_name(self, workspace: str) -> str:
+        if workspace == DEFAULT_WORKSPACE:
+            return self.base_name
+        return f"{self.base_name}__{workspace}"
+
+    @contextmanager
+    def use(self, workspace: Optional[str] = None):
+        """Open workspace by name, kept open (never closed as idle) until the block exits"""
+        opened = self.get(workspace, hold=True)
+        try:
+            yield opened
+        finally:
+            with self._lock:
+                opened.users -= 1
+                opened.last_used = time.monotonic()
+
+    def get(self, workspace: Optional[str] = None, hold: bool = False) -> Workspace:
+        """Open workspace by name, creating its collection and lexical index on first use.
+
+        ``hold`` counts the caller as a user until it decrements ``users`` (see ``use``).
+        """
+        workspace = validate_workspace(workspace)
+        # Sweeping is cheap but there is no need to do it on every request
+        if self.idle_seconds > 0 and time.monotonic() - self._last_sweep >= min(self.idle_seconds, 60):
+            self.close_idle()
+
+        with self._lock:
+            opened = self._workspaces.get(workspace)
+            if opened is not None:
+                opened.last_used = time.monotonic()
+                opened.users += hold
+                return opened
+            opening = self._opening.setdefault(workspace, threading.Lock())
+
+        # Opening and the BM25 backfill run outside the registry lock; only this workspace waits
+        with opening:
+            with self._lock:
+                opened = self._workspaces.get(workspace)
+            created = self._open(workspace) if opened is None else None
+            with self._lock:
+                if created is not None:
+                    opened = self._workspaces.setdefault(workspace, created)
+                self._opening.pop(workspace, None)
+                opened.last_used = time.monotonic()
+                opened.users += hold
+        if created is not None and created is not opened and hasattr(created.collection, "close"):
+            created.collection.close()  # lost a race with a concurrent open after an idle close
+        return opened
+
+    def _open(self, workspace: str) -> Workspace:
+        collection = self.open_collection(self.collection_name(workspace))
+        retriever = HybridRetriever(collection, self.embedding_model)
+        retriever.index_existing_documents()
+        logger.info(f"Opened workspace {workspace}: {len(retriever.lexical_index)} clauses")
+        return Workspace(workspace, collection, retriever)
+
+    def close_idle(self, idle_seconds: Optional[float] = None) -> List[str]:
+        """Release workspaces unused for ``idle_seconds``; their data stays in Chroma"""
+        idle_seconds = self.idle_seconds if idle_seconds is None else idle_seconds
+        now = time.monotonic()
+        closed = []
+        with self._lock:
+            self._last_sweep = now
+            for name, opened in list(self._workspaces.items()):
+                # In-flight searches still use the collection (and a sharded one's fan-out executor)
+                if name == DEFAULT_WORKSPACE or opened.users or now - opened.last_used < idle_seconds:
+                    continue
+                # Skip workspaces in the middle of a write or compaction
+                if not opened.lock.acquire(blocking=False):
+                    continue
+                try:
+                    del self._workspaces[name]
+                    if hasattr(opened.collection, "close"):
+                        opened.collection.close()
+                    closed.append(name)
+                finally:
+                    opened.lock.release()
+
+        if closed:
+            logger.info(f"Closed idle workspaces: {', '.join(closed)}")
+        return closed
+
+    def open_workspaces(self) -> List[Workspace]:
+        with self._lock:
+            return list(self._workspaces.values())
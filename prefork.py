@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Pre-fork server: load the read-only parts of the system once, then fork the workers.
+
+The parent loads the embedding model, the LLM backend and a memory-mapped
+snapshot of the legal precedent index (see models/precedent_index.py), moves
+every object it created to the permanent GC generation and forks. Model
+weights and the snapshot stay shared copy-on-write between workers instead of
+being loaded once per worker. With INFERENCE_WORKER=true the models are loaded
+in one inference worker process instead (see models/inference_worker.py) and
+every web worker only holds a connection to it. Each worker then runs the normal FastAPI
+lifespan, which opens its own Chroma client, SQLite connection and thread
+pools. All workers accept connections from one socket bound by the parent,
+and a worker that dies is restarted.
+
+    python prefork.py --workers 4 --port 8000
+    python prefork.py --build-precedent-index   # (re)build the snapshot of legal_knowledge and exit
+"""
+
+import argparse
+import atexit
+import gc
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("prefork")
+
+CHROMA_PATH = "./chroma_db"
+
+
+def build_precedent_index(path: str) -> bool:
+    """Snapshot the persisted legal_knowledge collection into ``path``"""
+    import chromadb
+    from models.precedent_index import PrecedentIndex
+
+    collection = chromadb.PersistentClient(path=CHROMA_PATH).get_or_create_collection(name="legal_knowledge")
+    if collection.count() == 0:
+        logger.error("❌ legal_knowledge is empty; start the app once (python main.py) to seed it")
+        return False
+    PrecedentIndex.build(collection, path)
+    return True
+
+
+def preload_components(precedent_index_path: str = None) -> Dict[str, Any]:
+    """Embedding model, LLM backend (or inference worker client) and precedent index for ``main.preloaded_components``"""
+    from models.embedding_backends import get_embedding_model
+    from models.embedding_batcher import EmbeddingBatcher
+    from models.inference_worker import InferenceWorker
+    from models.llm_backends import create_llm_backend
+    from models.precedent_index import PrecedentIndex
+
+    components = {}
+    if os.getenv("INFERENCE_WORKER", "false").lower() in ("1", "true", "yes"):
+        # One worker process holds the models for all web workers; they connect on first use
+        inference_worker = InferenceWorker().start()
+        atexit.register(inference_worker.stop)
+        components["inference_client"] = inference_worker.client()
+    elif os.getenv("EMBEDDING_BACKEND", "torch").lower().startswith("onnx"):
+        # onnxruntime's thread pools do not survive fork(); each worker creates its own session
+        logger.warning("⚠️ ONNX embedding sessions are not fork-safe; every worker loads its own embedding model")
+    else:
+        model = get_embedding_model()
+        batch_wait_ms = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+        components["embedding_model"] = EmbeddingBatcher(model, max_wait_ms=batch_wait_ms) if batch_wait_ms > 0 else model
+
+    if "inference_client" not in components:
+        llm_backend = create_llm_backend()
+        if llm_backend is not None:
+            components["llm_backend"] = llm_backend
+
+    if precedent_index_path:
+        if not PrecedentIndex.exists(precedent_index_path):
+            # Chroma is opened in a separate process so none of its state is inherited by the workers
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--build-precedent-index", "--precedent-index", precedent_index_path],
+                check=False
+            )
+        if PrecedentIndex.exists(precedent_index_path):
+            components["precedent_index"] = PrecedentIndex(precedent_index_path)
+        else:
+            logger.warning("⚠️ No precedent index; every worker serves precedents from its own Chroma client")
+    return components
+
+
+def serve(workers: int = 2, host: str = "0.0.0.0", port: int = 8000, preload: bool = True,
+          load_components: Callable[[], Dict[str, Any]] = preload_components, log_level: str = "info"):
+    """Load components (once in this process when ``preload``, else in every worker), fork and supervise the workers"""
+    # Keep workers x intra-op threads within the cores; must be set before torch is imported
+    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // workers)))
+    import uvicorn
+    import main
+
+    if preload:
+        started = time.perf_counter()
+        main.preloaded_components.update(load_components())
+        logger.info(f"✅ Loaded {', '.join(main.preloaded_components) or 'nothing'} in {time.perf_counter() - started:.1f}s")
+    # Objects that exist now live as long as the workers; untracking them keeps the collector
+    # from writing to (and so un-sharing) their pages in every worker
+    gc.collect()
+    gc.freeze()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(2048)
+    listener.set_inheritable(True)
+
+    def spawn() -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                if not preload:
+                    main.preloaded_components.update(load_components())
+                uvicorn.Server(uvicorn.Config(main.app, log_level=log_level)).run(sockets=[listener])
+            finally:
+                os._exit(0)
+        return pid
+
+    children = {spawn(): time.monotonic() for _ in range(workers)}
+    logger.info(f"🚀 {workers} workers serving http://{host}:{port} (pids {', '.join(map(str, children))})")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning(f"⚠️ Worker {pid} exited with status {status}; restarting")
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)  # a worker crashing on startup must not turn into a fork loop
+        children[spawn()] = time.monotonic()
+
+    listener.close()
+    logger.info("Shutting down...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--precedent-index", default=os.getenv("PRECEDENT_INDEX_PATH", "./precedent_index"),
+                        help="Snapshot directory; empty to serve precedents from Chroma")
+    parser.add_argument("--no-preload", action="store_true", help="Load everything in each worker (for comparison)")
+    parser.add_argument("--build-precedent-index", action="store_true", help="Snapshot legal_knowledge and exit")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.build_precedent_index:
+        sys.exit(0 if build_precedent_index(args.precedent_index) else 1)
+
+    # Workers only use the snapshot handed over by preload_components and never build one concurrently
+    os.environ.pop("PRECEDENT_INDEX_PATH", None)
+    serve(
+        workers=args.workers, host=args.host, port=args.port, preload=not args.no_preload,
+        load_components=lambda: preload_components(args.precedent_index), log_level=args.log_level
+    )
+
+
+if __name__ == "__main__":
+    main()
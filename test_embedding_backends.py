@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Parity test for the ONNX embedding backends.
+Checks that ONNX (fp32 and dynamically quantized int8) embeddings match the
+PyTorch SentenceTransformer output with cosine similarity >= 0.99.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent))
+
+from models.embedding_backends import get_embedding_model, OnnxEmbeddingModel
+
+PARITY_THRESHOLD = 0.99
+
+SAMPLE_CLAUSES = [
+    "The Company shall indemnify and hold harmless the Client against all claims, damages, and expenses arising from any breach of this Agreement.",
+    "Either party may terminate this Agreement upon thirty (30) days written notice to the other party.",
+    "All notices required under this Agreement shall be given in writing and delivered by certified mail.",
+    "Liquidated damages",
+    "Provider waives all moral rights in such work.",
+    "This Agreement shall be governed by the laws of the State of California, without regard to conflict of law principles, "
+    "and any dispute arising out of or relating to this Agreement shall be resolved by binding arbitration in San Francisco.",
+]
+
+
+def _cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def test_onnx_parity():
+    """ONNX fp32 and int8 embeddings agree with the torch model"""
+    reference = get_embedding_model("torch").encode(SAMPLE_CLAUSES)
+
+    for quantize in (False, True):
+        backend = "onnx-int8" if quantize else "onnx"
+        onnx_model = OnnxEmbeddingModel(quantize=quantize)
+
+        # Small batch size forces several length buckets
+        embeddings = onnx_model.encode(SAMPLE_CLAUSES, batch_size=2)
+        cosines = _cosine_rows(reference, embeddings)
+
+        print(f"{backend}: min cosine {cosines.min():.4f}, mean cosine {cosines.mean():.4f}")
+        assert embeddings.shape == reference.shape
+        assert cosines.min() >= PARITY_THRESHOLD, f"{backend} parity too low: {cosines.min():.4f}"
+
+        # Single-string input returns a 1-D vector, like SentenceTransformer
+        assert onnx_model.encode(SAMPLE_CLAUSES[0]).shape == reference[0].shape
+
+
+if __name__ == "__main__":
+    test_onnx_parity()
+    print("✅ ONNX embedding backends match torch output")